@@ -1 +0,0 @@
-from . import emotion_detection_latest
\ No newline at end of file
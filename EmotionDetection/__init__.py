@@ -0,0 +1,44 @@
+"""Emotion detection for text::
+
+    from EmotionDetection import emotion_detector
+    emotion_detector("I love my life")
+
+Public names are imported on first access, so importing the package is
+cheap.  Backends (``requests`` for Watson, NumPy for the local scorer) load
+only when a text is first analyzed with them.
+"""
+
+import importlib
+
+
+# Public name -> submodule defining it
+_EXPORTS = {
+    "emotion_detector": "emotion_detection",
+    "analyze_emotions": "emotion_detection",
+    "EmotionClient": "emotion_detection",
+    "configure_client": "emotion_detection",
+    "emotion_detector_batch": "batch",
+    "iter_emotion_detector_batch": "batch",
+    "emotion_detector_columns": "batch",
+    "emotion_detector_async": "async_detector",
+    "EmotionResult": "result",
+    "get_backend": "backends",
+    "set_backend": "backends",
+    "get_cache": "cache",
+    "set_cache": "cache",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
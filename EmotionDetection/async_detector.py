@@ -0,0 +1,288 @@
+"""Native asyncio variant of emotion_detector.
+
+Requests go through a shared ``aiohttp`` connection pool (one per event
+loop) and an ``asyncio.Semaphore`` caps how many are in flight, so a single
+loop can keep hundreds of upstream calls open without a thread each.
+
+Like ``emotion_detector``, it analyzes with the default ``EmotionClient``'s
+backend, endpoint, model and result cache (see ``configure_client``).  The
+client's requests-based connection pool, timeouts and retries do not
+apply here; the aiohttp pool has its own (see ``configure_async_pool``).
+
+``aiohttp`` is an optional dependency; it is only imported when the async
+API is first used.
+"""
+
+import asyncio
+import time
+import weakref
+
+from . import metrics
+from .cache import cache_key
+from .circuit_breaker import default_circuit_breaker
+from .emotion_detection import default_client
+from .http_client import (
+    DEFAULT_BACKOFF_FACTOR,
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_READ_TIMEOUT,
+    DEFAULT_RETRIES,
+    RETRY_STATUS_CODES,
+)
+from .limiter import default_limiter
+from .result import (
+    BAD_REQUEST,
+    CIRCUIT_OPEN,
+    CONNECTION_ERROR,
+    EMPTY_RESULT,
+    ERROR,
+    PARSE_ERROR,
+    TIMEOUT,
+    UPSTREAM_ERROR,
+    EmotionResult,
+    as_result,
+)
+from .singleflight import async_upstream_calls
+from .watson import MODEL_ID, URL, build_payload, model_headers, parse_emotions
+
+
+DEFAULT_MAX_CONCURRENCY = 100
+
+def _import_aiohttp():
+    try:
+        import aiohttp
+    except ImportError:
+        raise ImportError(
+            "emotion_detector_async requires aiohttp; install it with 'pip install aiohttp'"
+        ) from None
+    return aiohttp
+
+
+class AsyncHTTPPool:
+    """Keep-alive ``aiohttp`` session with a semaphore-bounded concurrency limit.
+
+    The session and semaphore are created lazily on the event loop that first
+    uses the pool, and must only be used from that loop.
+
+    Args:
+        max_concurrency: Maximum number of requests in flight at once
+        connect_timeout: Seconds to wait for a connection to be established
+        read_timeout: Seconds to wait for the upstream response
+        retries: Retries for connection errors and gateway status codes
+        backoff_factor: Exponential backoff factor between retries
+    """
+
+    def __init__(self, max_concurrency=DEFAULT_MAX_CONCURRENCY,
+                 connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout=DEFAULT_READ_TIMEOUT,
+                 retries=DEFAULT_RETRIES,
+                 backoff_factor=DEFAULT_BACKOFF_FACTOR):
+        self.max_concurrency = max_concurrency
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+
+        self._session = None
+        self._semaphore = None
+
+    def _ensure_session(self):
+        if self._session is None or self._session.closed:
+            aiohttp = _import_aiohttp()
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency)
+            timeout = aiohttp.ClientTimeout(sock_connect=self.connect_timeout,
+                                            sock_read=self.read_timeout)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._session
+
+    async def post(self, url, json=None, headers=None):
+        """POST ``json`` to ``url`` and return ``(status_code, body_bytes)``.
+
+        Connection errors and gateway status codes are retried with backoff;
+        once retries are exhausted the last status is returned or the last
+        connection error is raised.
+        """
+        aiohttp = _import_aiohttp()
+        session = self._ensure_session()
+
+        async with self._semaphore:
+            attempt = 0
+            while True:
+                try:
+                    async with session.post(url, json=json, headers=headers) as response:
+                        status = response.status
+                        if status not in RETRY_STATUS_CODES or attempt >= self.retries:
+                            return status, await response.read()
+                except asyncio.TimeoutError:
+                    # Like the sync client, a timed-out request is not replayed
+                    raise
+                except aiohttp.ClientConnectionError:
+                    if attempt >= self.retries:
+                        raise
+
+                await asyncio.sleep(self.backoff_factor * (2 ** attempt))
+                attempt += 1
+
+    async def close(self):
+        """Close the underlying session and its pooled connections."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+# One pool per event loop: aiohttp sessions cannot be shared across loops
+_pools = weakref.WeakKeyDictionary()
+_pool_options = {}
+
+
+def default_async_pool():
+    """Return the shared pool for the running event loop."""
+    loop = asyncio.get_running_loop()
+    pool = _pools.get(loop)
+    if pool is None:
+        pool = AsyncHTTPPool(**_pool_options)
+        _pools[loop] = pool
+    return pool
+
+
+def configure_async_pool(**options):
+    """Set the options (as for ``AsyncHTTPPool``) used for new shared pools.
+
+    Pools already created for running loops keep their options until
+    ``close_async_pool`` is awaited on that loop.
+    """
+    _pool_options.clear()
+    _pool_options.update(options)
+
+
+async def close_async_pool():
+    """Close and forget the shared pool of the running event loop."""
+    pool = _pools.pop(asyncio.get_running_loop(), None)
+    if pool is not None:
+        await pool.close()
+
+
+async def emotion_detector_async(text_to_analyse, pool=None, use_cache=True, detailed=False):
+    """Async counterpart of ``emotion_detector`` with the same result shape.
+
+    Args:
+        text_to_analyse: String of text to analyze
+        pool: ``AsyncHTTPPool`` to send the request through, defaults to the
+            shared pool of the running event loop
+        use_cache: Whether to consult and fill the configured result cache
+        detailed: Add the per-span ``mentions`` of the upstream response
+
+    Returns:
+        Dictionary of the five emotion scores plus ``dominant_emotion``, or
+        the None-filled dictionary when the text is empty or the call fails
+
+    Raises:
+        Overloaded: The upstream limiter shed the call (see
+            EmotionDetection.limiter)
+    """
+    # Check for empty or None input
+    if not text_to_analyse or text_to_analyse.strip() == "":
+        return EMPTY_RESULT.to_dict()
+
+    # Local backends are CPU-only and fast; score them inline
+    client = default_client()
+    backend = client.backend
+    if not backend.remote:
+        analyze = backend.analyze_detailed if detailed else backend.analyze
+        return as_result(analyze(text_to_analyse)).to_dict()
+
+    url = getattr(backend, "url", None) or URL
+    key = cache_key(text_to_analyse, backend.model_id, detailed)
+    cache = client.result_cache() if use_cache else None
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+    # Concurrent callers for the same text and endpoint share one upstream request
+    result = (await async_upstream_calls.do(
+        (url, key), _analyze_upstream_async, text_to_analyse, pool, detailed, url,
+        backend.model_id)).to_dict()
+
+    # Never cache the None-filled error result
+    if cache is not None and result["dominant_emotion"] is not None:
+        cache.set(key, result)
+
+    return result
+
+
+async def _analyze_upstream_async(text_to_analyse, pool, detailed=False, url=None,
+                                  model_id=MODEL_ID):
+    aiohttp = _import_aiohttp()
+    if pool is None:
+        pool = default_async_pool()
+
+    breaker = default_circuit_breaker()
+    if not breaker.allow_request():
+        # Fail fast instead of waiting for a timeout from a dead upstream
+        metrics.UPSTREAM_RESPONSES.inc("circuit_open")
+        return EmotionResult.failure(CIRCUIT_OPEN)
+
+    limiter = default_limiter()
+    if limiter is not None:
+        try:
+            await limiter.acquire_async()
+        except BaseException:
+            breaker.release()
+            raise
+
+    healthy = False
+    call_started = time.perf_counter()
+    try:
+        started = time.perf_counter()
+        status, body = await pool.post(url or URL, json=build_payload(text_to_analyse),
+                                       headers=model_headers(model_id))
+        metrics.REQUEST_PHASES.observe(time.perf_counter() - started, "upstream")
+        metrics.UPSTREAM_RESPONSES.inc(str(status))
+        healthy = status < 500
+
+        # 400, 500 and any other status all yield an empty result
+        if status == 200:
+            started = time.perf_counter()
+            result = parse_emotions(body, detailed)
+            metrics.REQUEST_PHASES.observe(time.perf_counter() - started, "parse")
+            return result
+        if status == 400:
+            return EmotionResult.failure(BAD_REQUEST)
+        if status == 500:
+            return EmotionResult.failure(UPSTREAM_ERROR)
+        return EmotionResult.failure(UPSTREAM_ERROR, f"HTTP {status}")
+
+    except asyncio.TimeoutError:
+        metrics.UPSTREAM_RESPONSES.inc("timeout")
+        print("Error: Request timed out")
+        return EmotionResult.failure(TIMEOUT)
+
+    except asyncio.CancelledError:
+        # Abandoned by the caller; says nothing about the upstream's health
+        healthy = None
+        raise
+
+    except aiohttp.ClientConnectionError:
+        metrics.UPSTREAM_RESPONSES.inc("connection_error")
+        print("Error: Unable to connect to the service")
+        return EmotionResult.failure(CONNECTION_ERROR)
+
+    except (KeyError, IndexError, ValueError) as e:
+        healthy = False
+        print(f"Error: Unable to parse response - {str(e)}")
+        return EmotionResult.failure(PARSE_ERROR, str(e))
+
+    except Exception as e:
+        print(f"Unexpected error: {str(e)}")
+        return EmotionResult.failure(ERROR, str(e))
+
+    finally:
+        if healthy is None:
+            breaker.release()
+        elif healthy:
+            breaker.record_success()
+        else:
+            breaker.record_failure()
+        if limiter is not None:
+            limiter.release(time.perf_counter() - call_started, dropped=healthy is False)
@@ -0,0 +1,112 @@
+"""Pluggable scoring backends behind emotion_detector.
+
+A backend turns one text into the standard result: a dictionary of the
+five emotion scores plus ``dominant_emotion`` (None-filled on failure), or
+the equivalent ``EmotionResult``.  Two are built in:
+
+* ``"watson"`` - the remote Watson EmotionPredict service (default)
+* ``"local"`` - a CPU-only lexicon scorer that never leaves the box
+
+The active backend is chosen with the ``EMOTION_DETECTOR_BACKEND``
+environment variable or ``set_backend``.
+"""
+
+import os
+import threading
+
+from .result import Mention, as_result
+from .sentences import sentence_spans
+
+
+class Backend:
+    """Interface every scoring backend implements.
+
+    Attributes:
+        name: Short name used to select the backend
+        model_id: Identifies the model; part of result cache keys
+        remote: Whether scoring leaves the process (enables caching and
+            request coalescing in emotion_detector)
+    """
+
+    name = None
+    model_id = None
+    remote = False
+
+    def analyze(self, text_to_analyse):
+        """Return the result dictionary or EmotionResult for one non-empty text."""
+        raise NotImplementedError
+
+    def analyze_batch(self, texts):
+        """Return results for ``texts``, in order."""
+        return [self.analyze(text) for text in texts]
+
+    def analyze_detailed(self, text_to_analyse):
+        """Return the EmotionResult for one text with per-sentence ``mentions``.
+
+        Backends whose model reports spans itself override this; by default
+        every sentence is scored along with the whole text in one batch.
+        """
+        spans = sentence_spans(text_to_analyse)
+        texts = [text_to_analyse] + [text_to_analyse[begin:end] for begin, end in spans]
+        results = [as_result(result) for result in self.analyze_batch(texts)]
+        if not results[0].scored:
+            return results[0]
+        mentions = tuple(Mention(begin, end, text_to_analyse[begin:end], result)
+                         for (begin, end), result in zip(spans, results[1:]))
+        return results[0]._replace(mentions=mentions)
+
+
+def _watson_backend():
+    from .watson import WatsonBackend
+    return WatsonBackend()
+
+
+def _local_backend():
+    # Imported lazily so NumPy is only needed when the local backend is used
+    from .lexicon import LexiconBackend
+    return LexiconBackend()
+
+
+BACKEND_FACTORIES = {
+    "watson": _watson_backend,
+    "local": _local_backend,
+}
+
+
+def create_backend(name):
+    """Build a new backend by name ("watson" or "local")."""
+    try:
+        factory = BACKEND_FACTORIES[name]
+    except KeyError:
+        raise ValueError(f"Unknown emotion backend: {name!r}") from None
+    return factory()
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    """Return the active backend, built from ``EMOTION_DETECTOR_BACKEND`` on first use."""
+    global _backend
+    backend = _backend
+    if backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = create_backend(os.environ.get("EMOTION_DETECTOR_BACKEND", "watson").lower())
+            backend = _backend
+    return backend
+
+
+def set_backend(backend):
+    """Make ``backend`` (a ``Backend`` instance or a backend name) the active one.
+
+    Returns:
+        The backend now in use
+    """
+    global _backend
+    if isinstance(backend, str):
+        backend = create_backend(backend)
+    with _backend_lock:
+        _backend = backend
+    return backend
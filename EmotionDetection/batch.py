@@ -0,0 +1,254 @@
+"""Analyze many texts at once with a bounded pool of worker threads."""
+
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from itertools import islice
+
+from .cache import cache_key
+from .emotion_detection import analyze_emotions, default_client, emotion_detector
+from .limiter import Overloaded
+from .result import EMPTY_RESULT, ERROR, EmotionResult, as_result
+
+
+DEFAULT_MAX_CONCURRENCY = 8
+
+# Texts handed to a local backend's vectorized analyze_batch at a time
+LOCAL_CHUNK_SIZE = 1024
+
+# Texts looked up (and new results written) per bulk store operation
+STORE_CHUNK_SIZE = 512
+
+
+def iter_emotion_detector_batch(texts, max_concurrency=DEFAULT_MAX_CONCURRENCY, detector=None,
+                                compact=False, client=None):
+    """Yield emotion_detector results for ``texts`` in input order.
+
+    At most ``max_concurrency`` requests are in flight at a time and only a
+    small window of pending results is buffered, so ``texts`` may be a lazy
+    iterable of any length.  When the configured cache supports bulk
+    ``get_many``/``put_many`` (such as ResultStore), texts are looked up a
+    chunk at a time and only unseen texts are sent upstream.
+
+    Args:
+        texts: Iterable of strings to analyze
+        max_concurrency: Number of worker threads (and in-flight requests)
+        detector: Function used to analyze one text, defaults to emotion_detector
+            (analyze_emotions when ``compact``)
+        compact: Yield EmotionResult tuples instead of dictionaries, which
+            take about half the memory when results are kept
+        client: EmotionClient to analyze with, defaults to the one behind
+            emotion_detector
+
+    Yields:
+        One result per input text, in the same order
+
+    Raises:
+        Overloaded: A limiter installed with ``configure_limiter`` shed a
+            text instead of letting it wait
+    """
+    if max_concurrency < 1:
+        raise ValueError("max_concurrency must be at least 1")
+    if detector is None:
+        if client is None:
+            client = default_client()
+            detector = analyze_emotions if compact else emotion_detector
+        else:
+            detector = client.analyze_emotions if compact else client.emotion_detector
+        backend = client.backend
+        if not backend.remote:
+            # Local backends score whole chunks at once; threads would only add overhead
+            yield from _iter_local_batch(backend, texts, compact)
+            return
+        cache = client.result_cache()
+        if hasattr(cache, "get_many"):
+            yield from _iter_stored_batch(client, cache, texts, max_concurrency, compact)
+            return
+
+    # Keep a few more tasks queued than workers so no worker sits idle while
+    # the caller consumes results
+    window = max_concurrency * 2
+    pending = deque()
+
+    with ThreadPoolExecutor(max_workers=max_concurrency,
+                            thread_name_prefix="emotion-batch") as executor:
+        try:
+            for text in texts:
+                pending.append(executor.submit(detector, text))
+                if len(pending) >= window:
+                    yield _result_of(pending.popleft(), compact)
+
+            while pending:
+                yield _result_of(pending.popleft(), compact)
+        finally:
+            # The caller stopped early; don't send requests nobody will read
+            for future in pending:
+                future.cancel()
+
+
+def _iter_stored_batch(client, store, texts, max_concurrency, compact=False):
+    model_id = client.backend.model_id
+    window = max_concurrency * 2
+    # (cache key, Future) for texts sent upstream, (None, result) otherwise
+    pending = deque()
+    new_results = {}
+
+    def finish(key, value):
+        if key is None:
+            return value
+        result = _result_of(value, compact=True)
+        if result.ok:
+            new_results[key] = result.to_dict()
+            if len(new_results) >= STORE_CHUNK_SIZE:
+                store.put_many(new_results)
+                new_results.clear()
+        return result
+
+    texts = iter(texts)
+    with ThreadPoolExecutor(max_workers=max_concurrency,
+                            thread_name_prefix="emotion-batch") as executor:
+        try:
+            while True:
+                chunk = list(islice(texts, STORE_CHUNK_SIZE))
+                if not chunk:
+                    break
+                keys = [cache_key(text, model_id) if text and text.strip() else None
+                        for text in chunk]
+                found = store.get_many([key for key in keys if key is not None])
+                # Repeats of an unseen text within the chunk share one request
+                submitted = {}
+
+                for text, key in zip(chunk, keys):
+                    if key is None:
+                        pending.append((None, EMPTY_RESULT))
+                    elif key in found:
+                        pending.append((None, EmotionResult.from_dict(found[key])))
+                    else:
+                        # The store was already consulted; write back in bulk
+                        if key not in submitted:
+                            submitted[key] = executor.submit(client.analyze_emotions, text, False)
+                        pending.append((key, submitted[key]))
+                    if len(pending) >= window:
+                        result = finish(*pending.popleft())
+                        yield result if compact else result.to_dict()
+
+            while pending:
+                result = finish(*pending.popleft())
+                yield result if compact else result.to_dict()
+        finally:
+            for key, value in pending:
+                if key is not None:
+                    value.cancel()
+            # Keep whatever was paid for, even when the caller stopped early
+            store.put_many(new_results)
+
+
+def _iter_local_batch(backend, texts, compact=False):
+    texts = iter(texts)
+    while True:
+        chunk = list(islice(texts, LOCAL_CHUNK_SIZE))
+        if not chunk:
+            return
+        # Empty texts get the empty result, like emotion_detector
+        valid = [text for text in chunk if text and text.strip()]
+        scored = iter(backend.analyze_batch(valid))
+        for text in chunk:
+            result = next(scored) if text and text.strip() else EMPTY_RESULT
+            if compact:
+                yield as_result(result)
+            else:
+                yield result if isinstance(result, dict) else result.to_dict()
+
+
+def iter_emotion_detector_completed(items, max_concurrency=DEFAULT_MAX_CONCURRENCY, detector=None):
+    """Yield ``(item_id, result)`` pairs in completion order.
+
+    Like ``iter_emotion_detector_batch`` the number of in-flight requests is
+    bounded, but a result is handed back as soon as it is ready instead of
+    waiting for earlier items.
+
+    Args:
+        items: Iterable of ``(item_id, text)`` pairs
+        max_concurrency: Number of worker threads (and in-flight requests)
+        detector: Function used to analyze one text, defaults to emotion_detector
+
+    Yields:
+        ``(item_id, result)`` for every input pair
+    """
+    if max_concurrency < 1:
+        raise ValueError("max_concurrency must be at least 1")
+    if detector is None:
+        detector = emotion_detector
+
+    window = max_concurrency * 2
+    pending = {}
+
+    with ThreadPoolExecutor(max_workers=max_concurrency,
+                            thread_name_prefix="emotion-batch") as executor:
+        try:
+            for item_id, text in items:
+                pending[executor.submit(detector, text)] = item_id
+                if len(pending) >= window:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield pending.pop(future), _result_of(future)
+
+            for future in as_completed(list(pending)):
+                yield pending.pop(future), _result_of(future)
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def _result_of(future, compact=False):
+    try:
+        return future.result()
+    except Overloaded:
+        # A shed text was never analyzed; it must not pass for a failed result
+        raise
+    except Exception as e:
+        # emotion_detector handles its own errors; this only guards custom detectors
+        print(f"Unexpected error: {str(e)}")
+        failed = EmotionResult.failure(ERROR, str(e))
+        return failed if compact else failed.to_dict()
+
+
+def emotion_detector_batch(texts, max_concurrency=DEFAULT_MAX_CONCURRENCY, detector=None,
+                           compact=False, client=None):
+    """Analyze every text in ``texts`` concurrently.
+
+    Args:
+        texts: Iterable of strings to analyze
+        max_concurrency: Number of worker threads (and in-flight requests)
+        detector: Function used to analyze one text, defaults to emotion_detector
+        compact: Return EmotionResult tuples instead of dictionaries
+        client: EmotionClient to analyze with, defaults to the one behind
+            emotion_detector
+
+    Returns:
+        List of results in input order; failed items hold the None-filled
+        dictionary (or an empty EmotionResult when ``compact``)
+
+    Raises:
+        Overloaded: As for ``iter_emotion_detector_batch``
+    """
+    return list(iter_emotion_detector_batch(texts, max_concurrency, detector, compact, client))
+
+
+def emotion_detector_columns(texts, max_concurrency=DEFAULT_MAX_CONCURRENCY, client=None):
+    """Analyze ``texts`` and return compact columnar results.
+
+    Backends with a vectorized ``score_columns`` (such as the local lexicon
+    backend) score the whole batch with array operations; others are fanned
+    out like ``emotion_detector_batch`` and packed into columns.  Requires
+    NumPy.
+
+    Returns:
+        ``EmotionColumns`` with one array per emotion plus the dominant index
+    """
+    from .vectorized import EmotionColumns
+
+    backend = (client or default_client()).backend
+    if hasattr(backend, "score_columns"):
+        return backend.score_columns(texts)
+    return EmotionColumns.from_results(
+        iter_emotion_detector_batch(texts, max_concurrency, client=client))
@@ -0,0 +1,288 @@
+"""Result caches placed in front of the upstream EmotionPredict call.
+
+Two backends share one small interface (``get``, ``set``, ``clear``,
+``stats``):
+
+* ``MemoryCache`` - in-process LRU with a per-entry TTL
+* ``DiskCache`` - one JSON file per entry in a shared directory, so several
+  gunicorn workers (or batch processes) on a host share hits
+
+``EmotionDetection.store.ResultStore`` is a third, persistent option for
+re-scoring the same corpora, with bulk ``get_many``/``put_many``.
+
+Keys are derived from the normalized text (the exact text for detailed
+results) and the model ID with ``cache_key``.  Only successful results should be stored; callers must never
+cache the None-filled error dictionary.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+
+DEFAULT_MAXSIZE = 10000
+DEFAULT_TTL = 3600
+
+
+def normalize_text(text):
+    """Normalize text for cache lookups: NFC form, collapsed whitespace."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def cache_key(text, model_id, detailed=False):
+    """Stable key for ``text`` analyzed by ``model_id``.
+
+    Detailed results (with per-span mentions) are kept under their own key.
+    Their mentions hold offsets into the exact text, so that key is built
+    from the text as given, without normalizing it.
+    """
+    if detailed:
+        raw = model_id + "\0detailed\0" + text
+    else:
+        raw = model_id + "\0" + normalize_text(text)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class _Stats:
+    """Hit/miss counters shared by both backends."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    def snapshot(self, size):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": size,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class MemoryCache:
+    """Thread-safe in-process LRU cache with a time-to-live per entry.
+
+    Args:
+        maxsize: Maximum number of entries; the least recently used is evicted
+        ttl: Seconds an entry stays valid, or None to never expire
+    """
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, ttl=DEFAULT_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = _Stats()
+
+    def get(self, key):
+        """Return a copy of the cached value for ``key`` or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self._stats.hits += 1
+                    return dict(value)
+                del self._entries[key]
+            self._stats.misses += 1
+            return None
+
+    def set(self, key, value):
+        """Store ``value`` under ``key``, evicting the oldest entries if full."""
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._entries[key] = (expires_at, dict(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._stats = _Stats()
+
+    def stats(self):
+        """Return hits, misses, size and hit_rate for this cache."""
+        with self._lock:
+            return self._stats.snapshot(len(self._entries))
+
+
+class DiskCache:
+    """Cache shared between processes through a directory of JSON files.
+
+    Writes go to a temporary file that is atomically renamed into place, so
+    concurrent readers never see partial entries.  Expiry uses the file
+    modification time.  Hit/miss counters are per process.
+
+    Args:
+        directory: Directory holding the cache files, created if missing
+        maxsize: Maximum number of entries; the oldest are pruned first
+        ttl: Seconds an entry stays valid, or None to never expire
+        prune_interval: Number of writes between size/expiry sweeps
+    """
+
+    SUFFIX = ".json"
+
+    def __init__(self, directory, maxsize=DEFAULT_MAXSIZE, ttl=DEFAULT_TTL, prune_interval=100):
+        self.directory = directory
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.prune_interval = prune_interval
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._stats = _Stats()
+        self._writes = 0
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + self.SUFFIX)
+
+    def _expired(self, mtime, now):
+        return self.ttl is not None and mtime + self.ttl <= now
+
+    def get(self, key):
+        """Return the cached value for ``key`` or None."""
+        path = self._path(key)
+        value = None
+        try:
+            if not self._expired(os.path.getmtime(path), time.time()):
+                with open(path, encoding="utf-8") as f:
+                    value = json.load(f)
+        except (OSError, ValueError):
+            # Missing, being replaced or corrupt: treat as a miss
+            value = None
+
+        with self._lock:
+            if value is None:
+                self._stats.misses += 1
+            else:
+                self._stats.hits += 1
+        return value
+
+    def set(self, key, value):
+        """Atomically write ``value`` for ``key``."""
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(value, f)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            return
+
+        with self._lock:
+            self._writes += 1
+            should_prune = self._writes % self.prune_interval == 0
+        if should_prune:
+            self.prune()
+
+    def _entries(self):
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith(self.SUFFIX):
+                    try:
+                        entries.append((entry.stat().st_mtime, entry.path))
+                    except OSError:
+                        pass
+        return entries
+
+    def prune(self):
+        """Delete expired entries, then the oldest ones beyond ``maxsize``."""
+        now = time.time()
+        live = []
+        for mtime, path in self._entries():
+            if self._expired(mtime, now):
+                self._remove(path)
+            else:
+                live.append((mtime, path))
+
+        if len(live) > self.maxsize:
+            live.sort()
+            for _, path in live[:len(live) - self.maxsize]:
+                self._remove(path)
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.unlink(path)
+        except OSError:
+            # Another process got there first
+            pass
+
+    def clear(self):
+        for _, path in self._entries():
+            self._remove(path)
+        with self._lock:
+            self._stats = _Stats()
+
+    def stats(self):
+        """Return hits, misses, size and hit_rate for this process."""
+        size = len(self._entries())
+        with self._lock:
+            return self._stats.snapshot(size)
+
+
+_cache = None
+_cache_configured = False
+_cache_lock = threading.Lock()
+
+
+def _cache_from_env():
+    # EMOTION_DETECTOR_CACHE selects the backend: "memory" (default), "disk",
+    # "sqlite" or "none"
+    backend = os.environ.get("EMOTION_DETECTOR_CACHE", "memory").lower()
+    maxsize = int(os.environ.get("EMOTION_DETECTOR_CACHE_SIZE", DEFAULT_MAXSIZE))
+    ttl = float(os.environ.get("EMOTION_DETECTOR_CACHE_TTL", DEFAULT_TTL))
+
+    if backend == "memory":
+        return MemoryCache(maxsize=maxsize, ttl=ttl)
+    if backend == "disk":
+        directory = os.environ.get(
+            "EMOTION_DETECTOR_CACHE_DIR",
+            os.path.join(tempfile.gettempdir(), "emotion_detector_cache"))
+        return DiskCache(directory, maxsize=maxsize, ttl=ttl)
+    if backend == "sqlite":
+        from .store import ResultStore
+        path = os.environ.get(
+            "EMOTION_DETECTOR_CACHE_PATH",
+            os.path.join(tempfile.gettempdir(), "emotion_detector_results.sqlite3"))
+        # Persistent by default; EMOTION_DETECTOR_CACHE_TTL applies only when set
+        store_ttl = os.environ.get("EMOTION_DETECTOR_CACHE_TTL")
+        return ResultStore(path, ttl=float(store_ttl) if store_ttl else None)
+    if backend in ("none", "off", ""):
+        return None
+    raise ValueError(f"Unknown EMOTION_DETECTOR_CACHE backend: {backend!r}")
+
+
+def get_cache():
+    """Return the cache used by emotion_detector, or None when disabled.
+
+    On first use it is built from the ``EMOTION_DETECTOR_CACHE*`` environment
+    variables.
+    """
+    global _cache, _cache_configured
+    if not _cache_configured:
+        with _cache_lock:
+            if not _cache_configured:
+                _cache = _cache_from_env()
+                _cache_configured = True
+    return _cache
+
+
+def set_cache(cache):
+    """Install ``cache`` (any object with get/set) for emotion_detector; None disables caching."""
+    global _cache, _cache_configured
+    with _cache_lock:
+        _cache = cache
+        _cache_configured = True
@@ -0,0 +1,101 @@
+"""Splitting long documents into chunks and combining their scores.
+
+``chunk_spans`` cuts a text into pieces of at most ``chunk_size``
+characters, ending them at paragraph breaks where it can and otherwise at
+sentence ends; only a sentence longer than a whole chunk is cut inside, at
+a space.  ``combine_results`` averages the chunk scores weighted by chunk
+length into one result.
+
+The defaults come from ``EMOTION_CHUNK_SIZE`` (2000 characters) and
+``EMOTION_CHUNK_PARALLELISM`` (4 chunks scored at a time).
+"""
+
+import os
+
+from .result import EmotionResult, EMOTIONS, Mention
+from .sentences import sentence_spans
+
+
+DEFAULT_CHUNK_SIZE = int(os.environ.get("EMOTION_CHUNK_SIZE", 2000))
+DEFAULT_PARALLELISM = int(os.environ.get("EMOTION_CHUNK_PARALLELISM", 4))
+
+
+def _pieces(text, chunk_size):
+    # Sentence spans no longer than chunk_size, flagged when a paragraph
+    # break precedes them
+    previous_end = 0
+    for begin, end in sentence_spans(text):
+        paragraph = text.count("\n", previous_end, begin) >= 2
+        previous_end = end
+        while end - begin > chunk_size:
+            cut = text.rfind(" ", begin + 1, begin + chunk_size + 1)
+            if cut <= begin:
+                cut = begin + chunk_size
+            yield begin, cut, paragraph
+            paragraph = False
+            begin = cut
+            while text[begin].isspace():
+                begin += 1
+        yield begin, end, paragraph
+
+
+def chunk_spans(text, chunk_size=None):
+    """Return ``(begin, end)`` offsets of the chunks of ``text``.
+
+    Args:
+        text: Document to split
+        chunk_size: Largest chunk in characters, defaults to DEFAULT_CHUNK_SIZE
+
+    Returns:
+        Spans in text order; whitespace between chunks belongs to none
+    """
+    chunk_size = chunk_size or DEFAULT_CHUNK_SIZE
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+
+    spans = []
+    start = stop = None
+    for begin, end, paragraph in _pieces(text, chunk_size):
+        if start is not None:
+            # Close the chunk when the piece does not fit, or at a paragraph
+            # break once the chunk is reasonably full
+            full = end - start > chunk_size or (paragraph and stop - start >= chunk_size // 2)
+            if full:
+                spans.append((start, stop))
+                start = None
+        if start is None:
+            start = begin
+        stop = end
+    if start is not None:
+        spans.append((start, stop))
+    return spans
+
+
+def combine_results(results, spans):
+    """Average chunk results into one, weighting each chunk by its length.
+
+    Args:
+        results: EmotionResult per chunk
+        spans: ``(begin, end)`` of each chunk in the document
+
+    Returns:
+        The combined EmotionResult, or the first failed chunk result when
+        any chunk could not be scored.  Chunks with no signal still count
+        with their uniform scores.  Mentions of detailed chunk results
+        are kept, shifted to document offsets.
+    """
+    totals = dict.fromkeys(EMOTIONS, 0.0)
+    weight = 0
+    mentions = None
+    for result, (begin, end) in zip(results, spans):
+        if not result.scored:
+            return result
+        for emotion in EMOTIONS:
+            totals[emotion] += getattr(result, emotion) * (end - begin)
+        weight += end - begin
+        if result.mentions is not None:
+            mentions = (mentions or ()) + tuple(
+                Mention(mention.begin + begin, mention.end + begin, mention.text, mention.result)
+                for mention in result.mentions)
+    return EmotionResult.from_scores({emotion: total / weight for emotion, total in totals.items()},
+                                     mentions)
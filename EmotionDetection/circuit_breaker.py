@@ -0,0 +1,229 @@
+"""Circuit breaker for the upstream EmotionPredict service.
+
+While the upstream is healthy the breaker is *closed* and every call goes
+through.  When the share of failed calls (timeouts, connection errors, 5xx
+responses, unparsable bodies) in a sliding time window reaches the
+threshold, the breaker *opens* and calls fail immediately with the
+None-filled result instead of each waiting for the full timeout.  After
+``open_seconds`` it turns *half-open* and lets a few probe calls through:
+a successful probe closes it again, a failed one re-opens it.
+
+State changes are logged on the ``EmotionDetection.circuit_breaker``
+logger and ``stats`` reports the current state.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+DEFAULT_FAILURE_RATE = 0.5
+DEFAULT_MINIMUM_CALLS = 10
+DEFAULT_WINDOW = 30.0
+DEFAULT_OPEN_SECONDS = 15.0
+
+
+class CircuitBreaker:
+    """Failure-rate circuit breaker, safe to share between threads.
+
+    Args:
+        failure_rate_threshold: Fraction of failed calls in the window that
+            opens the breaker
+        minimum_calls: Calls needed in the window before the failure rate
+            is evaluated
+        window: Length of the sliding window in seconds
+        open_seconds: How long the breaker stays open before probing
+        half_open_max_calls: Probe calls allowed at once while half-open
+        name: Name used in log messages
+        clock: Monotonic time source, replaceable in tests
+    """
+
+    def __init__(self, failure_rate_threshold=DEFAULT_FAILURE_RATE,
+                 minimum_calls=DEFAULT_MINIMUM_CALLS, window=DEFAULT_WINDOW,
+                 open_seconds=DEFAULT_OPEN_SECONDS, half_open_max_calls=1,
+                 name="EmotionPredict", clock=time.monotonic):
+        if not 0 < failure_rate_threshold <= 1:
+            raise ValueError("failure_rate_threshold must be in (0, 1]")
+        self.failure_rate_threshold = failure_rate_threshold
+        self.minimum_calls = max(1, minimum_calls)
+        self.window = window
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = max(1, half_open_max_calls)
+        self.name = name
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        self._outcomes = deque()  # (timestamp, failed) per call in the window
+        self._failures = 0
+        self._state = CLOSED
+        self._opened_at = None
+        self._probes = 0
+        self.rejected = 0
+        self.times_opened = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            self._refresh(self.clock())
+            return self._state
+
+    def allow_request(self):
+        """Return True if a call may go upstream now.
+
+        Callers that get True must report the outcome with
+        ``record_success`` or ``record_failure``.
+        """
+        now = self.clock()
+        with self._lock:
+            self._refresh(now)
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and self._probes < self.half_open_max_calls:
+                self._probes += 1
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        self._record(False)
+
+    def record_failure(self):
+        self._record(True)
+
+    def release(self):
+        """Give back an allowed call whose outcome is unknown (e.g. cancelled)."""
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probes = max(0, self._probes - 1)
+
+    def reset(self):
+        """Close the breaker and forget every recorded call."""
+        with self._lock:
+            self._close()
+
+    def stats(self):
+        """Return the state, windowed call counts and rejected calls."""
+        now = self.clock()
+        with self._lock:
+            self._refresh(now)
+            self._trim(now)
+            calls = len(self._outcomes)
+            retry_after = None
+            if self._state == OPEN:
+                retry_after = max(0.0, self._opened_at + self.open_seconds - now)
+            return {
+                "state": self._state,
+                "calls": calls,
+                "failures": self._failures,
+                "failure_rate": self._failures / calls if calls else 0.0,
+                "rejected": self.rejected,
+                "times_opened": self.times_opened,
+                "retry_after": retry_after,
+            }
+
+    def _record(self, failed):
+        now = self.clock()
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probes = max(0, self._probes - 1)
+                if failed:
+                    self._open(now, "probe call failed")
+                else:
+                    self._close()
+                    logger.info("Circuit breaker %s closed: probe call succeeded", self.name)
+                return
+            if self._state == OPEN:
+                # Late result of a call that started before the breaker opened
+                return
+
+            self._outcomes.append((now, failed))
+            self._failures += failed
+            self._trim(now)
+            calls = len(self._outcomes)
+            if calls >= self.minimum_calls and self._failures / calls >= self.failure_rate_threshold:
+                self._open(now, f"{self._failures} of {calls} calls failed in {self.window:g}s")
+
+    def _trim(self, now):
+        horizon = now - self.window
+        while self._outcomes and self._outcomes[0][0] <= horizon:
+            _, failed = self._outcomes.popleft()
+            self._failures -= failed
+
+    def _refresh(self, now):
+        if self._state == OPEN and now - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._probes = 0
+            logger.info("Circuit breaker %s half-open: probing the upstream", self.name)
+
+    def _open(self, now, reason):
+        self._state = OPEN
+        self._opened_at = now
+        self._outcomes.clear()
+        self._failures = 0
+        self.times_opened += 1
+        logger.warning("Circuit breaker %s opened for %gs: %s", self.name, self.open_seconds, reason)
+
+    def _close(self):
+        self._state = CLOSED
+        self._opened_at = None
+        self._probes = 0
+        self._outcomes.clear()
+        self._failures = 0
+
+
+_default_breaker = None
+_default_lock = threading.Lock()
+
+
+def _breaker_from_env():
+    return CircuitBreaker(
+        failure_rate_threshold=float(os.environ.get("EMOTION_BREAKER_FAILURE_RATE", DEFAULT_FAILURE_RATE)),
+        minimum_calls=int(os.environ.get("EMOTION_BREAKER_MIN_CALLS", DEFAULT_MINIMUM_CALLS)),
+        window=float(os.environ.get("EMOTION_BREAKER_WINDOW", DEFAULT_WINDOW)),
+        open_seconds=float(os.environ.get("EMOTION_BREAKER_OPEN_SECONDS", DEFAULT_OPEN_SECONDS)),
+    )
+
+
+def default_circuit_breaker():
+    """Return the breaker guarding the upstream, creating it on first use.
+
+    The first call reads ``EMOTION_BREAKER_FAILURE_RATE``,
+    ``EMOTION_BREAKER_MIN_CALLS``, ``EMOTION_BREAKER_WINDOW`` and
+    ``EMOTION_BREAKER_OPEN_SECONDS``.
+    """
+    global _default_breaker
+    breaker = _default_breaker
+    if breaker is None:
+        with _default_lock:
+            if _default_breaker is None:
+                _default_breaker = _breaker_from_env()
+            breaker = _default_breaker
+    return breaker
+
+
+def configure_circuit_breaker(**options):
+    """Replace the upstream breaker with one built from ``options``.
+
+    Takes the same keyword arguments as ``CircuitBreaker``.
+
+    Returns:
+        The new default breaker
+    """
+    global _default_breaker
+    breaker = CircuitBreaker(**options)
+    with _default_lock:
+        _default_breaker = breaker
+    return breaker
+
+
+def circuit_breaker_stats():
+    """State and counters of the upstream breaker, see ``CircuitBreaker.stats``."""
+    return default_circuit_breaker().stats()
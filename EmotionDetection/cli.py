@@ -0,0 +1,312 @@
+"""Command-line analyzer for large text corpora.
+
+Streams an input file (one text per line, a CSV column or a JSONL field)
+through emotion_detector with bounded concurrency and writes results
+incrementally as JSONL or CSV.  Progress, throughput and ETA are reported on
+stderr, and a checkpoint file lets an interrupted run resume where it
+stopped; it records the input byte offset, so a resumed run seeks straight
+past the records already done instead of reading them again::
+
+    python -m EmotionDetection.cli comments.txt -o results.jsonl --concurrency 16
+    python -m EmotionDetection.cli requests.jsonl --field body -o results.csv --resume
+
+With ``--store results.sqlite3`` results are kept in a persistent
+ResultStore, so a later run over the same archive only sends texts it has
+not seen before upstream.
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+from collections import deque
+from itertools import islice
+
+from .backends import set_backend
+from .batch import DEFAULT_MAX_CONCURRENCY, iter_emotion_detector_batch
+from .cache import set_cache
+from .limiter import Overloaded
+
+
+EMOTION_FIELDS = ("anger", "disgust", "fear", "joy", "sadness", "dominant_emotion")
+
+INPUT_FORMATS = ("lines", "csv", "jsonl")
+OUTPUT_FORMATS = ("jsonl", "csv")
+
+
+def guess_format(path, choices, default):
+    """Pick a format from the file extension, falling back to ``default``."""
+    extension = os.path.splitext(path)[1].lower().lstrip(".")
+    if extension == "ndjson":
+        extension = "jsonl"
+    return extension if extension in choices else default
+
+
+class InputLines:
+    """Decoded lines of a binary input file, counting the bytes consumed.
+
+    After a record built from these lines is yielded, ``offset`` is the byte
+    position where the next record starts, which is what checkpoints store.
+
+    Args:
+        raw: Binary file to read
+        offset: Byte position to start reading at
+    """
+
+    def __init__(self, raw, offset=0):
+        self.raw = raw
+        self.raw.seek(offset)
+        self.offset = offset
+
+    def __iter__(self):
+        for line in self.raw:
+            self.offset += len(line)
+            yield line.decode("utf-8", errors="replace")
+
+
+def read_csv_header(raw):
+    """Column names from the first row of the CSV file ``raw``."""
+    return next(csv.reader(InputLines(raw)), [])
+
+
+def iter_records(stream, input_format, field, start=0, fieldnames=None):
+    """Yield ``(index, record_id, text)`` for every record in ``stream``.
+
+    Args:
+        stream: Iterable of text lines to read
+        input_format: "lines", "csv" or "jsonl"
+        field: CSV column or JSONL field holding the text
+        start: Index of the first record, when resuming part-way through
+        fieldnames: CSV column names when ``stream`` starts after the header
+    """
+    if input_format == "lines":
+        for index, line in enumerate(stream, start):
+            yield index, None, line.rstrip("\r\n")
+
+    elif input_format == "csv":
+        for index, row in enumerate(csv.DictReader(stream, fieldnames=fieldnames), start):
+            yield index, row.get("id"), row.get(field) or ""
+
+    elif input_format == "jsonl":
+        index = start
+        for line in stream:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = {}
+            if not isinstance(record, dict):
+                record = {field: record} if isinstance(record, str) else {}
+            text = record.get(field)
+            record_id = record.get("id", record.get("request_id"))
+            yield index, record_id, text if isinstance(text, str) else ""
+            index += 1
+
+    else:
+        raise ValueError(f"Unknown input format: {input_format!r}")
+
+
+class ResultWriter:
+    """Appends results to a binary output file as JSONL or CSV rows."""
+
+    def __init__(self, raw, output_format, write_header):
+        self.raw = raw
+        self.output_format = output_format
+        self.stream = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+        if output_format == "csv":
+            self.csv_writer = csv.writer(self.stream)
+            if write_header:
+                self.csv_writer.writerow(("index", "id") + EMOTION_FIELDS)
+
+    def write(self, index, record_id, result):
+        if self.output_format == "csv":
+            self.csv_writer.writerow([index, "" if record_id is None else record_id]
+                                     + [result.get(name) for name in EMOTION_FIELDS])
+        else:
+            record = {"index": index}
+            if record_id is not None:
+                record["id"] = record_id
+            record.update(result)
+            self.stream.write(json.dumps(record) + "\n")
+
+    def flush(self):
+        """Flush to disk and return the output size in bytes."""
+        self.stream.flush()
+        self.raw.flush()
+        os.fsync(self.raw.fileno())
+        return self.raw.tell()
+
+
+def load_checkpoint(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_checkpoint(path, records_done, output_bytes, input_offset=None):
+    # Write atomically so a crash never leaves a half-written checkpoint
+    checkpoint = {"records_done": records_done, "output_bytes": output_bytes}
+    if input_offset is not None:
+        checkpoint["input_offset"] = input_offset
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+
+class ProgressReporter:
+    """Prints processed count, throughput and ETA at most every ``interval`` seconds.
+
+    Args:
+        total_bytes: Size of the input
+        interval: Seconds between reports
+        stream: Where to print, defaults to stderr
+        start_offset: Input bytes already done before this run; the ETA is
+            based only on the bytes read since the run started
+    """
+
+    def __init__(self, total_bytes, interval=2.0, stream=None, start_offset=0):
+        self.total_bytes = total_bytes
+        self.interval = interval
+        self.stream = stream if stream is not None else sys.stderr
+        self.start_offset = start_offset
+        self.started = time.monotonic()
+        self.last_report = self.started
+
+    def update(self, processed, bytes_read, force=False):
+        now = time.monotonic()
+        if not force and now - self.last_report < self.interval:
+            return
+        self.last_report = now
+
+        elapsed = max(now - self.started, 1e-9)
+        rate = processed / elapsed
+        message = f"{processed:,} texts | {rate:,.1f} texts/s"
+        if self.total_bytes:
+            fraction = min(bytes_read / self.total_bytes, 1.0)
+            message += f" | {fraction:.1%}"
+            read_this_run = bytes_read - self.start_offset
+            if read_this_run > 0 and fraction < 1:
+                remaining = elapsed * (self.total_bytes - bytes_read) / read_this_run
+                message += f" | ETA {format_duration(remaining)}"
+        print(message, file=self.stream, flush=True)
+
+
+def format_duration(seconds):
+    seconds = int(seconds)
+    return f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m EmotionDetection.cli",
+        description="Run emotion detection over a large text file.")
+    parser.add_argument("input", help="input file: one text per line, CSV or JSONL")
+    parser.add_argument("-o", "--output", required=True, help="output file (.jsonl or .csv)")
+    parser.add_argument("--input-format", choices=INPUT_FORMATS,
+                        help="default: guessed from the input extension, else lines")
+    parser.add_argument("--output-format", choices=OUTPUT_FORMATS,
+                        help="default: guessed from the output extension, else jsonl")
+    parser.add_argument("--field", default="text", help="CSV column or JSONL field holding the text")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_MAX_CONCURRENCY,
+                        help="texts analyzed in parallel")
+    parser.add_argument("--backend", choices=("watson", "local"), help="scoring backend")
+    parser.add_argument("--store", metavar="PATH",
+                        help="persistent result store (SQLite) reused across runs")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue from the checkpoint of a previous run")
+    parser.add_argument("--checkpoint-every", type=int, default=1000,
+                        help="records between checkpoints")
+    parser.add_argument("--progress-interval", type=float, default=2.0,
+                        help="seconds between progress reports")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    input_format = args.input_format or guess_format(args.input, INPUT_FORMATS, "lines")
+    output_format = args.output_format or guess_format(args.output, OUTPUT_FORMATS, "jsonl")
+    checkpoint_path = args.output + ".checkpoint"
+
+    if args.backend:
+        set_backend(args.backend)
+    if args.store:
+        from .store import ResultStore
+        set_cache(ResultStore(args.store))
+
+    checkpoint = load_checkpoint(checkpoint_path) if args.resume else None
+    records_done = checkpoint["records_done"] if checkpoint else 0
+
+    if checkpoint:
+        # Drop anything written after the last checkpoint, then append
+        raw_out = open(args.output, "r+b")
+        raw_out.truncate(checkpoint["output_bytes"])
+        raw_out.seek(0, os.SEEK_END)
+        print(f"Resuming after {records_done:,} records", file=sys.stderr)
+    else:
+        raw_out = open(args.output, "wb")
+    writer = ResultWriter(raw_out, output_format, write_header=not checkpoint)
+
+    raw_in = open(args.input, "rb")
+    input_offset = checkpoint.get("input_offset") if checkpoint else None
+    fieldnames = None
+    if input_offset and input_format == "csv":
+        # The header is not read again after seeking past it
+        fieldnames = read_csv_header(raw_in)
+    lines = InputLines(raw_in, input_offset or 0)
+    reporter = ProgressReporter(os.fstat(raw_in.fileno()).st_size, args.progress_interval,
+                                start_offset=lines.offset)
+
+    if input_offset is None:
+        # Checkpoints of older runs hold no offset; skip done records by parsing them
+        records = islice(iter_records(lines, input_format, args.field), records_done, None)
+    else:
+        records = iter_records(lines, input_format, args.field, records_done, fieldnames)
+
+    # Results come back in input order, so record metadata is a FIFO queue
+    # along with the input offset just past each record
+    pending = deque()
+
+    def texts():
+        for index, record_id, text in records:
+            pending.append((index, record_id, lines.offset))
+            yield text
+
+    processed = 0
+    checkpointed = records_done
+    done_offset = lines.offset
+    try:
+        for result in iter_emotion_detector_batch(texts(), args.concurrency):
+            index, record_id, done_offset = pending.popleft()
+            writer.write(index, record_id, result)
+            processed += 1
+            records_done += 1
+
+            if records_done % args.checkpoint_every == 0:
+                save_checkpoint(checkpoint_path, records_done, writer.flush(), done_offset)
+                checkpointed = records_done
+            reporter.update(processed, lines.offset)
+
+        save_checkpoint(checkpoint_path, records_done, writer.flush(), lines.offset)
+        reporter.update(processed, lines.offset, force=True)
+    except Overloaded:
+        # Records after the last checkpoint are analyzed again by --resume
+        print(f"Stopped: the upstream is overloaded; rerun with --resume to continue "
+              f"after {checkpointed:,} records", file=sys.stderr)
+        return 1
+    finally:
+        raw_in.close()
+        writer.stream.close()
+
+    print(f"Done: {records_done:,} records written to {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,280 @@
+"""Micro-batching of concurrent single-text requests.
+
+Requests that arrive within a few milliseconds of each other (for example
+separate ``/emotionDetector`` calls on different server threads) are
+collected by one dispatcher thread and analyzed together with
+``emotion_detector_batch``.  Each caller blocks on its own future and gets
+its own result.  A local backend scores the whole batch in one vectorized
+pass, which is far cheaper than scoring each text separately.
+
+Finished batches are analyzed on a small pool of worker threads, so the
+dispatcher keeps collecting the next batch while earlier ones wait for a
+remote backend; up to ``max_batches`` batches are analyzed at once.
+
+Two knobs trade latency for throughput:
+
+* ``window`` - how long the dispatcher waits for more texts after the
+  first one arrives (0 only takes what is already queued)
+* ``max_batch_size`` - the batch is sent as soon as it holds this many
+
+Whether single requests go through the dispatcher is set by
+``EMOTION_MICROBATCH``: ``auto`` (default) batches only for local
+backends, ``on`` always batches and ``off`` never does.
+"""
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from .batch import DEFAULT_MAX_CONCURRENCY, emotion_detector_batch, iter_emotion_detector_batch
+from .emotion_detection import default_client, emotion_detector
+
+
+DEFAULT_WINDOW = 0.002
+DEFAULT_MAX_BATCH_SIZE = 64
+DEFAULT_MAX_BATCHES = 8
+
+MODES = ("auto", "on", "off")
+
+_CLOSE = object()
+
+
+class MicroBatcher:
+    """Collects concurrently submitted texts into batches.
+
+    Args:
+        window: Seconds to wait for more texts once a batch has started
+        max_batch_size: Largest number of texts analyzed together
+        max_concurrency: Worker threads per batch on a remote backend
+        max_batches: Batches analyzed at the same time
+        batch_fn: Function analyzing a list of texts into a list of
+            results, defaults to emotion_detector_batch
+    """
+
+    def __init__(self, window=DEFAULT_WINDOW, max_batch_size=DEFAULT_MAX_BATCH_SIZE,
+                 max_concurrency=DEFAULT_MAX_CONCURRENCY, max_batches=DEFAULT_MAX_BATCHES,
+                 batch_fn=None):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        if max_batches < 1:
+            raise ValueError("max_batches must be at least 1")
+        self.window = max(0.0, window)
+        self.max_batch_size = max_batch_size
+        self.max_concurrency = max_concurrency
+        self.max_batches = max_batches
+        self.batch_fn = batch_fn
+        self.batches = 0
+        self.items = 0
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def submit(self, text_to_analyse):
+        """Queue one text and return a Future for its result dictionary."""
+        future = Future()
+        self._ensure_worker()
+        self._queue.put((text_to_analyse, future))
+        return future
+
+    def analyze(self, text_to_analyse, timeout=None):
+        """Analyze one text as part of the next batch and wait for its result."""
+        return self.submit(text_to_analyse).result(timeout)
+
+    def stats(self):
+        """Return how many batches and texts were dispatched."""
+        batches, items = self.batches, self.items
+        return {
+            "batches": batches,
+            "items": items,
+            "mean_batch_size": items / batches if batches else 0.0,
+        }
+
+    def close(self):
+        """Stop the dispatcher thread once the queued texts are analyzed."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+            executor, self._executor = self._executor, None
+        if thread is not None:
+            self._queue.put(_CLOSE)
+            thread.join()
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def _ensure_worker(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_batches, thread_name_prefix="emotion-microbatch-flush")
+                    self._thread = threading.Thread(
+                        target=self._run, args=(self._executor,), name="emotion-microbatch",
+                        daemon=True)
+                    self._thread.start()
+
+    def _run(self, executor):
+        while True:
+            item = self._queue.get()
+            if item is _CLOSE:
+                return
+            batch = [item]
+            closing = False
+            deadline = time.monotonic() + self.window
+
+            while len(batch) < self.max_batch_size:
+                # Take what is already queued, then wait out the window
+                try:
+                    remaining = deadline - time.monotonic()
+                    if remaining > 0:
+                        item = self._queue.get(timeout=remaining)
+                    else:
+                        item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _CLOSE:
+                    closing = True
+                    break
+                batch.append(item)
+
+            self._flush(executor, batch)
+            if closing:
+                return
+
+    def _flush(self, executor, batch):
+        # Skip callers that gave up before their batch started
+        batch = [(text, future) for text, future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        self.batches += 1
+        self.items += len(batch)
+        # Analyze on the pool so collecting the next batch does not wait for this one
+        executor.submit(self._analyze, batch)
+
+    def _analyze(self, batch):
+        texts = [text for text, _ in batch]
+        if self.batch_fn is None and default_client().backend.remote:
+            # Remote texts succeed or fail (for example shed as Overloaded)
+            # one by one; a failure must only reach its own caller
+            outcomes = iter_emotion_detector_batch(texts, self.max_concurrency, _outcome_of)
+            for (_, future), (result, error) in zip(batch, outcomes):
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(result)
+            return
+
+        try:
+            if self.batch_fn is not None:
+                results = self.batch_fn(texts)
+            else:
+                results = emotion_detector_batch(texts, self.max_concurrency)
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+
+def _outcome_of(text_to_analyse):
+    # Return errors instead of raising so the batch carries on past them
+    try:
+        return emotion_detector(text_to_analyse), None
+    except Exception as e:
+        return None, e
+
+
+_default_dispatcher = None
+_default_mode = None
+_default_lock = threading.Lock()
+
+
+def _dispatcher_from_env():
+    return MicroBatcher(
+        window=float(os.environ.get("EMOTION_MICROBATCH_WINDOW_MS", DEFAULT_WINDOW * 1000)) / 1000,
+        max_batch_size=int(os.environ.get("EMOTION_MICROBATCH_MAX_SIZE", DEFAULT_MAX_BATCH_SIZE)),
+        max_batches=int(os.environ.get("EMOTION_MICROBATCH_MAX_BATCHES", DEFAULT_MAX_BATCHES)),
+    )
+
+
+def _mode_from_env():
+    mode = os.environ.get("EMOTION_MICROBATCH", "auto").strip().lower()
+    if mode not in MODES:
+        raise ValueError(f"Unknown EMOTION_MICROBATCH mode {mode!r}; expected one of {MODES}")
+    return mode
+
+
+def default_dispatcher():
+    """Return the shared dispatcher, creating it on first use.
+
+    The first call reads ``EMOTION_MICROBATCH_WINDOW_MS`` (default 2),
+    ``EMOTION_MICROBATCH_MAX_SIZE`` (default 64) and
+    ``EMOTION_MICROBATCH_MAX_BATCHES`` (default 8).
+    """
+    global _default_dispatcher
+    dispatcher = _default_dispatcher
+    if dispatcher is None:
+        with _default_lock:
+            if _default_dispatcher is None:
+                _default_dispatcher = _dispatcher_from_env()
+            dispatcher = _default_dispatcher
+    return dispatcher
+
+
+def dispatch_mode():
+    """Return "auto", "on" or "off" (``EMOTION_MICROBATCH`` unless configured)."""
+    global _default_mode
+    if _default_mode is None:
+        _default_mode = _mode_from_env()
+    return _default_mode
+
+
+def configure_dispatcher(mode=None, **options):
+    """Replace the shared dispatcher with one built from ``options``.
+
+    Args:
+        mode: "auto", "on" or "off"; None keeps the current mode
+        **options: Keyword arguments for ``MicroBatcher``
+
+    Returns:
+        The new default dispatcher
+    """
+    global _default_dispatcher, _default_mode
+    if mode is not None and mode not in MODES:
+        raise ValueError(f"Unknown mode {mode!r}; expected one of {MODES}")
+    dispatcher = MicroBatcher(**options)
+    with _default_lock:
+        old_dispatcher, _default_dispatcher = _default_dispatcher, dispatcher
+        if mode is not None:
+            _default_mode = mode
+    if old_dispatcher is not None:
+        old_dispatcher.close()
+    return dispatcher
+
+
+def emotion_detector_dispatched(text_to_analyse, detailed=False):
+    """emotion_detector, micro-batched with concurrent callers when enabled.
+
+    Detailed requests (see emotion_detector) are never micro-batched.
+
+    Returns:
+        The same result dictionary emotion_detector returns
+    """
+    mode = dispatch_mode()
+    if detailed or mode == "off" or (mode == "auto" and default_client().backend.remote):
+        return emotion_detector(text_to_analyse, detailed=detailed)
+    return default_dispatcher().analyze(text_to_analyse)
+
+
+def _reset_after_fork():
+    # The dispatcher thread does not survive a fork; children start their own
+    global _default_dispatcher, _default_lock
+    _default_dispatcher = None
+    _default_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
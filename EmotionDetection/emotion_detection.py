@@ -1,33 +1,256 @@
+"""The emotion_detector entry point and the EmotionClient behind it.
 
-import requests
-import json
-
-def emotion_detector(text_to_analyse):
-    # URL of the emotion_detection service
-    url = 'https://sn-watson-emotion.labs.skills.network/v1/watson.runtime.nlp.v1/NlpService/EmotionPredict'
-    
-    # Constructing the request payload in the expected format
-    myobj = { "raw_document": { "text": text_to_analyse } }
-    
-    # Custom header specifying the model ID for the emotion_detection service
-    header = {"grpc-metadata-mm-model-id": "emotion_aggregated-workflow_lang_en_stock"}
-    
-    # Sending a POST request to the emotion_detection API
-    response = requests.post(url, json=myobj, headers=header)
-
-    # Parse the response
-    formatted_response = json.loads(response.text)
-    
-    # Extract emotions
-    emotions = formatted_response['emotionPredictions'][0]['emotion']
-    
-    # Find dominant emotion
-    dominant_emotion = max(emotions.items(), key=lambda x: x[1])[0]
-    
-    # Create result dictionary with all emotions plus dominant_emotion
-    result = {**emotions, "dominant_emotion": dominant_emotion}
-
-    #print(json.dumps(result, indent=2))
-    
-    return result
-    
\ No newline at end of file
+``emotion_detector`` analyzes with a default ``EmotionClient`` that follows
+the process-wide settings (``set_backend``, ``set_cache``, the shared HTTP
+client).  Build more clients to run differently tuned traffic side by side,
+for example::
+
+    interactive = EmotionClient(read_timeout=2, retries=0)
+    bulk = EmotionClient(pool_maxsize=64, read_timeout=30, retries=5)
+
+Backends are created on first use (see EmotionDetection.backends), so
+importing this module does not load ``requests`` or NumPy.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .backends import create_backend, get_backend
+from .cache import cache_key, get_cache
+from .chunking import DEFAULT_PARALLELISM, chunk_spans, combine_results
+from .hedging import default_hedger, hedging_enabled
+from .result import EMPTY_RESULT, EmotionResult, as_result
+from .singleflight import SingleFlight, upstream_calls
+
+
+class EmotionClient:
+    """Emotion detection with its own endpoint, model, pool, timeouts and backend.
+
+    Every argument is optional; left out, the client follows the
+    process-wide default.  Giving any of ``url``, ``model_id`` or the HTTP
+    options builds a Watson backend with its own connection pool, so a
+    bulk client cannot starve an interactive one of connections.  A client
+    with its own backend also coalesces identical concurrent texts only
+    among its own callers, so they never wait on another client's request.
+
+    Args:
+        backend: Backend instance or name; None uses the active backend
+            (see set_backend) unless Watson options are given
+        url: EmotionPredict endpoint
+        model_id: Model requested from the endpoint
+        pool_connections: Number of per-host pools each session caches
+        pool_maxsize: Maximum connections kept alive per host and session
+        connect_timeout: Seconds to wait for a connection to be established
+        read_timeout: Seconds to wait for the upstream response
+        retries: Retries for connection errors and gateway status codes
+        backoff_factor: Exponential backoff factor between retries
+        cache: Result cache for remote calls; None uses the shared cache
+            (see set_cache) and False disables caching
+        hedge: Whether to hedge slow upstream requests; None follows
+            ``EMOTION_HEDGING``
+        chunk_size: Default largest chunk in characters for ``long_text``
+        parallelism: Default chunks scored at a time for ``long_text``
+
+    Raises:
+        ValueError: Watson options were given together with a non-Watson backend
+    """
+
+    def __init__(self, backend=None, url=None, model_id=None, pool_connections=None,
+                 pool_maxsize=None, connect_timeout=None, read_timeout=None, retries=None,
+                 backoff_factor=None, cache=None, hedge=None, chunk_size=None, parallelism=None):
+        http_options = {
+            name: value for name, value in (
+                ("pool_connections", pool_connections),
+                ("pool_maxsize", pool_maxsize),
+                ("connect_timeout", connect_timeout),
+                ("read_timeout", read_timeout),
+                ("retries", retries),
+                ("backoff_factor", backoff_factor),
+            ) if value is not None
+        }
+        self.http_client = None
+        if url is not None or model_id is not None or http_options:
+            if backend not in (None, "watson"):
+                raise ValueError("url, model_id and HTTP options apply to the watson backend only")
+            backend = self._watson_backend(url, model_id, http_options)
+        elif isinstance(backend, str):
+            backend = create_backend(backend)
+
+        self._backend = backend
+        # Clients following the process-wide backend share its coalescing;
+        # the others coalesce on their own but are counted in coalescing_stats
+        self._upstream_calls = SingleFlight(parent=upstream_calls) if backend is not None else None
+        self.cache = cache
+        self.hedge = hedge
+        self.chunk_size = chunk_size
+        self.parallelism = parallelism
+
+    def _watson_backend(self, url, model_id, http_options):
+        # Imported here so clients of the local backend never load requests
+        from .http_client import HTTPClient
+        from .watson import MODEL_ID, WatsonBackend
+        if http_options:
+            self.http_client = HTTPClient(**http_options)
+        return WatsonBackend(url=url, model_id=model_id or MODEL_ID, http_client=self.http_client)
+
+    @property
+    def backend(self):
+        """The backend this client scores with."""
+        return self._backend if self._backend is not None else get_backend()
+
+    def result_cache(self):
+        """The result cache this client uses, or None."""
+        if self.cache is False:
+            return None
+        return self.cache if self.cache is not None else get_cache()
+
+    def emotion_detector(self, text_to_analyse, use_cache=True, hedge=None, detailed=False,
+                         long_text=False, chunk_size=None, parallelism=None):
+        """Detect the emotions in ``text_to_analyse``; see the module function."""
+        return self.analyze_emotions(text_to_analyse, use_cache, hedge, detailed,
+                                     long_text, chunk_size, parallelism).to_dict()
+
+    def analyze_emotions(self, text_to_analyse, use_cache=True, hedge=None, detailed=False,
+                         long_text=False, chunk_size=None, parallelism=None):
+        """emotion_detector returning an EmotionResult; see the module function."""
+        # Check for empty or None input
+        if not text_to_analyse or text_to_analyse.strip() == "":
+            return EMPTY_RESULT
+
+        if long_text:
+            spans = chunk_spans(text_to_analyse, chunk_size or self.chunk_size)
+            if len(spans) > 1:
+                return self._analyze_chunks(text_to_analyse, spans, use_cache, hedge, detailed,
+                                            parallelism or self.parallelism)
+
+        # Local backends score in-process; caching and coalescing only pay off
+        # for remote calls
+        backend = self.backend
+        analyze = backend.analyze_detailed if detailed else backend.analyze
+        if not backend.remote:
+            return as_result(analyze(text_to_analyse))
+
+        # Serve repeated texts from the result cache when one is configured
+        key = cache_key(text_to_analyse, backend.model_id, detailed)
+        cache = self.result_cache() if use_cache else None
+        if cache is not None:
+            cached = cache.get(key)
+            if cached is not None:
+                return EmotionResult.from_dict(cached)
+
+        # Concurrent callers for the same text share one upstream request; a
+        # hedged request sends a duplicate when the first one is slow
+        if hedge is None:
+            hedge = self.hedge
+        if hedge is None:
+            hedge = hedging_enabled()
+        calls = self._upstream_calls or upstream_calls
+        if hedge:
+            result = calls.do(key, default_hedger().call, analyze, text_to_analyse)
+        else:
+            result = calls.do(key, analyze, text_to_analyse)
+        result = as_result(result)
+
+        # Never cache the None-filled error result
+        if cache is not None and result.ok:
+            cache.set(key, result.to_dict())
+
+        return result
+
+    def _analyze_chunks(self, text_to_analyse, spans, use_cache, hedge, detailed, parallelism):
+        chunks = [text_to_analyse[begin:end] for begin, end in spans]
+        backend = self.backend
+        if not backend.remote and not detailed:
+            # Local backends score all chunks in one vectorized pass
+            results = [as_result(result) for result in backend.analyze_batch(chunks)]
+        else:
+            workers = min(parallelism or DEFAULT_PARALLELISM, len(chunks))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="emotion-chunk") as executor:
+                results = list(executor.map(
+                    lambda chunk: self.analyze_emotions(chunk, use_cache, hedge, detailed), chunks))
+        return combine_results(results, spans)
+
+    def close(self):
+        """Close the connections of this client's own pool, if it has one."""
+        if self.http_client is not None:
+            self.http_client.close()
+
+
+_default_client = None
+_default_lock = threading.Lock()
+
+
+def default_client():
+    """Return the client behind emotion_detector, creating it on first use."""
+    global _default_client
+    client = _default_client
+    if client is None:
+        with _default_lock:
+            if _default_client is None:
+                _default_client = EmotionClient()
+            client = _default_client
+    return client
+
+
+def configure_client(**options):
+    """Replace the client behind emotion_detector with one built from ``options``.
+
+    Takes the same keyword arguments as ``EmotionClient``.  The previous
+    client's own connections are closed.
+
+    Returns:
+        The new default client
+    """
+    global _default_client
+    new_client = EmotionClient(**options)
+    with _default_lock:
+        old_client, _default_client = _default_client, new_client
+    if old_client is not None:
+        old_client.close()
+    return new_client
+
+
+def emotion_detector(text_to_analyse, use_cache=True, hedge=None, detailed=False,
+                     long_text=False, chunk_size=None, parallelism=None):
+    """Detect the emotions in ``text_to_analyse`` with the default client.
+
+    The default client follows the active backend and result cache; replace
+    it with ``configure_client`` to tune the endpoint, pool or timeouts.
+
+    Args:
+        text_to_analyse: String of text to analyze
+        use_cache: Whether to consult and fill the configured result cache
+        hedge: Send a duplicate request when the upstream is slow; None
+            follows ``EMOTION_HEDGING``
+        detailed: Add the per-span ``"mentions"`` list
+        long_text: Split long documents into chunks scored in parallel
+        chunk_size: Largest chunk in characters for ``long_text``
+        parallelism: Chunks scored at a time for ``long_text``
+
+    Returns:
+        Dictionary of the five emotion scores plus ``dominant_emotion``, or
+        the None-filled dictionary when the text is empty or analysis fails
+    """
+    return default_client().emotion_detector(text_to_analyse, use_cache, hedge, detailed,
+                                             long_text, chunk_size, parallelism)
+
+
+def analyze_emotions(text_to_analyse, use_cache=True, hedge=None, detailed=False,
+                     long_text=False, chunk_size=None, parallelism=None):
+    """emotion_detector returning a compact EmotionResult instead of a dictionary.
+
+    Failed and empty results have every score set to None and a ``status``
+    saying why (for example "empty_input", "timeout" or "parse_error").
+
+    With ``detailed`` a successful result also holds ``mentions``: the
+    scores of each span of the text, taken from the same upstream response
+    (``"mentions"`` in the dictionary emotion_detector returns).
+
+    With ``long_text`` a document longer than ``chunk_size`` characters is
+    split on paragraph and sentence boundaries (see EmotionDetection.chunking),
+    up to ``parallelism`` chunks are scored at a time and the chunk scores
+    are averaged weighted by chunk length.  If any chunk fails, its failed
+    result is returned.
+    """
+    return default_client().analyze_emotions(text_to_analyse, use_cache, hedge, detailed,
+                                             long_text, chunk_size, parallelism)
@@ -0,0 +1,249 @@
+"""Hedged upstream requests to cut tail latency.
+
+When an upstream call has not answered within a delay taken from a high
+percentile of recent latencies, an identical second call is sent and the
+first successful answer wins.  The other call is cancelled if it has not
+started yet; an HTTP request that is already on the wire cannot be aborted
+with ``requests``, so its late answer is simply discarded.
+
+A token bucket caps hedges at ``max_hedge_ratio`` of all calls, so a
+slow upstream is never hit with more than that much extra load.  Hedging
+is off by default; enable it with ``EMOTION_HEDGING=on``,
+``configure_hedging`` or ``emotion_detector(text, hedge=True)``.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from .limiter import DEFAULT_MAX_LIMIT, DEFAULT_MAX_QUEUE
+from .result import EmotionResult
+
+
+DEFAULT_PERCENTILE = 0.95
+DEFAULT_MIN_DELAY = 0.01
+DEFAULT_MAX_HEDGE_RATIO = 0.05
+DEFAULT_MIN_SAMPLES = 20
+
+
+def _succeeded(future):
+    if future.exception() is not None:
+        return False
+    result = future.result()
+    if isinstance(result, (dict, EmotionResult)):
+        return result.get("dominant_emotion") is not None
+    return True
+
+
+class Hedger:
+    """Runs a call and hedges it with a duplicate when it is slow.
+
+    Args:
+        percentile: Fraction of recent calls that should finish before a
+            hedge is sent (0.95 hedges roughly the slowest 5%)
+        min_delay: Lower bound of the hedge delay in seconds
+        max_hedge_ratio: Largest share of calls that may be hedged
+        burst: Hedges that may be sent back to back after a quiet period
+        min_samples: Latencies needed before hedging starts
+        window: Recent latencies the percentile is computed over
+        max_workers: Threads running primary and hedged calls; None makes
+            room for every call the upstream limiter lets run or wait plus
+            a burst of hedges, so calls never queue for a thread
+    """
+
+    def __init__(self, percentile=DEFAULT_PERCENTILE, min_delay=DEFAULT_MIN_DELAY,
+                 max_hedge_ratio=DEFAULT_MAX_HEDGE_RATIO, burst=10,
+                 min_samples=DEFAULT_MIN_SAMPLES, window=1000, max_workers=None):
+        if not 0 < percentile < 1:
+            raise ValueError("percentile must be between 0 and 1")
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.max_hedge_ratio = max_hedge_ratio
+        self.burst = burst
+        self.min_samples = min_samples
+        self.window = window
+
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)
+        self._new_samples = 0
+        self._delay = None
+        self._tokens = float(burst)
+        if max_workers is None:
+            max_workers = default_max_workers() + burst
+        # Threads are started on demand, so a generous cap costs nothing while idle
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix="emotion-hedge")
+        self.calls = 0
+        self.hedges_sent = 0
+        self.hedges_won = 0
+
+    def delay(self):
+        """Current hedge delay in seconds, or None until enough latencies are known."""
+        with self._lock:
+            return self._delay
+
+    def call(self, fn, *args):
+        """Return ``fn(*args)``, hedged with a second call when it is slow.
+
+        A failed answer (an exception or the None-filled result) only wins
+        when the other call fails too.
+        """
+        with self._lock:
+            self.calls += 1
+            self._tokens = min(self.burst, self._tokens + self.max_hedge_ratio)
+            delay = self._delay
+
+        primary = self._submit(fn, args)
+        if delay is None:
+            return primary.result()
+        done, _ = wait([primary], timeout=delay)
+        if done or not self._take_token():
+            return primary.result()
+
+        hedge = self._submit(fn, args)
+        pending = {primary, hedge}
+        first_failure = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if _succeeded(future):
+                    for other in pending:
+                        other.cancel()
+                    if future is hedge:
+                        with self._lock:
+                            self.hedges_won += 1
+                    return future.result()
+                if first_failure is None:
+                    first_failure = future
+        return first_failure.result()
+
+    def stats(self):
+        """Return call, hedge and win counts and the current delay."""
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "hedges_sent": self.hedges_sent,
+                "hedges_won": self.hedges_won,
+                "delay": self._delay,
+            }
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, fn, args):
+        return self._executor.submit(self._timed, fn, args)
+
+    def _timed(self, fn, args):
+        # Time from when the call runs; time queued for a thread is not upstream latency
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self._record(time.perf_counter() - started)
+
+    def _take_token(self):
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            self.hedges_sent += 1
+            return True
+
+    def _record(self, latency):
+        with self._lock:
+            self._latencies.append(latency)
+            self._new_samples += 1
+            # Re-sorting on every call is wasteful; refresh the delay periodically
+            if len(self._latencies) >= self.min_samples and (
+                    self._delay is None or self._new_samples >= max(1, self.window // 20)):
+                ordered = sorted(self._latencies)
+                index = min(len(ordered) - 1, int(self.percentile * len(ordered)))
+                self._delay = max(self.min_delay, ordered[index])
+                self._new_samples = 0
+
+
+_default_hedger = None
+_default_enabled = None
+_default_lock = threading.Lock()
+
+
+def default_max_workers():
+    """Upstream calls the servers' limiter lets run or wait at once.
+
+    Read from ``EMOTION_LIMITER_MAX`` and ``EMOTION_LIMITER_QUEUE``.
+    """
+    return (int(os.environ.get("EMOTION_LIMITER_MAX", DEFAULT_MAX_LIMIT))
+            + int(os.environ.get("EMOTION_LIMITER_QUEUE", DEFAULT_MAX_QUEUE)))
+
+
+def _hedger_from_env():
+    max_workers = os.environ.get("EMOTION_HEDGING_MAX_WORKERS")
+    return Hedger(
+        percentile=float(os.environ.get("EMOTION_HEDGING_PERCENTILE", DEFAULT_PERCENTILE)),
+        max_hedge_ratio=float(os.environ.get("EMOTION_HEDGING_MAX_RATIO", DEFAULT_MAX_HEDGE_RATIO)),
+        max_workers=int(max_workers) if max_workers else None,
+    )
+
+
+def hedging_enabled():
+    """Whether emotion_detector hedges by default (``EMOTION_HEDGING``, off)."""
+    global _default_enabled
+    if _default_enabled is None:
+        _default_enabled = os.environ.get("EMOTION_HEDGING", "off").strip().lower() in (
+            "on", "1", "true", "yes")
+    return _default_enabled
+
+
+def default_hedger():
+    """Return the shared Hedger, creating it on first use.
+
+    The first call reads ``EMOTION_HEDGING_PERCENTILE`` (default 0.95),
+    ``EMOTION_HEDGING_MAX_RATIO`` (default 0.05) and
+    ``EMOTION_HEDGING_MAX_WORKERS`` (default: see ``default_max_workers``).
+    """
+    global _default_hedger
+    hedger = _default_hedger
+    if hedger is None:
+        with _default_lock:
+            if _default_hedger is None:
+                _default_hedger = _hedger_from_env()
+            hedger = _default_hedger
+    return hedger
+
+
+def configure_hedging(enabled=True, **options):
+    """Turn default hedging on or off and replace the shared Hedger.
+
+    Args:
+        enabled: Whether emotion_detector hedges when not told otherwise
+        **options: Keyword arguments for ``Hedger``
+
+    Returns:
+        The new default Hedger
+    """
+    global _default_hedger, _default_enabled
+    hedger = Hedger(**options)
+    with _default_lock:
+        old_hedger, _default_hedger = _default_hedger, hedger
+        _default_enabled = enabled
+    if old_hedger is not None:
+        old_hedger.close()
+    return hedger
+
+
+def hedging_stats():
+    """Counters of the shared Hedger, see ``Hedger.stats``."""
+    return default_hedger().stats()
+
+
+def _reset_after_fork():
+    # Executor threads do not survive a fork
+    global _default_hedger, _default_lock
+    _default_hedger = None
+    _default_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,69 @@
+"""HTTP caching headers for ``/emotionDetector`` responses.
+
+An analysis is a pure function of the text and the model, so its ETag can
+be computed from ``cache_key`` before the upstream is called.  Both servers
+answer a matching ``If-None-Match`` with 304 Not Modified without analyzing
+anything, and mark successful results cacheable for
+``EMOTION_HTTP_CACHE_MAX_AGE`` seconds so browsers and CDNs absorb repeat
+traffic.  Failed (None-filled) results are never given an ETag and are sent
+with ``Cache-Control: no-store``.
+"""
+
+import os
+
+from .cache import cache_key
+from .emotion_detection import default_client
+
+
+DEFAULT_MAX_AGE = 3600
+
+# Responses are the same whatever the request headers; intermediaries that
+# compress must still keep encoded and plain copies apart
+VARY = "Accept-Encoding"
+
+
+def max_age():
+    """Seconds a successful result may be cached, from ``EMOTION_HTTP_CACHE_MAX_AGE``."""
+    return int(os.environ.get("EMOTION_HTTP_CACHE_MAX_AGE", DEFAULT_MAX_AGE))
+
+
+def result_etag(text_to_analyse, detailed=False):
+    """Strong ETag of the analysis of ``text_to_analyse`` by the active model.
+
+    The model is the default client's, which both servers analyze with
+    (``emotion_detector`` and ``emotion_detector_async`` alike).
+    """
+    model_id = default_client().backend.model_id
+    return f'"{cache_key(text_to_analyse, model_id, detailed)}"'
+
+
+def etag_matches(if_none_match, etag):
+    """Whether an ``If-None-Match`` header value lists ``etag``.
+
+    Uses the weak comparison RFC 9110 prescribes for ``If-None-Match``.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def cache_headers(etag, ok=True):
+    """Caching headers for a response, as a list of ``(name, value)`` pairs.
+
+    Args:
+        etag: The result's ETag
+        ok: Whether the result holds scores; failures must not be cached
+    """
+    if not ok:
+        return [("Cache-Control", "no-store"), ("Vary", VARY)]
+    seconds = max_age()
+    control = f"public, max-age={seconds}" if seconds > 0 else "no-cache"
+    return [("ETag", etag), ("Cache-Control", control), ("Vary", VARY)]
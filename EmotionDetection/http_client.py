@@ -0,0 +1,163 @@
+"""Pooled, keep-alive HTTP client shared by every emotion_detector call.
+
+A bare ``requests.post`` opens a new TCP (and TLS) connection for every
+request.  ``HTTPClient`` keeps one ``requests.Session`` per thread so that
+connections to the EmotionPredict endpoint are reused, and mounts an adapter
+with a bounded connection pool and retry-with-backoff for failures that are
+safe to retry.
+"""
+
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+# Defaults used by the module-level client
+DEFAULT_POOL_CONNECTIONS = 4
+DEFAULT_POOL_MAXSIZE = 16
+DEFAULT_CONNECT_TIMEOUT = 3.05
+DEFAULT_READ_TIMEOUT = 10
+DEFAULT_RETRIES = 2
+DEFAULT_BACKOFF_FACTOR = 0.2
+
+# Gateway errors mean the request never reached a healthy upstream worker.
+# A 500 is not retried: the upstream answers it deterministically for bad input.
+RETRY_STATUS_CODES = (502, 503, 504)
+
+
+class HTTPClient:
+    """Thread-safe HTTP client with per-thread keep-alive sessions.
+
+    Args:
+        pool_connections: Number of per-host pools each session caches
+        pool_maxsize: Maximum connections kept alive per host and session
+        connect_timeout: Seconds to wait for a connection to be established
+        read_timeout: Seconds to wait for the upstream response
+        retries: Retries for connection errors and gateway status codes
+        backoff_factor: Exponential backoff factor between retries
+    """
+
+    def __init__(self, pool_connections=DEFAULT_POOL_CONNECTIONS,
+                 pool_maxsize=DEFAULT_POOL_MAXSIZE,
+                 connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout=DEFAULT_READ_TIMEOUT,
+                 retries=DEFAULT_RETRIES,
+                 backoff_factor=DEFAULT_BACKOFF_FACTOR):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+
+        self._local = threading.local()
+        self._sessions = []
+        self._lock = threading.Lock()
+
+    def _make_retry(self):
+        # EmotionPredict is a pure function of its payload, so POST is safe
+        # to replay even though it is not idempotent by HTTP method
+        return Retry(
+            total=self.retries,
+            connect=self.retries,
+            read=0,
+            status=self.retries,
+            backoff_factor=self.backoff_factor,
+            status_forcelist=RETRY_STATUS_CODES,
+            allowed_methods=frozenset(["GET", "POST"]),
+            raise_on_status=False,
+        )
+
+    def _make_session(self):
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            max_retries=self._make_retry(),
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    @property
+    def session(self):
+        """The ``requests.Session`` owned by the calling thread."""
+        session = getattr(self._local, "session", None)
+        # A forked child must not reuse the parent's pooled sockets
+        if session is None or self._local.pid != os.getpid():
+            session = self._make_session()
+            self._local.session = session
+            self._local.pid = os.getpid()
+            with self._lock:
+                self._sessions.append(session)
+        return session
+
+    def post(self, url, **kwargs):
+        """POST through the calling thread's pooled session.
+
+        Accepts the same keyword arguments as ``requests.post``; ``timeout``
+        defaults to the client's (connect, read) timeouts.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.post(url, **kwargs)
+
+    def get(self, url, **kwargs):
+        """GET through the calling thread's pooled session."""
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.get(url, **kwargs)
+
+    def close(self):
+        """Close every session (and its pooled connections) ever handed out."""
+        with self._lock:
+            sessions, self._sessions = self._sessions, []
+        for session in sessions:
+            session.close()
+        self._local = threading.local()
+
+
+_default_client = None
+_default_lock = threading.Lock()
+
+
+def default_http_client():
+    """Return the module-level client, creating it on first use."""
+    global _default_client
+    client = _default_client
+    if client is None:
+        with _default_lock:
+            if _default_client is None:
+                _default_client = HTTPClient()
+            client = _default_client
+    return client
+
+
+def configure_http_client(**options):
+    """Replace the module-level client with one built from ``options``.
+
+    Takes the same keyword arguments as ``HTTPClient``.  The previous
+    client's connections are closed.
+
+    Returns:
+        The new default client
+    """
+    global _default_client
+    new_client = HTTPClient(**options)
+    with _default_lock:
+        old_client, _default_client = _default_client, new_client
+    if old_client is not None:
+        old_client.close()
+    return new_client
+
+
+def _reset_after_fork():
+    # Pooled sockets must not be shared between a parent and forked children
+    # (e.g. gunicorn workers with --preload); start the child with a fresh client
+    global _default_client, _default_lock
+    _default_client = None
+    _default_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,63 @@
+"""JSON decoding and encoding for upstream bodies and API responses.
+
+Uses ``orjson`` when it is installed and the standard library otherwise.
+``loads`` takes bytes as well as text and ``dumps`` returns UTF-8 bytes,
+so response bodies never need a detour through ``str``.
+
+``parse_emotion`` extracts ``emotionPredictions[0].emotion`` from an
+EmotionPredict body.  The aggregate ``emotion`` object opens the body and
+holds only five numbers, so it is matched with an anchored regular
+expression and parsed on its own; the ``emotionMentions`` span tree after
+it is never decoded.  Bodies laid out any other way take a full parse.
+"""
+
+import json
+import re
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Body prefix up to and including the aggregate emotion object
+_EMOTION_PREFIX = re.compile(
+    rb'\s*\{\s*"emotionPredictions"\s*:\s*\[\s*\{\s*"emotion"\s*:\s*(\{[^{}]*\})')
+
+
+def loads(data):
+    """Parse JSON from bytes or text."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj):
+    """Serialize ``obj`` to compact UTF-8 JSON bytes."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj)
+        except TypeError:
+            # Types orjson refuses (float subclasses, non-str keys) take the slow path
+            pass
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def parse_emotion(body):
+    """Return the ``emotionPredictions[0].emotion`` mapping of an EmotionPredict body.
+
+    Args:
+        body: Response body as bytes or text
+
+    Raises:
+        KeyError, IndexError or ValueError when the body is malformed
+    """
+    if isinstance(body, str):
+        body = body.encode()
+    match = _EMOTION_PREFIX.match(body)
+    if match is not None:
+        try:
+            return loads(match.group(1))
+        except ValueError:
+            pass
+    return loads(body)['emotionPredictions'][0]['emotion']
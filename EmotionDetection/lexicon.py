@@ -0,0 +1,175 @@
+"""CPU-only local emotion scorer backed by a small weighted lexicon.
+
+Each known word carries a weight for some of the five emotions.  A text is
+scored by summing the weight rows of its tokens, adding a uniform prior and
+normalizing, which yields five scores in [0, 1] that sum to 1.  Batches are
+scored by the sparse-matrix engine in ``vectorized`` in one pass instead of
+per-text Python loops.
+
+Requires NumPy.
+"""
+
+import re
+
+import numpy as np
+
+from .backends import Backend
+from .vectorized import EMOTIONS, TOKEN_PATTERN, EmotionColumns, featurize, normalized_scores
+
+
+# Word -> {emotion: weight}
+LEXICON = {
+    # anger
+    "angry": {"anger": 1.0},
+    "anger": {"anger": 1.0},
+    "mad": {"anger": 1.0},
+    "furious": {"anger": 1.2},
+    "rage": {"anger": 1.2},
+    "annoyed": {"anger": 0.7},
+    "annoying": {"anger": 0.7},
+    "irritated": {"anger": 0.7},
+    "outraged": {"anger": 1.1, "disgust": 0.3},
+    "hate": {"anger": 0.9, "disgust": 0.5},
+    "hated": {"anger": 0.9, "disgust": 0.5},
+    "frustrated": {"anger": 0.8, "sadness": 0.2},
+    "frustrating": {"anger": 0.8, "sadness": 0.2},
+    "unfair": {"anger": 0.6, "sadness": 0.2},
+    "dislike": {"anger": 0.5, "disgust": 0.5},
+    "like": {"joy": 0.3},
+    # disgust
+    "disgust": {"disgust": 1.0},
+    "disgusted": {"disgust": 1.1},
+    "disgusting": {"disgust": 1.1},
+    "gross": {"disgust": 0.9},
+    "nasty": {"disgust": 0.8, "anger": 0.2},
+    "revolting": {"disgust": 1.0},
+    "repulsive": {"disgust": 1.0},
+    "sick": {"disgust": 0.5, "sadness": 0.2},
+    "vile": {"disgust": 0.9, "anger": 0.3},
+    "awful": {"disgust": 0.5, "sadness": 0.3},
+    "terrible": {"disgust": 0.4, "sadness": 0.4},
+    "horrible": {"disgust": 0.5, "fear": 0.3},
+    "yuck": {"disgust": 1.0},
+    # fear
+    "afraid": {"fear": 1.1},
+    "scared": {"fear": 1.1},
+    "fear": {"fear": 1.0},
+    "frightened": {"fear": 1.1},
+    "terrified": {"fear": 1.3},
+    "anxious": {"fear": 0.8, "sadness": 0.2},
+    "nervous": {"fear": 0.7},
+    "worried": {"fear": 0.8, "sadness": 0.2},
+    "worry": {"fear": 0.7},
+    "panic": {"fear": 1.1},
+    "dread": {"fear": 1.0, "sadness": 0.2},
+    "danger": {"fear": 0.8},
+    "dangerous": {"fear": 0.8},
+    "threat": {"fear": 0.8, "anger": 0.2},
+    "horror": {"fear": 1.0, "disgust": 0.3},
+    # joy
+    "joy": {"joy": 1.0},
+    "happy": {"joy": 1.0},
+    "happiness": {"joy": 1.0},
+    "glad": {"joy": 0.9},
+    "love": {"joy": 1.0},
+    "loved": {"joy": 1.0},
+    "lovely": {"joy": 0.9},
+    "great": {"joy": 0.7},
+    "good": {"joy": 0.5},
+    "wonderful": {"joy": 1.0},
+    "amazing": {"joy": 1.0},
+    "awesome": {"joy": 0.9},
+    "excellent": {"joy": 0.9},
+    "fantastic": {"joy": 1.0},
+    "excited": {"joy": 0.9},
+    "delighted": {"joy": 1.1},
+    "pleased": {"joy": 0.8},
+    "thankful": {"joy": 0.8},
+    "grateful": {"joy": 0.8},
+    "thanks": {"joy": 0.5},
+    "fun": {"joy": 0.7},
+    "enjoy": {"joy": 0.8},
+    "enjoyed": {"joy": 0.8},
+    "beautiful": {"joy": 0.7},
+    "smile": {"joy": 0.7},
+    "laugh": {"joy": 0.8},
+    "best": {"joy": 0.6},
+    # sadness
+    "sad": {"sadness": 1.1},
+    "sadness": {"sadness": 1.0},
+    "unhappy": {"sadness": 1.0},
+    "depressed": {"sadness": 1.2},
+    "miserable": {"sadness": 1.1},
+    "lonely": {"sadness": 1.0},
+    "cry": {"sadness": 1.0},
+    "crying": {"sadness": 1.0},
+    "tears": {"sadness": 0.9},
+    "grief": {"sadness": 1.2},
+    "heartbroken": {"sadness": 1.3},
+    "disappointed": {"sadness": 0.9, "anger": 0.2},
+    "disappointing": {"sadness": 0.8, "anger": 0.2},
+    "sorry": {"sadness": 0.6},
+    "lost": {"sadness": 0.6, "fear": 0.1},
+    "miss": {"sadness": 0.6},
+    "hurt": {"sadness": 0.8, "anger": 0.2},
+    "pain": {"sadness": 0.7, "fear": 0.2},
+    "regret": {"sadness": 0.8},
+}
+
+# Weight added to every emotion before normalizing, so a text without known
+# words scores uniformly (and has no dominant emotion) instead of dividing by zero
+PRIOR = 0.05
+
+MODEL_ID = "emotion-lexicon-v1"
+
+_TOKEN_RE = re.compile(TOKEN_PATTERN)
+
+
+def tokenize(text):
+    """Lowercase word tokens of ``text``."""
+    return _TOKEN_RE.findall(text.lower())
+
+
+class LexiconBackend(Backend):
+    """Local lexicon scorer producing the same result shape as Watson.
+
+    Args:
+        lexicon: Mapping of word to ``{emotion: weight}``, defaults to LEXICON
+        prior: Uniform weight added to every emotion before normalizing
+    """
+
+    name = "local"
+    model_id = MODEL_ID
+    remote = False
+
+    def __init__(self, lexicon=None, prior=PRIOR):
+        lexicon = LEXICON if lexicon is None else lexicon
+        self.prior = prior
+
+        # Row i of the weight matrix holds the emotion weights of word i
+        self.vocabulary = {word: index for index, word in enumerate(lexicon)}
+        self.weights = np.zeros((len(lexicon), len(EMOTIONS)))
+        for word, index in self.vocabulary.items():
+            for emotion, weight in lexicon[word].items():
+                self.weights[index, EMOTIONS.index(emotion)] = weight
+
+    def score_matrix(self, texts):
+        """Return an (n_texts, 5) array of normalized emotion scores."""
+        return normalized_scores(featurize(texts, self.vocabulary), self.weights, self.prior)
+
+    def score_columns(self, texts):
+        """Score ``texts`` into columnar ``EmotionColumns``.
+
+        Empty or whitespace-only texts get NaN scores and no dominant emotion;
+        texts without a single lexicon word keep their uniform scores but
+        have no dominant emotion either.
+        """
+        texts = list(texts)
+        valid = np.fromiter((bool(text and text.strip()) for text in texts), dtype=bool, count=len(texts))
+        return EmotionColumns.from_scores(self.score_matrix(texts), valid)
+
+    def analyze(self, text_to_analyse):
+        return self.analyze_batch([text_to_analyse])[0]
+
+    def analyze_batch(self, texts):
+        return self.score_columns(texts).to_results()
@@ -0,0 +1,297 @@
+"""Adaptive concurrency limit and load shedding for upstream calls.
+
+``AdaptiveLimiter`` caps how many upstream calls run at once and adjusts
+the cap with AIMD (additive increase, multiplicative decrease) from the
+observed upstream latency:
+
+* while the smoothed latency stays within ``tolerance`` times the recent
+  minimum latency and the limit is actually in use, every call raises the
+  limit by ``1 / limit`` (about +1 per limit's worth of calls)
+* when the smoothed latency exceeds that, or a call times out or hits a
+  server error, the limit is multiplied by ``backoff_ratio`` - at most
+  once per limit's worth of calls, so one slow burst is not punished
+  repeatedly
+
+Callers over the limit wait in a bounded queue.  When the queue is full,
+or a caller has waited ``queue_timeout`` seconds, ``Overloaded`` is raised
+so the server can answer 503 with Retry-After at once instead of letting
+latency grow for everyone.  Threads wait with ``acquire`` and coroutines
+with ``acquire_async``; both share one limit.
+
+Shedding load is the servers' job: library callers such as
+``emotion_detector_batch`` and the CLI would only lose results to it, so
+there is no limiter until ``configure_limiter_from_env`` (called by both
+servers at startup) or ``configure_limiter`` installs one.
+"""
+
+import math
+import os
+import threading
+import time
+
+
+DEFAULT_INITIAL_LIMIT = 20
+DEFAULT_MIN_LIMIT = 1
+DEFAULT_MAX_LIMIT = 200
+DEFAULT_MAX_QUEUE = 100
+DEFAULT_QUEUE_TIMEOUT = 2.0
+
+
+class Overloaded(Exception):
+    """Raised when an upstream call is shed instead of queued.
+
+    Attributes:
+        retry_after: Whole seconds after which a retry is reasonable
+    """
+
+    def __init__(self, message, retry_after=1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency limiter with a bounded wait queue, safe across threads.
+
+    Args:
+        initial_limit: Concurrent calls allowed at start
+        min_limit: Lowest the limit can shrink to
+        max_limit: Highest the limit can grow to
+        max_queue: Callers allowed to wait for a free slot
+        queue_timeout: Seconds a caller waits before being shed
+        backoff_ratio: Factor applied to the limit on a slow or failed call
+        tolerance: Smoothed latency above ``tolerance`` times the recent
+            minimum latency counts as a sign of overload
+        sample_window: Calls per window of the recent-minimum latency
+        clock: Monotonic time source, replaceable in tests
+    """
+
+    def __init__(self, initial_limit=DEFAULT_INITIAL_LIMIT, min_limit=DEFAULT_MIN_LIMIT,
+                 max_limit=DEFAULT_MAX_LIMIT, max_queue=DEFAULT_MAX_QUEUE,
+                 queue_timeout=DEFAULT_QUEUE_TIMEOUT, backoff_ratio=0.9, tolerance=3.0,
+                 smoothing=0.2, sample_window=500, clock=time.monotonic):
+        if not 1 <= min_limit <= initial_limit <= max_limit:
+            raise ValueError("Expected 1 <= min_limit <= initial_limit <= max_limit")
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.backoff_ratio = backoff_ratio
+        self.tolerance = tolerance
+        self.smoothing = smoothing
+        self.sample_window = sample_window
+        self.clock = clock
+
+        self._limit = float(initial_limit)
+        self._in_flight = 0
+        self._waiting = 0
+        self._condition = threading.Condition(threading.Lock())
+        # (loop, future) of coroutines waiting in acquire_async
+        self._async_waiters = []
+        # Minimum latency of the current and previous sample windows
+        self._window_min = None
+        self._previous_min = None
+        self._samples = 0
+        self._smoothed = None
+        # Calls left before the limit may be decreased again
+        self._cooldown = 0
+        self.rejected = 0
+
+    @property
+    def limit(self):
+        return max(self.min_limit, int(self._limit))
+
+    def retry_after(self):
+        """Suggested Retry-After in whole seconds."""
+        return max(1, math.ceil(self.queue_timeout))
+
+    def acquire(self):
+        """Take a slot, waiting in the queue if needed.
+
+        Raises:
+            Overloaded: The queue is full or the wait timed out
+        """
+        with self._condition:
+            if self._in_flight < self.limit:
+                self._in_flight += 1
+                return
+            if self._waiting >= self.max_queue:
+                self.rejected += 1
+                raise Overloaded("Too many requests waiting for the upstream", self.retry_after())
+
+            self._waiting += 1
+            try:
+                deadline = self.clock() + self.queue_timeout
+                while self._in_flight >= self.limit:
+                    remaining = deadline - self.clock()
+                    if remaining <= 0:
+                        self.rejected += 1
+                        raise Overloaded("Timed out waiting for the upstream", self.retry_after())
+                    self._condition.wait(remaining)
+            finally:
+                self._waiting -= 1
+            self._in_flight += 1
+
+    async def acquire_async(self):
+        """Take a slot like ``acquire``, waiting without blocking the event loop.
+
+        Raises:
+            Overloaded: The queue is full or the wait timed out
+        """
+        # Only coroutines get here, so asyncio is already loaded
+        import asyncio
+
+        with self._condition:
+            if self._in_flight < self.limit:
+                self._in_flight += 1
+                return
+            if self._waiting >= self.max_queue:
+                self.rejected += 1
+                raise Overloaded("Too many requests waiting for the upstream", self.retry_after())
+            self._waiting += 1
+
+        loop = asyncio.get_running_loop()
+        waiter = None
+        try:
+            deadline = self.clock() + self.queue_timeout
+            while True:
+                with self._condition:
+                    if waiter in self._async_waiters:
+                        self._async_waiters.remove(waiter)
+                    if self._in_flight < self.limit:
+                        self._in_flight += 1
+                        return
+                    remaining = deadline - self.clock()
+                    if remaining <= 0:
+                        self.rejected += 1
+                        raise Overloaded("Timed out waiting for the upstream", self.retry_after())
+                    waiter = (loop, loop.create_future())
+                    self._async_waiters.append(waiter)
+                try:
+                    await asyncio.wait_for(waiter[1], remaining)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            with self._condition:
+                self._waiting -= 1
+                if waiter in self._async_waiters:
+                    self._async_waiters.remove(waiter)
+
+    def release(self, latency, dropped=False):
+        """Free a slot and adapt the limit.
+
+        Args:
+            latency: Seconds the upstream call took
+            dropped: True if the call timed out or failed on the server side
+        """
+        with self._condition:
+            utilized = self._in_flight >= self.limit / 2
+            self._in_flight -= 1
+            baseline = self._baseline()
+            self._sample(latency)
+            congested = dropped or (baseline is not None
+                                    and self._smoothed > baseline * self.tolerance)
+
+            if self._cooldown:
+                self._cooldown -= 1
+            elif congested:
+                self._limit = max(self.min_limit, self._limit * self.backoff_ratio)
+                self._cooldown = self.limit
+            elif utilized:
+                self._limit = min(self.max_limit, self._limit + 1 / self._limit)
+
+            # The limit may have grown by a slot; wake as many waiters as fit
+            free = self.limit - self._in_flight
+            if free > 0 and self._waiting:
+                self._condition.notify(free)
+                # Woken waiters re-check the limit, so waking too many is harmless
+                woken, self._async_waiters[:free] = self._async_waiters[:free], []
+                for loop, future in woken:
+                    loop.call_soon_threadsafe(_wake, future)
+
+    def stats(self):
+        """Return the current limit, calls in flight and waiting, and rejected calls."""
+        with self._condition:
+            return {
+                "limit": self.limit,
+                "in_flight": self._in_flight,
+                "waiting": self._waiting,
+                "rejected": self.rejected,
+            }
+
+    def _baseline(self):
+        candidates = [value for value in (self._window_min, self._previous_min) if value is not None]
+        return min(candidates) if candidates else None
+
+    def _sample(self, latency):
+        if self._smoothed is None:
+            self._smoothed = latency
+        else:
+            self._smoothed += self.smoothing * (latency - self._smoothed)
+        if self._window_min is None or latency < self._window_min:
+            self._window_min = latency
+        self._samples += 1
+        if self._samples >= self.sample_window:
+            # Forget old minimums so the baseline follows a changed upstream
+            self._previous_min, self._window_min = self._window_min, None
+            self._samples = 0
+
+
+def _wake(future):
+    if not future.done():
+        future.set_result(None)
+
+
+_default_limiter = None
+_default_lock = threading.Lock()
+
+
+def _limiter_from_env():
+    if os.environ.get("EMOTION_LIMITER", "on").strip().lower() in ("off", "0", "false", "no"):
+        return None
+    initial = int(os.environ.get("EMOTION_LIMITER_INITIAL", DEFAULT_INITIAL_LIMIT))
+    maximum = int(os.environ.get("EMOTION_LIMITER_MAX", DEFAULT_MAX_LIMIT))
+    return AdaptiveLimiter(
+        initial_limit=min(initial, maximum),
+        max_limit=maximum,
+        max_queue=int(os.environ.get("EMOTION_LIMITER_QUEUE", DEFAULT_MAX_QUEUE)),
+        queue_timeout=float(os.environ.get("EMOTION_LIMITER_QUEUE_TIMEOUT", DEFAULT_QUEUE_TIMEOUT)),
+    )
+
+
+def default_limiter():
+    """Return the limiter for upstream calls, or None when none is installed."""
+    return _default_limiter
+
+
+def configure_limiter_from_env():
+    """Install the limiter described by the environment, as the servers do.
+
+    Reads ``EMOTION_LIMITER`` (``off`` disables it), ``EMOTION_LIMITER_INITIAL``,
+    ``EMOTION_LIMITER_MAX``, ``EMOTION_LIMITER_QUEUE`` and
+    ``EMOTION_LIMITER_QUEUE_TIMEOUT``.
+
+    Returns:
+        The new default limiter, or None when disabled
+    """
+    global _default_limiter
+    limiter = _limiter_from_env()
+    with _default_lock:
+        _default_limiter = limiter
+    return limiter
+
+
+def configure_limiter(enabled=True, **options):
+    """Replace the upstream limiter with one built from ``options``.
+
+    Args:
+        enabled: False removes the limit altogether
+        **options: Keyword arguments for ``AdaptiveLimiter``
+
+    Returns:
+        The new default limiter, or None when disabled
+    """
+    global _default_limiter
+    limiter = AdaptiveLimiter(**options) if enabled else None
+    with _default_lock:
+        _default_limiter = limiter
+    return limiter
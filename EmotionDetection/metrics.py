@@ -0,0 +1,311 @@
+"""In-process metrics in the Prometheus text exposition format.
+
+A deliberately small replacement for ``prometheus_client``: counters,
+gauges and histograms with fixed label names, updated under a per-metric
+lock so recording costs one dictionary lookup and an addition.  ``render``
+produces the text served on ``/metrics``::
+
+    from EmotionDetection import metrics
+    metrics.UPSTREAM_RESPONSES.inc("200")
+    metrics.REQUEST_PHASES.observe(0.012, "upstream")
+    body = metrics.render()
+
+Metrics are per process; with several workers each one exposes its own.
+"""
+
+import threading
+from bisect import bisect_left
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_REGISTRY = []
+_COLLECTORS = []
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+               for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=(), register=True):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+        if register:
+            _REGISTRY.append(self)
+
+    def _check(self, labelvalues):
+        if len(labelvalues) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {labelvalues}")
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def header(self):
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for labelvalues, value in items:
+            yield f"{self.name}{_format_labels(self.labelnames, labelvalues)} {_format_value(value)}"
+
+
+class Counter(_Metric):
+    """Monotonically increasing count, optionally split by labels."""
+
+    kind = "counter"
+
+    def inc(self, *labelvalues, amount=1):
+        key = tuple(labelvalues)
+        with self._lock:
+            try:
+                self._values[key] += amount
+            except KeyError:
+                self._check(key)
+                self._values[key] = amount
+
+    def value(self, *labelvalues):
+        with self._lock:
+            return self._values.get(tuple(labelvalues), 0)
+
+
+class Gauge(Counter):
+    """Value that can go up and down, such as requests in flight."""
+
+    kind = "gauge"
+
+    def dec(self, *labelvalues, amount=1):
+        self.inc(*labelvalues, amount=-amount)
+
+    def set(self, value, *labelvalues):
+        key = tuple(labelvalues)
+        self._check(key)
+        with self._lock:
+            self._values[key] = value
+
+
+class _HistogramValue:
+    __slots__ = ("buckets", "sum", "count")
+
+    def __init__(self, size):
+        self.buckets = [0] * size
+        self.sum = 0.0
+        self.count = 0
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in fixed cumulative buckets.
+
+    Args:
+        buckets: Sorted upper bounds; an implicit ``+Inf`` bucket is added
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, register=True):
+        super().__init__(name, documentation, labelnames, register)
+        self.bounds = tuple(buckets)
+
+    def observe(self, value, *labelvalues):
+        key = tuple(labelvalues)
+        # Index of the first bucket whose upper bound holds the value
+        index = bisect_left(self.bounds, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                self._check(key)
+                entry = self._values[key] = _HistogramValue(len(self.bounds) + 1)
+            entry.buckets[index] += 1
+            entry.sum += value
+            entry.count += 1
+
+    def count(self, *labelvalues):
+        with self._lock:
+            entry = self._values.get(tuple(labelvalues))
+            return entry.count if entry else 0
+
+    def samples(self):
+        with self._lock:
+            items = [(key, list(entry.buckets), entry.sum, entry.count)
+                     for key, entry in sorted(self._values.items())]
+        for labelvalues, buckets, total, count in items:
+            cumulative = 0
+            for bound, observed in zip(self.bounds + (float("inf"),), buckets):
+                cumulative += observed
+                labels = _format_labels(self.labelnames, labelvalues, [("le", _format_value(bound))])
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, labelvalues)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {count}"
+
+
+def register_collector(collector):
+    """Add a callable returning metrics computed at scrape time."""
+    _COLLECTORS.append(collector)
+    return collector
+
+
+def render():
+    """All registered metrics in the Prometheus text format."""
+    lines = []
+    metrics = list(_REGISTRY)
+    for collector in _COLLECTORS:
+        metrics.extend(collector())
+    for metric in metrics:
+        lines.extend(metric.header())
+        lines.extend(metric.samples())
+    return "\n".join(lines) + "\n"
+
+
+HTTP_REQUESTS = Counter(
+    "emotion_http_requests_total", "HTTP requests handled, by route and status code",
+    ("route", "status"))
+
+HTTP_IN_FLIGHT = Gauge(
+    "emotion_http_requests_in_flight", "HTTP requests currently being handled")
+
+REQUEST_PHASES = Histogram(
+    "emotion_request_duration_seconds",
+    "Latency of /emotionDetector requests (total) and of the upstream call and response parsing",
+    ("phase",))
+
+UPSTREAM_RESPONSES = Counter(
+    "emotion_upstream_responses_total",
+    "Upstream EmotionPredict calls by HTTP status code, timeout, connection_error "
+    "or circuit_open (failed fast by the circuit breaker)",
+    ("status",))
+
+DETECTOR_RESULTS = Counter(
+    "emotion_detector_results_total",
+    "Analysis results served: ok, no_signal when no emotion dominates, or fallback when every emotion is None",
+    ("result",))
+
+
+def observe_result(result):
+    """Count a served result as ``ok``, ``no_signal`` or the all-None ``fallback``."""
+    if result.get("dominant_emotion") is not None:
+        DETECTOR_RESULTS.inc("ok")
+    elif result.get("anger") is not None:
+        DETECTOR_RESULTS.inc("no_signal")
+    else:
+        DETECTOR_RESULTS.inc("fallback")
+
+
+@register_collector
+def _cache_metrics():
+    # Imported here so recording metrics never pulls in the cache module
+    from .cache import get_cache
+    from .singleflight import coalescing_stats
+
+    collected = []
+    cache = get_cache()
+    if cache is not None:
+        stats = cache.stats()
+        for name, documentation, key, kind in (
+                ("emotion_cache_hits_total", "Result cache hits", "hits", Counter),
+                ("emotion_cache_misses_total", "Result cache misses", "misses", Counter),
+                ("emotion_cache_entries", "Results currently cached", "size", Gauge),
+                ("emotion_cache_hit_ratio", "Cache hits divided by lookups", "hit_rate", Gauge)):
+            metric = kind(name, documentation, register=False)
+            metric.inc(amount=stats[key])
+            collected.append(metric)
+
+    coalescing = coalescing_stats()
+    for name, documentation, key in (
+            ("emotion_upstream_calls_executed_total", "Upstream calls actually sent", "executed"),
+            ("emotion_upstream_calls_coalesced_total",
+             "Callers that shared an identical in-flight upstream call", "coalesced")):
+        metric = Counter(name, documentation, register=False)
+        metric.inc(amount=coalescing[key])
+        collected.append(metric)
+    return collected
+
+
+@register_collector
+def _circuit_breaker_metrics():
+    from .circuit_breaker import CLOSED, HALF_OPEN, OPEN, circuit_breaker_stats
+
+    stats = circuit_breaker_stats()
+    state = Gauge("emotion_circuit_breaker_state",
+                  "1 for the current state of the upstream circuit breaker", ("state",),
+                  register=False)
+    for name in (CLOSED, OPEN, HALF_OPEN):
+        state.set(int(stats["state"] == name), name)
+    rejected = Counter("emotion_circuit_breaker_rejected_total",
+                       "Calls failed fast while the circuit breaker was open", register=False)
+    rejected.inc(amount=stats["rejected"])
+    opened = Counter("emotion_circuit_breaker_opened_total",
+                     "Times the circuit breaker opened", register=False)
+    opened.inc(amount=stats["times_opened"])
+    return [state, rejected, opened]
+
+
+@register_collector
+def _dispatcher_metrics():
+    from .dispatcher import default_dispatcher
+
+    stats = default_dispatcher().stats()
+    batches = Counter("emotion_microbatch_batches_total",
+                      "Batches sent by the micro-batching dispatcher", register=False)
+    batches.inc(amount=stats["batches"])
+    items = Counter("emotion_microbatch_items_total",
+                    "Texts analyzed through the micro-batching dispatcher", register=False)
+    items.inc(amount=stats["items"])
+    return [batches, items]
+
+
+@register_collector
+def _limiter_metrics():
+    from .limiter import default_limiter
+
+    limiter = default_limiter()
+    if limiter is None:
+        return []
+    stats = limiter.stats()
+    collected = []
+    for name, documentation, key in (
+            ("emotion_upstream_concurrency_limit", "Current adaptive limit on upstream calls", "limit"),
+            ("emotion_upstream_in_flight", "Upstream calls holding a limiter slot", "in_flight"),
+            ("emotion_upstream_queued", "Calls waiting for a limiter slot", "waiting")):
+        metric = Gauge(name, documentation, register=False)
+        metric.set(stats[key])
+        collected.append(metric)
+    shed = Counter("emotion_upstream_shed_total",
+                   "Calls rejected because the limiter queue was full or timed out", register=False)
+    shed.inc(amount=stats["rejected"])
+    collected.append(shed)
+    return collected
+
+
+@register_collector
+def _hedging_metrics():
+    from .hedging import hedging_stats
+
+    stats = hedging_stats()
+    sent = Counter("emotion_hedged_requests_sent_total",
+                   "Duplicate upstream calls sent because the first one was slow", register=False)
+    sent.inc(amount=stats["hedges_sent"])
+    won = Counter("emotion_hedged_requests_won_total",
+                  "Hedged calls that answered before the original", register=False)
+    won.inc(amount=stats["hedges_won"])
+    return [sent, won]
@@ -0,0 +1,155 @@
+"""Compact result type for one analyzed text.
+
+``EmotionResult`` is an immutable named tuple: the five emotion scores, the
+dominant emotion and a ``status`` (plus an optional ``reason``) telling why
+a result is empty.  It takes roughly half the memory of the equivalent
+dictionary, and failures share one instance per status, so bulk jobs can
+hold millions of results cheaply.  ``to_dict`` gives the JSON shape
+``emotion_detector`` has always returned::
+
+    {"anger": ..., "disgust": ..., "fear": ..., "joy": ..., "sadness": ...,
+     "dominant_emotion": ...}
+
+A text with no emotional signal (every score equal, for example a text
+without a single lexicon word) keeps its scores but has no dominant
+emotion and the status "no_signal", rather than naming whichever emotion
+happens to come first.
+
+Detailed results also carry ``mentions``, the scores of each span (usually
+a sentence) of the text, which ``to_dict`` adds as a ``"mentions"`` list.
+"""
+
+from typing import NamedTuple
+
+
+EMOTIONS = ("anger", "disgust", "fear", "joy", "sadness")
+EMOTION_KEYS = EMOTIONS + ("dominant_emotion",)
+
+# Values of EmotionResult.status
+OK = "ok"
+EMPTY_INPUT = "empty_input"
+BAD_REQUEST = "bad_request"
+UPSTREAM_ERROR = "upstream_error"
+TIMEOUT = "timeout"
+CONNECTION_ERROR = "connection_error"
+PARSE_ERROR = "parse_error"
+NO_SIGNAL = "no_signal"
+CIRCUIT_OPEN = "circuit_open"
+ERROR = "error"
+
+
+class EmotionResult(NamedTuple):
+    """Scores for one text; every score is None unless ``status`` is "ok" or "no_signal"."""
+
+    anger: float = None
+    disgust: float = None
+    fear: float = None
+    joy: float = None
+    sadness: float = None
+    dominant_emotion: str = None
+    status: str = OK
+    reason: str = None
+    mentions: tuple = None
+
+    @classmethod
+    def from_scores(cls, emotions, mentions=None):
+        """Build a scored result from a mapping of the five emotion scores.
+
+        When all five scores are equal no emotion dominates: the result
+        keeps the scores with ``dominant_emotion`` None and status "no_signal".
+
+        Raises KeyError when an emotion is missing.
+        """
+        scores = [emotions[name] for name in EMOTIONS]
+        if len(set(scores)) == 1:
+            return cls(*scores, None, NO_SIGNAL, mentions=mentions)
+        dominant = EMOTIONS[max(range(len(scores)), key=scores.__getitem__)]
+        return cls(*scores, dominant, mentions=mentions)
+
+    @classmethod
+    def failure(cls, status, reason=None):
+        """The empty result for ``status``; shared when there is no reason."""
+        if reason is None:
+            cached = _FAILURES.get(status)
+            if cached is not None:
+                return cached
+        return cls(status=status, reason=reason)
+
+    @classmethod
+    def from_dict(cls, result):
+        """Build a result from an emotion_detector-style dictionary.
+
+        Scores without a dominant emotion are a "no_signal" result; a
+        dictionary without scores is the empty result.
+        """
+        dominant = result.get("dominant_emotion")
+        if dominant is None and result.get(EMOTIONS[0]) is None:
+            return EMPTY_RESULT
+        mentions = result.get("mentions")
+        if mentions is not None:
+            mentions = tuple(Mention.from_dict(mention) for mention in mentions)
+        status = OK if dominant is not None else NO_SIGNAL
+        return cls(*(result[key] for key in EMOTION_KEYS), status, mentions=mentions)
+
+    @property
+    def ok(self):
+        return self.dominant_emotion is not None
+
+    @property
+    def scored(self):
+        """Whether the text was scored, including texts with no signal."""
+        return self.status in (OK, NO_SIGNAL)
+
+    def to_dict(self):
+        """The six-key dictionary emotion_detector returns, plus any ``mentions``."""
+        result = dict(zip(EMOTION_KEYS, self))
+        if self.mentions is not None:
+            result["mentions"] = [mention.to_dict() for mention in self.mentions]
+        return result
+
+    def get(self, key, default=None):
+        """Dictionary-style access to a score or ``dominant_emotion``."""
+        return getattr(self, key) if key in EMOTION_KEYS else default
+
+    def __getitem__(self, key):
+        # Result dictionaries were indexed by name; keep that working
+        if isinstance(key, str):
+            if key not in EMOTION_KEYS:
+                raise KeyError(key)
+            return getattr(self, key)
+        return tuple.__getitem__(self, key)
+
+
+class Mention(NamedTuple):
+    """Scores of the span ``text[begin:end]`` of an analyzed text."""
+
+    begin: int
+    end: int
+    text: str
+    result: EmotionResult
+
+    @classmethod
+    def from_dict(cls, mention):
+        return cls(mention["begin"], mention["end"], mention["text"],
+                   EmotionResult.from_dict(mention))
+
+    def to_dict(self):
+        """Offsets and text of the span followed by its scores."""
+        return {"begin": self.begin, "end": self.end, "text": self.text, **self.result.to_dict()}
+
+
+_FAILURES = {
+    status: EmotionResult(status=status)
+    for status in (EMPTY_INPUT, BAD_REQUEST, UPSTREAM_ERROR, TIMEOUT, CONNECTION_ERROR,
+                   PARSE_ERROR, CIRCUIT_OPEN, ERROR)
+}
+
+# Result for empty input; also used where only "no scores" matters
+EMPTY_RESULT = _FAILURES[EMPTY_INPUT]
+
+
+def as_result(value):
+    """Return ``value`` as an EmotionResult, converting a result dictionary."""
+    if isinstance(value, EmotionResult):
+        return value
+    return EmotionResult.from_dict(value)
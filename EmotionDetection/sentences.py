@@ -0,0 +1,21 @@
+"""Sentence boundaries of a text, as character offsets."""
+
+import re
+
+
+# A run of text up to and including its closing punctuation, or up to the
+# end of its line
+_SENTENCE_RE = re.compile(r"[^\s.!?][^.!?\n]*(?:[.!?]+|$)", re.MULTILINE)
+
+
+def sentence_spans(text):
+    """Return ``(begin, end)`` offsets of the sentences in ``text``.
+
+    Sentences end at ``.``, ``!``, ``?`` or a line break; surrounding
+    whitespace is not part of a span.
+    """
+    spans = []
+    for match in _SENTENCE_RE.finditer(text):
+        sentence = match.group().rstrip()
+        spans.append((match.start(), match.start() + len(sentence)))
+    return spans
@@ -0,0 +1,168 @@
+"""Request coalescing (single-flight) for identical concurrent texts.
+
+When several callers ask for the same key while a call for it is already in
+flight, they wait for that call and share its result instead of each
+sending their own upstream request.
+"""
+
+import threading
+
+
+class _Call:
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key across threads.
+
+    Args:
+        parent: Group whose ``stats`` also count this group's calls, so
+            separate groups (one per EmotionClient) still add up in
+            ``coalescing_stats``
+    """
+
+    def __init__(self, parent=None):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.parent = parent
+        self.executed = 0
+        self.coalesced = 0
+        # Calls of child groups in flight
+        self._child_calls = 0
+
+    def do(self, key, fn, *args):
+        """Run ``fn(*args)`` unless a call for ``key`` is already in flight.
+
+        Callers that find a call in flight block until it finishes and get
+        the same result (or exception).
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.executed += 1
+                leader = True
+        if self.parent is not None:
+            self.parent._count_child(leader)
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            if self.parent is not None:
+                self.parent._finish_child()
+            call.event.set()
+
+    def stats(self):
+        """Return how many calls were executed, coalesced and are in flight."""
+        with self._lock:
+            return {
+                "executed": self.executed,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._calls) + self._child_calls,
+            }
+
+    def _count_child(self, leader):
+        with self._lock:
+            if leader:
+                self.executed += 1
+                self._child_calls += 1
+            else:
+                self.coalesced += 1
+        if self.parent is not None:
+            self.parent._count_child(leader)
+
+    def _finish_child(self):
+        with self._lock:
+            self._child_calls -= 1
+        if self.parent is not None:
+            self.parent._finish_child()
+
+
+class AsyncSingleFlight:
+    """Coalesce concurrent coroutine calls with the same key on one event loop."""
+
+    def __init__(self):
+        self._calls = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    async def do(self, key, fn, *args):
+        """Await ``fn(*args)`` unless a call for ``key`` is already in flight."""
+        # Imported here so sync-only users do not pay for loading asyncio
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        future = self._calls.get(key)
+        # Futures are bound to their loop; calls on another loop run on their own
+        if future is not None and future.get_loop() is loop:
+            self.coalesced += 1
+            # Shield so one cancelled waiter does not cancel the shared call
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # Only the caller running the call was cancelled (for example
+                # a superseded live request); run the call for this one
+                if not future.cancelled() or asyncio.current_task().cancelling():
+                    raise
+                return await self.do(key, fn, *args)
+
+        future = loop.create_future()
+        self._calls[key] = future
+        self.executed += 1
+        try:
+            result = await fn(*args)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Retrieve it so an unawaited future does not log a warning
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+
+    def stats(self):
+        """Return how many calls were executed, coalesced and are in flight."""
+        return {
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._calls),
+        }
+
+
+# Shared groups used by emotion_detector and emotion_detector_async
+upstream_calls = SingleFlight()
+async_upstream_calls = AsyncSingleFlight()
+
+
+def coalescing_stats():
+    """Counters for upstream calls executed and coalesced, sync and async combined."""
+    sync_stats = upstream_calls.stats()
+    async_stats = async_upstream_calls.stats()
+    return {name: sync_stats[name] + async_stats[name] for name in sync_stats}
@@ -0,0 +1,149 @@
+"""Persistent result store for re-scoring the same corpora.
+
+``ResultStore`` keeps results in one SQLite database in WAL mode, keyed by
+``cache_key`` (a hash of the normalized text and the model ID), so a run
+over an archive that was scored before only calls the upstream for texts
+it has never seen.  WAL mode lets any number of processes read while one
+writes.  Besides the cache interface (``get``, ``set``, ``clear``,
+``stats``) it has ``get_many`` and ``put_many``, which batch paths use to
+look up and store whole chunks of texts in one query and one transaction.
+
+Install it with ``set_cache(ResultStore(path))`` or
+``EMOTION_DETECTOR_CACHE=sqlite`` and ``EMOTION_DETECTOR_CACHE_PATH``.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+from . import jsoncodec
+
+
+# Host parameters per query; older SQLite builds allow at most 999
+_LOOKUP_CHUNK = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    created REAL NOT NULL
+) WITHOUT ROWID
+"""
+
+
+class ResultStore:
+    """Result cache in an SQLite database shared by threads and processes.
+
+    Args:
+        path: Database file, created (with its directory) if missing
+        ttl: Seconds an entry stays valid, or None (default) to keep it
+        timeout: Seconds a writer waits for another process's write lock
+    """
+
+    def __init__(self, path, ttl=None, timeout=30.0):
+        self.path = path
+        self.ttl = ttl
+        self.timeout = timeout
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        connection = self._connection()
+        # WAL lets readers in other processes proceed while one writes
+        connection.execute("PRAGMA journal_mode=WAL")
+        with connection:
+            connection.execute(_SCHEMA)
+
+    def _connection(self):
+        # SQLite connections belong to one thread and must not cross a fork
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=self.timeout)
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def _oldest_valid(self):
+        return time.time() - self.ttl if self.ttl is not None else float("-inf")
+
+    def get(self, key):
+        """Return the stored value for ``key`` or None."""
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys):
+        """Look up many keys at once.
+
+        Returns:
+            Dictionary of the keys that were found to their values
+        """
+        keys = list(dict.fromkeys(keys))
+        oldest = self._oldest_valid()
+        connection = self._connection()
+        found = {}
+        for start in range(0, len(keys), _LOOKUP_CHUNK):
+            chunk = keys[start:start + _LOOKUP_CHUNK]
+            rows = connection.execute(
+                f"SELECT key, value FROM results WHERE key IN ({','.join('?' * len(chunk))})"
+                " AND created > ?", (*chunk, oldest))
+            for key, value in rows:
+                found[key] = jsoncodec.loads(value)
+
+        with self._lock:
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def set(self, key, value):
+        """Store ``value`` under ``key``."""
+        self.put_many({key: value})
+
+    def put_many(self, items):
+        """Store every ``key: value`` of ``items`` in one transaction."""
+        if not items:
+            return
+        now = time.time()
+        rows = [(key, jsoncodec.dumps(value), now) for key, value in items.items()]
+        connection = self._connection()
+        with connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO results (key, value, created) VALUES (?, ?, ?)", rows)
+
+    def prune(self):
+        """Delete entries older than ``ttl``."""
+        if self.ttl is None:
+            return
+        connection = self._connection()
+        with connection:
+            connection.execute("DELETE FROM results WHERE created <= ?", (self._oldest_valid(),))
+
+    def clear(self):
+        connection = self._connection()
+        with connection:
+            connection.execute("DELETE FROM results")
+        with self._lock:
+            self.hits = self.misses = 0
+
+    def stats(self):
+        """Return hits, misses and hit_rate for this process and the store size."""
+        size = self._connection().execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": size,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def close(self):
+        """Close this thread's connection."""
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
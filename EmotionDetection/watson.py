@@ -0,0 +1,203 @@
+"""Remote Watson EmotionPredict backend."""
+
+import requests
+import time
+
+from . import metrics
+from .backends import Backend
+from .circuit_breaker import default_circuit_breaker
+from .http_client import default_http_client
+from .jsoncodec import loads, parse_emotion
+from .limiter import default_limiter
+from .result import (
+    BAD_REQUEST,
+    CIRCUIT_OPEN,
+    CONNECTION_ERROR,
+    ERROR,
+    PARSE_ERROR,
+    TIMEOUT,
+    UPSTREAM_ERROR,
+    EmotionResult,
+    Mention,
+)
+
+
+# URL of the emotion_detection service
+URL = 'https://sn-watson-emotion.labs.skills.network/v1/watson.runtime.nlp.v1/NlpService/EmotionPredict'
+
+# Model used by the emotion_detection service
+MODEL_ID = "emotion_aggregated-workflow_lang_en_stock"
+
+# Custom header specifying the model ID for the emotion_detection service
+HEADERS = {"grpc-metadata-mm-model-id": MODEL_ID}
+
+
+def build_payload(text_to_analyse):
+    # Constructing the request payload in the expected format
+    return { "raw_document": { "text": text_to_analyse } }
+
+
+def parse_emotions(response_body, detailed=False):
+    """Turn an EmotionPredict response body (bytes or text) into an EmotionResult.
+
+    Args:
+        response_body: Response body as bytes or text
+        detailed: Also read the per-span scores in ``emotionMentions``
+
+    Raises KeyError, IndexError or ValueError when the body is malformed.
+    """
+    if detailed:
+        prediction = loads(response_body)['emotionPredictions'][0]
+        mentions = tuple(parse_mention(mention) for mention in prediction.get('emotionMentions', ()))
+        return EmotionResult.from_scores(prediction['emotion'], mentions)
+
+    # Extract emotions without decoding the emotionMentions span tree
+    emotions = parse_emotion(response_body)
+
+    # Scores plus the dominant emotion, without an intermediate dictionary
+    return EmotionResult.from_scores(emotions)
+
+
+def parse_mention(mention):
+    """Turn one ``emotionMentions`` entry into a Mention."""
+    span = mention['span']
+    return Mention(span['begin'], span['end'], span['text'],
+                   EmotionResult.from_scores(mention['emotion']))
+
+
+def _response_body(response):
+    # Parse the raw bytes; stand-in responses may only carry text
+    body = response.content
+    return body if isinstance(body, bytes) else response.text
+
+
+def model_headers(model_id):
+    """Request headers selecting ``model_id``."""
+    return HEADERS if model_id == MODEL_ID else {"grpc-metadata-mm-model-id": model_id}
+
+
+def analyze_upstream(text_to_analyse, detailed=False, url=None, model_id=MODEL_ID, http_client=None):
+    """Send ``text_to_analyse`` to EmotionPredict and return an EmotionResult.
+
+    With ``detailed`` the result also holds the per-span ``mentions`` of the
+    same response.  ``url`` (default: ``URL``), ``model_id`` and
+    ``http_client`` (default: the shared client) select where and how the
+    request is sent.
+
+    Every failure (error status, timeout, connection or parse error) yields
+    an empty result whose ``status`` says what went wrong.  While the circuit
+    breaker is open the call is not attempted and the ``circuit_open``
+    result is returned at once.
+
+    Raises:
+        Overloaded: Too many upstream calls are already running and waiting
+            (see EmotionDetection.limiter)
+    """
+    breaker = default_circuit_breaker()
+    if not breaker.allow_request():
+        # Fail fast instead of waiting for a timeout from a dead upstream
+        metrics.UPSTREAM_RESPONSES.inc("circuit_open")
+        return EmotionResult.failure(CIRCUIT_OPEN)
+
+    limiter = default_limiter()
+    if limiter is not None:
+        try:
+            limiter.acquire()
+        except Exception:
+            breaker.release()
+            raise
+
+    # Server errors, timeouts and unparsable bodies count against the upstream
+    healthy = False
+    call_started = time.perf_counter()
+    try:
+        # Sending a POST request to the emotion_detection API over the
+        # shared keep-alive connection pool
+        started = time.perf_counter()
+        client = http_client or default_http_client()
+        response = client.post(url or URL, json=build_payload(text_to_analyse), headers=model_headers(model_id))
+        metrics.REQUEST_PHASES.observe(time.perf_counter() - started, "upstream")
+        metrics.UPSTREAM_RESPONSES.inc(str(response.status_code))
+        healthy = response.status_code < 500
+        
+        # Check if the request was successful
+        if response.status_code == 200:
+            started = time.perf_counter()
+            result = parse_emotions(_response_body(response), detailed)
+            metrics.REQUEST_PHASES.observe(time.perf_counter() - started, "parse")
+            return result
+        
+        elif response.status_code == 400:
+            # Bad request - invalid input
+            return EmotionResult.failure(BAD_REQUEST)
+        
+        elif response.status_code == 500:
+            # Server error
+            return EmotionResult.failure(UPSTREAM_ERROR)
+        
+        else:
+            # Other status codes
+            return EmotionResult.failure(UPSTREAM_ERROR, f"HTTP {response.status_code}")
+    
+    except requests.exceptions.Timeout:
+        # Handle timeout error
+        metrics.UPSTREAM_RESPONSES.inc("timeout")
+        print("Error: Request timed out")
+        return EmotionResult.failure(TIMEOUT)
+    
+    except requests.exceptions.ConnectionError:
+        # Handle connection error
+        metrics.UPSTREAM_RESPONSES.inc("connection_error")
+        print("Error: Unable to connect to the service")
+        return EmotionResult.failure(CONNECTION_ERROR)
+    
+    except (KeyError, IndexError, ValueError) as e:
+        # Handle errors in parsing the response
+        healthy = False
+        print(f"Error: Unable to parse response - {str(e)}")
+        return EmotionResult.failure(PARSE_ERROR, str(e))
+    
+    except Exception as e:
+        # Handle any other unexpected errors
+        print(f"Unexpected error: {str(e)}")
+        return EmotionResult.failure(ERROR, str(e))
+
+    finally:
+        if healthy:
+            breaker.record_success()
+        else:
+            breaker.record_failure()
+        if limiter is not None:
+            limiter.release(time.perf_counter() - call_started, dropped=not healthy)
+
+
+class WatsonBackend(Backend):
+    """Scores texts with the remote Watson EmotionPredict service.
+
+    Args:
+        url: EmotionPredict endpoint, or None for ``URL``
+        model_id: Model requested from the endpoint
+        http_client: HTTPClient with this backend's pool, timeouts and
+            retries, or None for the shared default client
+
+    The circuit breaker and concurrency limiter guard the upstream service
+    itself, so every Watson backend shares them.
+    """
+
+    name = "watson"
+    model_id = MODEL_ID
+    remote = True
+
+    def __init__(self, url=None, model_id=MODEL_ID, http_client=None):
+        self.url = url
+        self.model_id = model_id
+        self.http_client = http_client
+
+    def analyze(self, text_to_analyse):
+        return analyze_upstream(text_to_analyse, url=self.url, model_id=self.model_id,
+                                http_client=self.http_client)
+
+    def analyze_detailed(self, text_to_analyse):
+        # EmotionPredict already reports per-span scores; no extra calls needed
+        return analyze_upstream(text_to_analyse, detailed=True, url=self.url,
+                                model_id=self.model_id, http_client=self.http_client)
@@ -0,0 +1,299 @@
+"""ASGI serving mode for the Emotion Analyzer.
+
+Serves the same routes and JSON contract as ``server.py`` (``/``,
+``/emotionDetector`` and ``/metrics``), but handlers await the non-blocking
+``emotion_detector_async`` instead of holding a thread for the whole
+upstream round trip, so one process sustains many concurrent requests.
+
+It also serves the WebSocket ``/emotionDetector/live``, which analyzes text
+as it is typed over one open connection (see ``live_analyzer``).
+
+Production launch (requires ``uvicorn``)::
+
+    python asgi_server.py --host 0.0.0.0 --port 5000 --workers 4
+
+or equivalently ``uvicorn asgi_server:app --workers 4``.  The worker count
+also defaults to the ``EMOTION_ASGI_WORKERS`` environment variable.
+"""
+
+import argparse
+import mimetypes
+import os
+import time
+from urllib.parse import parse_qs
+
+from EmotionDetection import jsoncodec, metrics
+from EmotionDetection.async_detector import close_async_pool, emotion_detector_async
+from EmotionDetection.http_caching import cache_headers, etag_matches, result_etag
+from EmotionDetection.limiter import Overloaded, configure_limiter_from_env
+
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+TEMPLATE_DIR = os.path.join(BASE_DIR, "templates")
+STATIC_DIR = os.path.join(BASE_DIR, "static")
+
+# Milliseconds a live text waits for a newer one before it is analyzed
+LIVE_DEBOUNCE_SECONDS = float(os.environ.get("EMOTION_LIVE_DEBOUNCE_MS", 150)) / 1000
+
+# Shed load the upstream cannot serve in time, as server.py does
+configure_limiter_from_env()
+
+OVERLOADED = {"error": "Service overloaded, retry later"}
+
+
+async def send_response(send, status, body, content_type, headers=()):
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", content_type.encode()),
+            (b"content-length", str(len(body)).encode()),
+            *headers,
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def send_json(send, payload, status=200, headers=()):
+    await send_response(send, status, jsoncodec.dumps(payload), "application/json", headers)
+
+
+def encode_headers(headers):
+    return [(name.lower().encode(), value.encode("latin-1")) for name, value in headers]
+
+
+def is_truthy(value):
+    return (value or "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def request_header(scope, name):
+    for key, value in scope.get("headers", ()):
+        if key.decode("latin-1").lower() == name:
+            return value.decode("latin-1")
+    return None
+
+
+async def emotion_analyzer(scope, send):
+    # Retrieve the text to analyze from the query string
+    query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+    text_to_analyze = query.get("textToAnalyze", [""])[0]
+
+    # Validate input
+    if not text_to_analyze:
+        await send_json(send, {"error": "No text provided"}, status=400)
+        return
+
+    # ?detailed=true adds per-span scores from the same upstream response
+    detailed = is_truthy(query.get("detailed", [""])[0])
+
+    # A client or CDN holding this ETag already has the result
+    etag = result_etag(text_to_analyze, detailed)
+    if etag_matches(request_header(scope, "if-none-match"), etag):
+        await send({"type": "http.response.start", "status": 304,
+                    "headers": encode_headers(cache_headers(etag))})
+        await send({"type": "http.response.body", "body": b""})
+        return
+
+    # Await the upstream call without blocking the event loop
+    try:
+        response = await emotion_detector_async(text_to_analyze, detailed=detailed)
+    except Overloaded as e:
+        await send_json(send, OVERLOADED, status=503,
+                        headers=[(b"retry-after", str(e.retry_after).encode())])
+        return
+    metrics.observe_result(response)
+    ok = response.get("dominant_emotion") is not None
+    await send_json(send, response, headers=encode_headers(cache_headers(etag, ok)))
+
+
+async def live_analyzer(scope, receive, send):
+    """Analyze text as it is typed over one WebSocket connection.
+
+    The client sends JSON messages ``{"id": 1, "textToAnalyze": "...",
+    "detailed": false}``.  A text is analyzed once no newer one arrived for
+    ``LIVE_DEBOUNCE_SECONDS``; a newer text cancels the previous one whether
+    it is still waiting or already upstream, so only the latest text of a
+    burst of keystrokes is analyzed.  Each result is pushed as the usual
+    JSON object plus the ``id`` of the message it answers.
+    """
+    import asyncio
+
+    async def push(payload):
+        await send({"type": "websocket.send", "text": jsoncodec.dumps(payload).decode()})
+
+    async def analyze(message_id, text_to_analyze, detailed):
+        await asyncio.sleep(LIVE_DEBOUNCE_SECONDS)
+        if not text_to_analyze:
+            await push({"id": message_id, "error": "No text provided"})
+            return
+        try:
+            response = await emotion_detector_async(text_to_analyze, detailed=detailed)
+        except Overloaded:
+            await push({"id": message_id, **OVERLOADED})
+            return
+        metrics.observe_result(response)
+        await push({"id": message_id, **response})
+
+    await send({"type": "websocket.accept"})
+    pending = None
+    try:
+        while True:
+            message = await receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            if message["type"] != "websocket.receive":
+                continue
+            try:
+                request = jsoncodec.loads(message.get("text") or message.get("bytes") or b"")
+                text_to_analyze = request.get("textToAnalyze")
+                detailed = request.get("detailed", False)
+                # A JSON boolean, or a string read like the HTTP routes' ?detailed=
+                detailed = detailed if isinstance(detailed, bool) else is_truthy(str(detailed))
+            except (ValueError, AttributeError):
+                await push({"error": "Invalid message"})
+                continue
+            if text_to_analyze is None:
+                text_to_analyze = ""
+            elif not isinstance(text_to_analyze, str):
+                # Answer here; inside the analysis task it would fail unanswered
+                await push({"id": request.get("id"), "error": "textToAnalyze must be a string"})
+                continue
+
+            # The newer text supersedes whatever is still waiting or in flight
+            if pending is not None:
+                pending.cancel()
+            pending = asyncio.ensure_future(analyze(request.get("id"), text_to_analyze, detailed))
+    finally:
+        if pending is not None:
+            pending.cancel()
+
+
+async def send_file(send, path):
+    try:
+        with open(path, "rb") as f:
+            body = f.read()
+    except OSError:
+        await send_response(send, 404, b"Not Found", "text/plain")
+        return
+    content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    await send_response(send, 200, body, content_type)
+
+
+async def render_index_page(scope, send):
+    await send_file(send, os.path.join(TEMPLATE_DIR, "index.html"))
+
+
+async def serve_static(scope, send):
+    # Only serve files that resolve inside the static directory
+    name = scope["path"][len("/static/"):]
+    path = os.path.realpath(os.path.join(STATIC_DIR, name))
+    if os.path.commonpath([path, os.path.realpath(STATIC_DIR)]) != os.path.realpath(STATIC_DIR):
+        await send_response(send, 404, b"Not Found", "text/plain")
+        return
+    await send_file(send, path)
+
+
+async def metrics_endpoint(scope, send):
+    await send_response(send, 200, metrics.render().encode(), metrics.CONTENT_TYPE)
+
+
+ROUTES = {
+    "/emotionDetector": emotion_analyzer,
+    "/metrics": metrics_endpoint,
+    "/": render_index_page,
+}
+
+WEBSOCKET_ROUTES = {
+    "/emotionDetector/live": live_analyzer,
+}
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            # Close the keep-alive upstream pool of this worker's event loop
+            await close_async_pool()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+def route_of(path):
+    """Route label for metrics; unknown paths share one label."""
+    if path in ROUTES:
+        return path
+    if path.startswith("/static/"):
+        return "/static/<path:filename>"
+    return "unmatched"
+
+
+async def dispatch(scope, send):
+    path = scope["path"]
+    handler = ROUTES.get(path)
+    if handler is None and path.startswith("/static/"):
+        handler = serve_static
+    if handler is None:
+        await send_response(send, 404, b"Not Found", "text/plain")
+        return
+    if scope["method"] not in ("GET", "HEAD"):
+        await send_response(send, 405, b"Method Not Allowed", "text/plain",
+                            headers=[(b"allow", b"GET, HEAD")])
+        return
+
+    await handler(scope, send)
+
+
+async def app(scope, receive, send):
+    """ASGI application entry point."""
+    if scope["type"] == "lifespan":
+        await lifespan(receive, send)
+        return
+    if scope["type"] == "websocket":
+        handler = WEBSOCKET_ROUTES.get(scope["path"])
+        if handler is None:
+            # Closing before accepting rejects the handshake with a 403
+            await send({"type": "websocket.close"})
+            return
+        await handler(scope, receive, send)
+        return
+    if scope["type"] != "http":
+        return
+
+    started = time.perf_counter()
+    statuses = []
+
+    async def send_and_record(message):
+        if message["type"] == "http.response.start":
+            statuses.append(message["status"])
+        await send(message)
+
+    metrics.HTTP_IN_FLIGHT.inc()
+    try:
+        await dispatch(scope, send_and_record)
+    finally:
+        metrics.HTTP_IN_FLIGHT.dec()
+        route = route_of(scope["path"])
+        metrics.HTTP_REQUESTS.inc(route, str(statuses[0] if statuses else 500))
+        if route == "/emotionDetector":
+            metrics.REQUEST_PHASES.observe(time.perf_counter() - started, "total")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the Emotion Analyzer over ASGI")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--workers", type=int,
+                        default=int(os.environ.get("EMOTION_ASGI_WORKERS", 1)),
+                        help="number of worker processes (default: EMOTION_ASGI_WORKERS or 1)")
+    args = parser.parse_args(argv)
+
+    import uvicorn
+
+    uvicorn.run("asgi_server:app", host=args.host, port=args.port, workers=args.workers,
+                app_dir=BASE_DIR)
+
+
+if __name__ == "__main__":
+    main()
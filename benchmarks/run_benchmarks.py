@@ -0,0 +1,368 @@
+"""Latency and throughput benchmarks against a local EmotionPredict stand-in.
+
+Starts ``StubWatsonServer``, points the Watson backend at it and measures
+p50/p95/p99 latency and requests per second for:
+
+* ``emotion_detector`` called sequentially, plain and with hedged requests
+* the Flask ``/emotionDetector`` route (sequential and threaded clients)
+* ``emotion_detector_batch`` with a worker pool
+* ``emotion_detector_async`` with many requests in flight
+* ``emotion_detector_batch`` on the local lexicon backend (no network)
+* decoding an EmotionPredict body and encoding the result, with the
+  standard library (the old path) and with ``EmotionDetection.jsoncodec``
+
+The report also records how long a fresh interpreter takes to import the
+package, the ``emotion_detector`` entry point and the Flask server.
+
+Every scenario starts with a fresh circuit breaker and upstream limiter, so
+one that opened the breaker (with ``--error-rate``) cannot fail the next
+ones fast.  Calls the breaker rejected are counted in ``breaker_rejections``
+besides ``errors``; ``--no-breaker`` and ``--no-limiter`` take either out of
+the measurement.
+
+Results are written as JSON so runs can be diffed between versions::
+
+    python -m benchmarks.run_benchmarks --requests 500 --latency 0.02 -o bench.json
+    python -m benchmarks.run_benchmarks -o new.json --baseline bench.json
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from contextlib import ExitStack
+from datetime import datetime, timezone
+from unittest import mock
+
+from EmotionDetection import async_detector, circuit_breaker, jsoncodec, limiter, watson
+from EmotionDetection.async_detector import close_async_pool, emotion_detector_async
+from EmotionDetection.backends import get_backend, set_backend
+from EmotionDetection.batch import emotion_detector_batch
+from EmotionDetection.cache import get_cache, set_cache
+from EmotionDetection.emotion_detection import emotion_detector
+from EmotionDetection.result import EmotionResult
+
+from benchmarks.stub_server import StubWatsonServer, make_prediction
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies, elapsed, errors):
+    """Latency percentiles (milliseconds) and throughput for one scenario."""
+    ordered = sorted(latencies)
+    to_ms = lambda seconds: None if seconds is None else round(seconds * 1000, 3)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 4),
+        "requests_per_s": round(len(latencies) / elapsed, 2) if elapsed else None,
+        "mean_ms": to_ms(sum(ordered) / len(ordered)) if ordered else None,
+        "p50_ms": to_ms(percentile(ordered, 0.50)),
+        "p95_ms": to_ms(percentile(ordered, 0.95)),
+        "p99_ms": to_ms(percentile(ordered, 0.99)),
+    }
+
+
+def texts_for(scenario, count):
+    # Unique texts so neither a cache nor request coalescing can short-circuit calls
+    return [f"{scenario} benchmark text number {i}: I love my life" for i in range(count)]
+
+
+def timed(fn, latencies, lock):
+    def wrapper(text):
+        started = time.perf_counter()
+        result = fn(text)
+        with lock:
+            latencies.append(time.perf_counter() - started)
+        return result
+    return wrapper
+
+
+def bench_emotion_detector(count, hedge=False, **_):
+    latencies = []
+    errors = 0
+    started = time.perf_counter()
+    for text in texts_for("hedged" if hedge else "sequential", count):
+        call_started = time.perf_counter()
+        result = emotion_detector(text, hedge=hedge)
+        latencies.append(time.perf_counter() - call_started)
+        errors += result["dominant_emotion"] is None
+    return summarize(latencies, time.perf_counter() - started, errors)
+
+
+def bench_flask_route(count, concurrency=1, **_):
+    from server import app
+
+    texts = texts_for(f"flask-{concurrency}", count)
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+
+    def worker(chunk):
+        client = app.test_client()
+        for text in chunk:
+            call_started = time.perf_counter()
+            response = client.get("/emotionDetector", query_string={"textToAnalyze": text})
+            elapsed = time.perf_counter() - call_started
+            failed = response.status_code != 200 or response.get_json()["dominant_emotion"] is None
+            with lock:
+                latencies.append(elapsed)
+                errors[0] += failed
+
+    chunks = [texts[i::concurrency] for i in range(concurrency)]
+    threads = [threading.Thread(target=worker, args=(chunk,)) for chunk in chunks]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(latencies, time.perf_counter() - started, errors[0])
+
+
+def bench_batch(count, concurrency=8, **_):
+    latencies = []
+    lock = threading.Lock()
+    detector = timed(emotion_detector, latencies, lock)
+    started = time.perf_counter()
+    results = emotion_detector_batch(texts_for("batch", count), concurrency, detector)
+    elapsed = time.perf_counter() - started
+    return summarize(latencies, elapsed, sum(r["dominant_emotion"] is None for r in results))
+
+
+def bench_async(count, concurrency=64, **_):
+    async def run():
+        latencies = []
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one(text):
+            async with semaphore:
+                call_started = time.perf_counter()
+                result = await emotion_detector_async(text)
+                latencies.append(time.perf_counter() - call_started)
+                return result
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(one(text) for text in texts_for("async", count)))
+        elapsed = time.perf_counter() - started
+        await close_async_pool()
+        return summarize(latencies, elapsed, sum(r["dominant_emotion"] is None for r in results))
+
+    return asyncio.run(run())
+
+
+def bench_local_batch(count, **_):
+    previous = get_backend()
+    set_backend("local")
+    try:
+        started = time.perf_counter()
+        results = emotion_detector_batch(texts_for("local", count))
+        elapsed = time.perf_counter() - started
+    finally:
+        set_backend(previous)
+    # Only whole-batch time is meaningful for vectorized scoring
+    summary = summarize([], elapsed, sum(r["dominant_emotion"] is None for r in results))
+    summary["requests"] = count
+    summary["requests_per_s"] = round(count / elapsed, 2) if elapsed else None
+    return summary
+
+
+def _codec_stdlib(body):
+    # What every response went through before: decode to text, parse the
+    # whole body, then re-encode the result the way jsonify does
+    emotions = json.loads(body.decode())['emotionPredictions'][0]['emotion']
+    return json.dumps(EmotionResult.from_scores(emotions).to_dict(), sort_keys=True).encode()
+
+
+def _codec_fast(body):
+    return jsoncodec.dumps(watson.parse_emotions(body).to_dict())
+
+
+def bench_codec(count, mentions=1, fast=True, **_):
+    rng = random.Random(0)
+    bodies = [json.dumps(make_prediction(text, mentions, rng)).encode()
+              for text in texts_for("codec", count)]
+    codec = _codec_fast if fast else _codec_stdlib
+    started = time.perf_counter()
+    for body in bodies:
+        codec(body)
+    elapsed = time.perf_counter() - started
+    # Single calls take microseconds; only whole-run throughput is meaningful
+    summary = summarize([], elapsed, 0)
+    summary["requests"] = count
+    summary["requests_per_s"] = round(count / elapsed, 2) if elapsed else None
+    return summary
+
+
+def scenarios(args):
+    """Yield ``(name, function, kwargs)`` for every benchmark to run."""
+    yield "emotion_detector", bench_emotion_detector, {}
+    yield "emotion_detector_hedged", bench_emotion_detector, {"hedge": True}
+    yield "flask_route", bench_flask_route, {"concurrency": 1}
+    yield f"flask_route_{args.concurrency}_threads", bench_flask_route, {"concurrency": args.concurrency}
+    yield f"batch_{args.concurrency}_workers", bench_batch, {"concurrency": args.concurrency}
+    yield f"async_{args.async_concurrency}_in_flight", bench_async, {"concurrency": args.async_concurrency}
+    yield "local_backend_batch", bench_local_batch, {}
+    yield "codec_stdlib", bench_codec, {"mentions": args.mentions, "fast": False}
+    yield "codec_fast", bench_codec, {"mentions": args.mentions}
+
+
+IMPORT_STATEMENTS = {
+    "EmotionDetection": "import EmotionDetection",
+    "emotion_detector": "from EmotionDetection import emotion_detector",
+    "server": "import server",
+}
+
+
+def measure_import_ms(statement, repeat=5):
+    """Best time, in milliseconds, to run an import in a fresh interpreter."""
+    code = ("import time\nstarted = time.perf_counter()\n" + statement +
+            "\nprint((time.perf_counter() - started) * 1000)")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    timings = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", code], cwd=root, check=True,
+                                capture_output=True, text=True).stdout
+        timings.append(float(output))
+    return round(min(timings), 2)
+
+
+def breaker_options(args):
+    """Keyword arguments for ``configure_circuit_breaker`` from the command line."""
+    if not args.breaker:
+        # Never evaluated, so it never opens
+        return {"failure_rate_threshold": 1.0, "minimum_calls": sys.maxsize}
+    return {"failure_rate_threshold": args.breaker_failure_rate,
+            "minimum_calls": args.breaker_min_calls}
+
+
+def run_scenario(args, bench, kwargs):
+    """Run one scenario with a fresh breaker and limiter."""
+    breaker = circuit_breaker.configure_circuit_breaker(**breaker_options(args))
+    limiter.configure_limiter(enabled=args.limiter)
+    result = bench(args.requests, **kwargs)
+    result["breaker_rejections"] = breaker.stats()["rejected"]
+    return result
+
+
+def run_benchmarks(args):
+    """Run every scenario against a fresh stub server and return the report."""
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "config": {
+            "requests": args.requests,
+            "latency_s": args.latency,
+            "jitter_s": args.jitter,
+            "error_rate": args.error_rate,
+            "mentions": args.mentions,
+            "slow_rate": args.slow_rate,
+            "slow_latency_s": args.slow_latency,
+            "concurrency": args.concurrency,
+            "async_concurrency": args.async_concurrency,
+            "breaker": breaker_options(args) if args.breaker else None,
+            "limiter": args.limiter,
+        },
+        "results": {},
+        "import_ms": {name: measure_import_ms(statement)
+                      for name, statement in IMPORT_STATEMENTS.items()},
+    }
+
+    previous_cache = get_cache()
+    server = StubWatsonServer(args.latency, args.jitter, args.error_rate, args.mentions, seed=0,
+                              slow_rate=args.slow_rate, slow_latency=args.slow_latency)
+    with server, ExitStack() as stack:
+        # Point the Watson backend (sync and async) at the stand-in
+        stack.enter_context(mock.patch.object(watson, "URL", server.url))
+        stack.enter_context(mock.patch.object(async_detector, "URL", server.url))
+        # Scenarios replace the process-wide breaker and limiter; put them back after
+        stack.enter_context(mock.patch.object(circuit_breaker, "_default_breaker", None))
+        stack.enter_context(mock.patch.object(limiter, "_default_limiter", None))
+        set_cache(None)
+        try:
+            for name, bench, kwargs in scenarios(args):
+                print(f"Running {name} ...", file=sys.stderr)
+                report["results"][name] = run_scenario(args, bench, kwargs)
+        finally:
+            set_cache(previous_cache)
+        report["meta"]["stub_requests_served"] = server.requests_served
+
+    return report
+
+
+def compare(report, baseline):
+    """Print the change of throughput and p99 against a baseline report."""
+    for name, result in report["results"].items():
+        old = baseline.get("results", {}).get(name)
+        if not old:
+            continue
+        parts = []
+        for key in ("requests_per_s", "p99_ms"):
+            if result.get(key) and old.get(key):
+                change = (result[key] - old[key]) / old[key]
+                parts.append(f"{key} {old[key]} -> {result[key]} ({change:+.1%})")
+        print(f"{name}: " + ", ".join(parts))
+    for name, milliseconds in report.get("import_ms", {}).items():
+        old = baseline.get("import_ms", {}).get(name)
+        if old:
+            print(f"import {name}: {old} -> {milliseconds} ms ({(milliseconds - old) / old:+.1%})")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Benchmark emotion detection against a local stub")
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario")
+    parser.add_argument("--latency", type=float, default=0.01, help="stub latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random stub latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of stub 500 responses")
+    parser.add_argument("--mentions", type=int, default=1, help="emotionMentions per stub response")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="fraction of straggler responses")
+    parser.add_argument("--slow-latency", type=float, default=0.0, help="extra seconds for stragglers")
+    parser.add_argument("--concurrency", type=int, default=8, help="threads for batch and Flask scenarios")
+    parser.add_argument("--async-concurrency", type=int, default=64, help="in-flight async requests")
+    parser.add_argument("--no-breaker", dest="breaker", action="store_false",
+                        help="never let the circuit breaker open")
+    parser.add_argument("--breaker-failure-rate", type=float,
+                        default=circuit_breaker.DEFAULT_FAILURE_RATE,
+                        help="failure share that opens the circuit breaker")
+    parser.add_argument("--breaker-min-calls", type=int, default=circuit_breaker.DEFAULT_MINIMUM_CALLS,
+                        help="calls before the breaker evaluates the failure rate")
+    parser.add_argument("--no-limiter", dest="limiter", action="store_false",
+                        help="do not limit concurrent upstream calls")
+    parser.add_argument("-o", "--output", help="write the JSON report here (default: stdout)")
+    parser.add_argument("--baseline", help="earlier JSON report to compare against")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    report = run_benchmarks(args)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            compare(report, json.load(f))
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""Local stand-in for the Watson EmotionPredict service.
+
+Answers ``POST`` requests with a response shaped like the real service
+(``emotionPredictions`` with an aggregate ``emotion`` and a list of
+``emotionMentions``) over HTTP/1.1 keep-alive.  Latency, error rate and
+payload size are configurable so benchmarks can model a slow or flaky
+upstream::
+
+    python -m benchmarks.stub_server --port 8081 --latency 0.05 --error-rate 0.01
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+EMOTIONS = ("anger", "disgust", "fear", "joy", "sadness")
+
+
+def make_prediction(text, mentions, rng):
+    """Build an EmotionPredict response body for ``text``."""
+    emotion = {name: round(rng.random() * 0.1, 6) for name in EMOTIONS}
+    emotion[rng.choice(EMOTIONS)] = round(0.5 + rng.random() * 0.5, 6)
+    return {
+        "emotionPredictions": [{
+            "emotion": emotion,
+            "target": "",
+            "emotionMentions": [
+                {
+                    "span": {"begin": 0, "end": len(text), "text": text},
+                    "emotion": dict(emotion),
+                }
+                for _ in range(mentions)
+            ],
+        }],
+        "producerId": {"name": "Ensemble Aggregated Emotion Workflow", "version": "0.0.1"},
+    }
+
+
+class StubHandler(BaseHTTPRequestHandler):
+
+    protocol_version = "HTTP/1.1"
+    # Send headers and body in one segment; otherwise Nagle plus delayed ACKs
+    # add ~40ms to every keep-alive response and swamp the modeled latency
+    disable_nagle_algorithm = True
+    wbufsize = -1
+
+    def do_POST(self):
+        server = self.server
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            text = json.loads(self.rfile.read(length))["raw_document"]["text"]
+        except (ValueError, KeyError, TypeError):
+            self.reply(400, {"error": "Invalid payload"})
+            return
+
+        with server.lock:
+            server.requests_served += 1
+            fail = server.rng.random() < server.error_rate
+            delay = server.latency + server.rng.random() * server.jitter
+            if server.rng.random() < server.slow_rate:
+                delay += server.slow_latency
+            body = None if fail else make_prediction(text, server.mentions, server.rng)
+
+        if delay:
+            time.sleep(delay)
+        if fail:
+            self.reply(500, {"error": "Internal Server Error"})
+        else:
+            self.reply(200, body)
+
+    def reply(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubWatsonServer(ThreadingHTTPServer):
+    """EmotionPredict stand-in running in a background thread.
+
+    Args:
+        latency: Seconds added to every response
+        jitter: Extra random latency, uniform in [0, jitter) seconds
+        error_rate: Fraction of requests answered with a 500
+        slow_rate: Fraction of requests delayed by another ``slow_latency``
+            seconds, modeling an occasional straggler
+        slow_latency: Extra seconds added to slow requests
+        mentions: Number of ``emotionMentions`` entries per response,
+            which controls the payload size
+        host: Interface to bind
+        port: Port to bind, 0 picks a free one
+        seed: Seed for the latency, error and score generator
+    """
+
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, mentions=1,
+                 host="127.0.0.1", port=0, seed=None, slow_rate=0.0, slow_latency=0.0):
+        super().__init__((host, port), StubHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.mentions = mentions
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests_served = 0
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1/watson.runtime.nlp.v1/NlpService/EmotionPredict"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, args=(0.05,), daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a local EmotionPredict stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--mentions", type=int, default=1)
+    parser.add_argument("--slow-rate", type=float, default=0.0)
+    parser.add_argument("--slow-latency", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    server = StubWatsonServer(args.latency, args.jitter, args.error_rate, args.mentions,
+                              args.host, args.port, slow_rate=args.slow_rate,
+                              slow_latency=args.slow_latency)
+    print(f"Serving EmotionPredict stand-in at {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,77 @@
-from flask import Flask, render_template, request, jsonify
-from EmotionDetection.emotion_detection_latest import emotion_detector
+import os
+import time
+
+from flask import Flask, Response, g, render_template, request, jsonify
+from flask.json.provider import DefaultJSONProvider
+from EmotionDetection.batch import iter_emotion_detector_completed
+from EmotionDetection.dispatcher import emotion_detector_dispatched
+from EmotionDetection.http_caching import cache_headers, etag_matches, result_etag
+from EmotionDetection.limiter import Overloaded, configure_limiter_from_env
+from EmotionDetection import jsoncodec, metrics
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that encodes with EmotionDetection.jsoncodec.
+
+    Responses are compact and keep key order; ``jsonify`` writes the
+    encoder's bytes straight into the response.
+    """
+
+    def dumps(self, obj, **kwargs):
+        return jsoncodec.dumps(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return jsoncodec.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(jsoncodec.dumps(obj) + b"\n", mimetype=self.mimetype)
+
 
 app = Flask("Emotion Analyzer")
+app.json = FastJSONProvider(app)
+
+# The server sheds load it cannot serve in time (503 + Retry-After); library
+# callers in other processes keep waiting instead
+configure_limiter_from_env()
+
+# Limits for POST /emotionDetector/batch
+BATCH_MAX_ITEMS = int(os.environ.get("EMOTION_BATCH_MAX_ITEMS", 10000))
+BATCH_MAX_CONCURRENCY = int(os.environ.get("EMOTION_BATCH_MAX_CONCURRENCY", 16))
+
+
+@app.before_request
+def start_request_metrics():
+    g.metrics_started = time.perf_counter()
+    metrics.HTTP_IN_FLIGHT.inc()
+
+
+@app.after_request
+def record_request_metrics(response):
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    metrics.HTTP_REQUESTS.inc(route, str(response.status_code))
+    if request.endpoint == "emotion_analyzer":
+        metrics.REQUEST_PHASES.observe(time.perf_counter() - g.metrics_started, "total")
+    return response
+
+
+@app.teardown_request
+def finish_request_metrics(error=None):
+    # Runs even when a handler raised, so the gauge cannot drift upwards
+    if "metrics_started" in g:
+        metrics.HTTP_IN_FLIGHT.dec()
+
+@app.errorhandler(Overloaded)
+def shed_load(error):
+    # Answer at once instead of queueing behind a saturated upstream
+    response = jsonify({"error": "Service overloaded, retry later"})
+    response.headers["Retry-After"] = str(error.retry_after)
+    return response, 503
+
+
+def is_truthy(value):
+    return (value or "").strip().lower() in ("1", "true", "yes", "on")
+
 
 @app.route("/emotionDetector")
 def emotion_analyzer():
@@ -12,11 +82,87 @@ def emotion_analyzer():
     if not text_to_analyze:
         return jsonify({"error": "No text provided"}), 400
     
-    # Pass the text to the emotion_detector function and store the response
-    response = emotion_detector(text_to_analyze)
+    # ?detailed=true adds per-span scores from the same upstream response
+    detailed = is_truthy(request.args.get('detailed'))
+
+    # The result is a pure function of the text and model: a client or CDN
+    # holding this ETag already has it, so skip the analysis entirely
+    etag = result_etag(text_to_analyze, detailed)
+    if etag_matches(request.headers.get('If-None-Match'), etag):
+        return Response(status=304, headers=cache_headers(etag))
+
+    # Pass the text to the emotion_detector function and store the response;
+    # concurrent requests are micro-batched when EMOTION_MICROBATCH enables it
+    response = emotion_detector_dispatched(text_to_analyze, detailed=detailed)
+    metrics.observe_result(response)
     
     # Return the response as JSON
-    return jsonify(response)
+    ok = response.get('dominant_emotion') is not None
+    return jsonify(response), 200, cache_headers(etag, ok)
+
+
+def parse_batch_items(body, content_type):
+    """Parse a batch request body into a list of ``(item_id, text)`` pairs.
+
+    The body (bytes or text) is either a JSON array or newline-delimited
+    JSON (one value per line).  Each value is a string, or an object with ``text`` and an
+    optional ``id``; items without an id are numbered by position.
+
+    Raises ValueError when the body or an item is malformed.
+    """
+    if content_type == "application/x-ndjson":
+        values = [jsoncodec.loads(line) for line in body.splitlines() if line.strip()]
+    else:
+        values = jsoncodec.loads(body)
+        if not isinstance(values, list):
+            raise ValueError("Expected a JSON array of texts")
+
+    items = []
+    for index, value in enumerate(values):
+        if isinstance(value, str):
+            items.append((index, value))
+        elif isinstance(value, dict) and isinstance(value.get("text"), str):
+            items.append((value.get("id", index), value["text"]))
+        else:
+            raise ValueError(f"Item {index} must be a string or an object with a 'text' string")
+    return items
+
+
+@app.route("/emotionDetector/batch", methods=["POST"])
+def emotion_analyzer_batch():
+    # Parse and validate the whole body before any results are streamed
+    try:
+        items = parse_batch_items(request.get_data(), request.mimetype)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    if not items:
+        return jsonify({"error": "No text provided"}), 400
+    if len(items) > BATCH_MAX_ITEMS:
+        return jsonify({"error": f"At most {BATCH_MAX_ITEMS} texts per batch"}), 413
+
+    max_concurrency = min(request.args.get('concurrency', BATCH_MAX_CONCURRENCY, type=int),
+                          BATCH_MAX_CONCURRENCY)
+    max_concurrency = max(max_concurrency, 1)
+
+    # Stream one NDJSON line per text as soon as its analysis completes
+    def generate():
+        try:
+            for item_id, result in iter_emotion_detector_completed(items, max_concurrency):
+                metrics.observe_result(result)
+                yield jsoncodec.dumps({"id": item_id, **result}) + b"\n"
+        except Overloaded as e:
+            # The status line is already sent; end with an error line so the
+            # client retries the ids it did not get instead of taking them as done
+            yield jsoncodec.dumps({"error": "Service overloaded, retry later",
+                                   "retry_after": e.retry_after}) + b"\n"
+
+    return Response(generate(), mimetype="application/x-ndjson")
+
+
+@app.route("/metrics")
+def metrics_endpoint():
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
 
 
 @app.route("/")
@@ -25,4 +171,4 @@ def render_index_page():
 
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=5000)
\ No newline at end of file
+    app.run(host="0.0.0.0", port=5000)
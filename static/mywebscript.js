@@ -1,12 +1,84 @@
+// Open WebSocket to /emotionDetector/live, or null when the server has none
+// (the Flask development server) and every analysis goes through XHR
+let liveSocket = null;
+let liveRequestId = 0;
+
+let ShowResult = (text) => {
+    document.getElementById("system_response").innerHTML = text;
+}
+
+let ShowError = (message) => {
+    // Plain text, so a message can never inject markup
+    document.getElementById("system_response").textContent = "Error: " + message;
+}
+
+let ConnectLive = () => {
+    if (!("WebSocket" in window)) {
+        return;
+    }
+    let scheme = window.location.protocol == "https:" ? "wss://" : "ws://";
+    let socket = new WebSocket(scheme + window.location.host + "/emotionDetector/live");
+    socket.onopen = () => { liveSocket = socket; };
+    socket.onclose = () => { liveSocket = null; };
+    socket.onmessage = (event) => {
+        let result = JSON.parse(event.data);
+        // Answers to texts that were typed over since are stale
+        if (result.id != liveRequestId) {
+            return;
+        }
+        delete result.id;
+        if (result.error) {
+            // Tells "nothing typed" apart from "overloaded, retry later"
+            ShowError(result.error);
+        } else {
+            ShowResult(JSON.stringify(result));
+        }
+    };
+}
+
+let AnalyzeLive = () => {
+    liveRequestId += 1;
+    liveSocket.send(JSON.stringify({
+        id: liveRequestId,
+        textToAnalyze: document.getElementById("textToAnalyze").value,
+    }));
+}
+
+let AnalyzeAsYouType = () => {
+    // The server debounces and drops superseded texts, so send every change
+    if (liveSocket !== null) {
+        AnalyzeLive();
+    }
+}
+
 let RunSentimentAnalysis = ()=>{
+    if (liveSocket !== null) {
+        AnalyzeLive();
+        return;
+    }
+
     textToAnalyze = document.getElementById("textToAnalyze").value;
 
     let xhttp = new XMLHttpRequest();
     xhttp.onreadystatechange = function() {
-        if (this.readyState == 4 && this.status == 200) {
-            document.getElementById("system_response").innerHTML = xhttp.responseText;
+        if (this.readyState != 4) {
+            return;
+        }
+        if (this.status == 200) {
+            ShowResult(xhttp.responseText);
+            return;
+        }
+        try {
+            ShowError(JSON.parse(xhttp.responseText).error);
+        } catch (e) {
+            ShowError("HTTP " + this.status);
         }
     };
-    xhttp.open("GET", "emotionDetector?textToAnalyze"+"="+textToAnalyze, true);
+    xhttp.open("GET", "emotionDetector?textToAnalyze"+"="+encodeURIComponent(textToAnalyze), true);
     xhttp.send();
 }
+
+window.addEventListener("load", () => {
+    ConnectLive();
+    document.getElementById("textToAnalyze").addEventListener("input", AnalyzeAsYouType);
+});
@@ -0,0 +1,198 @@
+import unittest
+from unittest.mock import patch, AsyncMock
+import asyncio
+import json
+
+import asgi_server
+
+
+JOY_RESULT = {'anger': 0.01, 'disgust': 0.01, 'fear': 0.01, 'joy': 0.9, 'sadness': 0.07,
+              'dominant_emotion': 'joy'}
+
+
+async def call(path, query_string=b"", method="GET", headers=()):
+    """Run one HTTP request through the ASGI app and collect the response"""
+    scope = {"type": "http", "method": method, "path": path, "query_string": query_string,
+             "headers": list(headers)}
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    await asgi_server.app(scope, receive, send)
+    start = messages[0]
+    body = b"".join(m.get("body", b"") for m in messages[1:])
+    return start["status"], dict(start["headers"]), body
+
+
+class TestASGIServer(unittest.IsolatedAsyncioTestCase):
+
+    async def test_emotion_detector_route(self):
+        with patch("asgi_server.emotion_detector_async", AsyncMock(return_value=JOY_RESULT)) as mock:
+            status, headers, body = await call("/emotionDetector", b"textToAnalyze=I%20love%20my%20life")
+
+        self.assertEqual(status, 200)
+        self.assertEqual(headers[b"content-type"], b"application/json")
+        self.assertEqual(json.loads(body), JOY_RESULT)
+        mock.assert_awaited_once_with("I love my life", detailed=False)
+
+    async def test_empty_input(self):
+        status, _, body = await call("/emotionDetector", b"textToAnalyze=")
+
+        self.assertEqual(status, 400)
+        self.assertIn('error', json.loads(body))
+
+    async def test_no_input(self):
+        status, _, _ = await call("/emotionDetector")
+        self.assertEqual(status, 400)
+
+    async def test_index_page(self):
+        status, headers, body = await call("/")
+
+        self.assertEqual(status, 200)
+        self.assertEqual(headers[b"content-type"], b"text/html")
+        self.assertIn(b"Emotion Detection", body)
+
+    async def test_static_file(self):
+        status, _, body = await call("/static/mywebscript.js")
+
+        self.assertEqual(status, 200)
+        self.assertIn(b"RunSentimentAnalysis", body)
+
+    async def test_static_path_traversal(self):
+        status, _, _ = await call("/static/../server.py")
+        self.assertEqual(status, 404)
+
+    async def test_unknown_route(self):
+        status, _, _ = await call("/nope")
+        self.assertEqual(status, 404)
+
+    async def test_wrong_method(self):
+        status, _, _ = await call("/emotionDetector", method="POST")
+        self.assertEqual(status, 405)
+
+    async def test_lifespan(self):
+        messages = [{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message["type"])
+
+        await asgi_server.app({"type": "lifespan"}, receive, send)
+
+        self.assertEqual(sent, ["lifespan.startup.complete", "lifespan.shutdown.complete"])
+
+
+class LiveConnection:
+    """Drive one WebSocket connection through the ASGI app"""
+
+    def __init__(self, path="/emotionDetector/live"):
+        self.incoming = asyncio.Queue()
+        self.sent = []
+        scope = {"type": "websocket", "path": path, "query_string": b""}
+        self.task = asyncio.ensure_future(asgi_server.app(scope, self.incoming.get, self.send))
+
+    async def send(self, message):
+        self.sent.append(message)
+
+    def type(self, message):
+        text = message if isinstance(message, str) else json.dumps(message)
+        self.incoming.put_nowait({"type": "websocket.receive", "text": text})
+
+    async def close(self):
+        self.incoming.put_nowait({"type": "websocket.disconnect", "code": 1000})
+        await self.task
+
+    def pushed(self):
+        return [json.loads(m["text"]) for m in self.sent if m["type"] == "websocket.send"]
+
+
+class TestLiveEndpoint(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        patcher = patch("asgi_server.LIVE_DEBOUNCE_SECONDS", 0.02)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_only_latest_text_of_a_burst_is_analyzed(self):
+        with patch("asgi_server.emotion_detector_async", AsyncMock(return_value=JOY_RESULT)) as mock:
+            connection = LiveConnection()
+            for message_id, text in enumerate(["I", "I lo", "I love"], 1):
+                connection.type({"id": message_id, "textToAnalyze": text})
+            await asyncio.sleep(0.1)
+            await connection.close()
+
+        self.assertEqual(connection.sent[0]["type"], "websocket.accept")
+        mock.assert_awaited_once_with("I love", detailed=False)
+        self.assertEqual(connection.pushed(), [{"id": 3, **JOY_RESULT}])
+
+    async def test_newer_text_cancels_request_in_flight(self):
+        calls = []
+
+        async def slow(text, detailed=False):
+            calls.append(text)
+            await asyncio.sleep(0.1)
+            return JOY_RESULT
+
+        with patch("asgi_server.emotion_detector_async", slow):
+            connection = LiveConnection()
+            connection.type({"id": 1, "textToAnalyze": "I love"})
+            await asyncio.sleep(0.05)
+            connection.type({"id": 2, "textToAnalyze": "I love my life"})
+            await asyncio.sleep(0.2)
+            await connection.close()
+
+        self.assertEqual(calls, ["I love", "I love my life"])
+        self.assertEqual([result["id"] for result in connection.pushed()], [2])
+
+    async def test_bad_messages(self):
+        connection = LiveConnection()
+        connection.type("not json")
+        connection.type({"id": 1, "textToAnalyze": ""})
+        await asyncio.sleep(0.05)
+        await connection.close()
+
+        self.assertEqual(connection.pushed(), [{"error": "Invalid message"},
+                                               {"id": 1, "error": "No text provided"}])
+
+    async def test_detailed_flag(self):
+        flags = [False, True, "false", "true", "0", None]
+        with patch("asgi_server.emotion_detector_async", AsyncMock(return_value=JOY_RESULT)) as mock:
+            connection = LiveConnection()
+            for message_id, flag in enumerate(flags, 1):
+                connection.type({"id": message_id, "textToAnalyze": "I love", "detailed": flag})
+                await asyncio.sleep(0.05)
+            await connection.close()
+
+        self.assertEqual([call.kwargs["detailed"] for call in mock.await_args_list],
+                         [False, True, False, True, False, False])
+
+    async def test_non_string_text_is_answered(self):
+        with patch("asgi_server.emotion_detector_async", AsyncMock(return_value=JOY_RESULT)) as mock:
+            connection = LiveConnection()
+            connection.type({"id": 1, "textToAnalyze": 123})
+            connection.type({"id": 2, "textToAnalyze": ["I love"]})
+            await asyncio.sleep(0.05)
+            await connection.close()
+
+        mock.assert_not_awaited()
+        self.assertEqual(connection.pushed(), [
+            {"id": 1, "error": "textToAnalyze must be a string"},
+            {"id": 2, "error": "textToAnalyze must be a string"},
+        ])
+
+    async def test_unknown_websocket_path(self):
+        connection = LiveConnection("/nope")
+        await connection.task
+
+        self.assertEqual(connection.sent, [{"type": "websocket.close"}])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import unittest
+from unittest.mock import patch
+import io
+import json
+import os
+import tempfile
+
+from EmotionDetection import circuit_breaker, limiter, watson
+from EmotionDetection.cache import set_cache
+from EmotionDetection.emotion_detection import emotion_detector
+from benchmarks.run_benchmarks import build_parser, main, percentile, run_scenario, summarize
+from benchmarks.stub_server import StubWatsonServer
+
+
+class TestStubWatsonServer(unittest.TestCase):
+
+    def setUp(self):
+        set_cache(None)
+        self.addCleanup(set_cache, None)
+
+    def test_mimics_emotion_predict(self):
+        with StubWatsonServer(mentions=3, seed=1) as server, \
+                patch.object(watson, "URL", server.url):
+            result = emotion_detector("I love my life")
+
+        self.assertIsNotNone(result['dominant_emotion'])
+        self.assertEqual(server.requests_served, 1)
+
+    def test_error_rate(self):
+        with StubWatsonServer(error_rate=1.0) as server, \
+                patch.object(watson, "URL", server.url):
+            result = emotion_detector("I love my life")
+
+        self.assertIsNone(result['dominant_emotion'])
+
+
+class TestBenchmarkSuite(unittest.TestCase):
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 0.50), 50)
+        self.assertEqual(percentile(values, 0.99), 99)
+        self.assertIsNone(percentile([], 0.5))
+
+    def test_summarize(self):
+        summary = summarize([0.01, 0.02, 0.03, 0.04], elapsed=0.5, errors=1)
+
+        self.assertEqual(summary["requests"], 4)
+        self.assertEqual(summary["requests_per_s"], 8.0)
+        self.assertEqual(summary["p50_ms"], 20.0)
+        self.assertEqual(summary["errors"], 1)
+
+    def setUp(self):
+        # Scenarios replace the process-wide breaker and limiter
+        for module, attribute in ((circuit_breaker, "_default_breaker"), (limiter, "_default_limiter")):
+            self.addCleanup(setattr, module, attribute, getattr(module, attribute))
+
+    def test_each_scenario_gets_a_fresh_breaker(self):
+        args = build_parser().parse_args(["--requests", "20"])
+
+        def failing(count, **_):
+            breaker = circuit_breaker.default_circuit_breaker()
+            for _ in range(count):
+                if breaker.allow_request():
+                    breaker.record_failure()
+            return summarize([], 1.0, count)
+
+        first = run_scenario(args, failing, {})
+        second = run_scenario(args, failing, {})
+
+        self.assertEqual(first["breaker_rejections"], 10)
+        self.assertEqual(second["breaker_rejections"], 10)
+
+    def test_breaker_and_limiter_can_be_disabled(self):
+        args = build_parser().parse_args(["--requests", "20", "--no-breaker", "--no-limiter"])
+
+        def failing(count, **_):
+            breaker = circuit_breaker.default_circuit_breaker()
+            allowed = sum(breaker.allow_request() for _ in range(count))
+            for _ in range(count):
+                breaker.record_failure()
+            self.assertIsNone(limiter.default_limiter())
+            return summarize([], 1.0, count - allowed)
+
+        result = run_scenario(args, failing, {})
+
+        self.assertEqual(result["breaker_rejections"], 0)
+        self.assertEqual(circuit_breaker.default_circuit_breaker().state, circuit_breaker.CLOSED)
+
+    def test_report_is_machine_readable(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, "bench.json")
+            with patch("sys.stderr", io.StringIO()):
+                main(["--requests", "5", "--latency", "0", "--concurrency", "2",
+                      "--async-concurrency", "2", "-o", output])
+            with open(output) as f:
+                report = json.load(f)
+
+        self.assertEqual(set(report), {"meta", "config", "results", "import_ms"})
+        self.assertEqual(set(report["import_ms"]), {"EmotionDetection", "emotion_detector", "server"})
+        self.assertIn("emotion_detector", report["results"])
+        self.assertIn("async_2_in_flight", report["results"])
+        for name, result in report["results"].items():
+            with self.subTest(scenario=name):
+                self.assertEqual(result["requests"], 5)
+                self.assertEqual(result["errors"], 0)
+                self.assertEqual(result["breaker_rejections"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
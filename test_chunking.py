@@ -0,0 +1,136 @@
+import unittest
+from unittest.mock import patch, Mock
+import json
+import threading
+import time
+
+from EmotionDetection import http_client
+from EmotionDetection.backends import set_backend
+from EmotionDetection.cache import set_cache
+from EmotionDetection.chunking import chunk_spans, combine_results
+from EmotionDetection.circuit_breaker import configure_circuit_breaker
+from EmotionDetection.emotion_detection import emotion_detector
+from EmotionDetection.result import TIMEOUT, EmotionResult
+
+
+JOY = {'anger': 0.0, 'disgust': 0.0, 'fear': 0.0, 'joy': 1.0, 'sadness': 0.0}
+FEAR = {'anger': 0.0, 'disgust': 0.0, 'fear': 1.0, 'joy': 0.0, 'sadness': 0.0}
+
+
+def response_for(emotion):
+    body = json.dumps({'emotionPredictions': [{'emotion': emotion, 'emotionMentions': []}]})
+    return Mock(status_code=200, content=body.encode())
+
+
+class TestChunkSpans(unittest.TestCase):
+
+    def test_chunks_are_bounded_and_end_at_sentences(self):
+        text = "I love my life. " * 50
+        spans = chunk_spans(text, chunk_size=100)
+
+        self.assertGreater(len(spans), 1)
+        for begin, end in spans:
+            self.assertLessEqual(end - begin, 100)
+            self.assertTrue(text[begin:end].endswith("."))
+        self.assertEqual(" ".join(text[begin:end] for begin, end in spans), text.strip())
+
+    def test_prefers_paragraph_breaks(self):
+        first = "Happy days are here. " * 3
+        text = first.strip() + "\n\nSad news arrived today."
+        spans = chunk_spans(text, chunk_size=100)
+
+        self.assertEqual([text[begin:end] for begin, end in spans],
+                         [first.strip(), "Sad news arrived today."])
+
+    def test_long_sentence_is_cut_at_spaces(self):
+        text = "word " * 100
+        spans = chunk_spans(text, chunk_size=32)
+
+        for begin, end in spans:
+            self.assertLessEqual(end - begin, 32)
+            self.assertFalse(text[begin:end].startswith(" "))
+            self.assertTrue(text[begin:end].endswith("word"))
+
+    def test_short_text_is_one_chunk(self):
+        self.assertEqual(chunk_spans("Hello there.", chunk_size=100), [(0, 12)])
+
+    def test_invalid_chunk_size(self):
+        with self.assertRaises(ValueError):
+            chunk_spans("text", chunk_size=-1)
+
+
+class TestCombineResults(unittest.TestCase):
+
+    def test_length_weighted_average(self):
+        results = [EmotionResult.from_scores(JOY), EmotionResult.from_scores(FEAR)]
+        combined = combine_results(results, [(0, 30), (31, 41)])
+
+        self.assertAlmostEqual(combined.joy, 0.75)
+        self.assertAlmostEqual(combined.fear, 0.25)
+        self.assertEqual(combined.dominant_emotion, 'joy')
+
+    def test_failed_chunk_fails_the_document(self):
+        failed = EmotionResult.failure(TIMEOUT)
+        results = [EmotionResult.from_scores(JOY), failed]
+
+        self.assertIs(combine_results(results, [(0, 10), (11, 20)]), failed)
+
+    def test_chunk_without_signal_still_counts(self):
+        neutral = EmotionResult.from_scores(dict.fromkeys(JOY, 0.2))
+        combined = combine_results([EmotionResult.from_scores(JOY), neutral], [(0, 10), (10, 20)])
+
+        self.assertEqual(combined.dominant_emotion, 'joy')
+        self.assertLess(combined.joy, EmotionResult.from_scores(JOY).joy)
+
+
+class TestLongTextMode(unittest.TestCase):
+
+    def setUp(self):
+        set_cache(None)
+        set_backend("watson")
+        configure_circuit_breaker()
+
+    def test_chunks_are_scored_in_parallel_and_combined(self):
+        text = " ".join(f"Joyful sentence number {i}." for i in range(6)) + "\n\nScary. Scary."
+        spans = chunk_spans(text, chunk_size=70)
+        self.assertEqual(len(spans), 4)
+        in_flight = []
+        peak = []
+        lock = threading.Lock()
+
+        def fake_post(url, json=None, **kwargs):
+            with lock:
+                in_flight.append(1)
+                peak.append(len(in_flight))
+            time.sleep(0.02)
+            with lock:
+                in_flight.pop()
+            return response_for(FEAR if "Scary" in json['raw_document']['text'] else JOY)
+
+        with patch.object(http_client.HTTPClient, "post", side_effect=fake_post) as mock_post:
+            result = emotion_detector(text, long_text=True, chunk_size=70, parallelism=3)
+
+        self.assertEqual(mock_post.call_count, 4)
+        self.assertGreater(max(peak), 1)
+        self.assertEqual(result['dominant_emotion'], 'joy')
+        lengths = [end - begin for begin, end in spans]
+        self.assertAlmostEqual(result['fear'], lengths[3] / sum(lengths))
+
+    def test_short_text_is_one_call(self):
+        with patch.object(http_client.HTTPClient, "post",
+                          return_value=response_for(JOY)) as mock_post:
+            emotion_detector("I love my life.", long_text=True)
+
+        self.assertEqual(mock_post.call_count, 1)
+
+    def test_local_backend(self):
+        set_backend("local")
+        self.addCleanup(set_backend, "watson")
+
+        result = emotion_detector("I love my life. " * 200, long_text=True, chunk_size=100)
+
+        self.assertEqual(result['dominant_emotion'], 'joy')
+
+
+if __name__ == '__main__':
+    unittest.main()
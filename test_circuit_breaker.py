@@ -0,0 +1,128 @@
+import unittest
+from unittest.mock import patch, Mock
+import json
+
+import requests
+
+from EmotionDetection import http_client
+from EmotionDetection.cache import set_cache
+from EmotionDetection.circuit_breaker import (
+    CLOSED, HALF_OPEN, OPEN, CircuitBreaker, circuit_breaker_stats, configure_circuit_breaker)
+from EmotionDetection.emotion_detection import emotion_detector
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker(failure_rate_threshold=0.5, minimum_calls=4, window=10,
+                                      open_seconds=5, clock=self.clock)
+
+    def record(self, *outcomes):
+        for failed in outcomes:
+            self.assertTrue(self.breaker.allow_request())
+            if failed:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+
+    def test_stays_closed_below_minimum_calls(self):
+        self.record(True, True, True)
+        self.assertEqual(self.breaker.state, CLOSED)
+
+    def test_opens_at_failure_rate(self):
+        with self.assertLogs("EmotionDetection.circuit_breaker", "WARNING") as logs:
+            self.record(False, True, False, True)
+
+        self.assertEqual(self.breaker.state, OPEN)
+        self.assertIn("opened", logs.output[0])
+        self.assertFalse(self.breaker.allow_request())
+        stats = self.breaker.stats()
+        self.assertEqual(stats["rejected"], 1)
+        self.assertEqual(stats["times_opened"], 1)
+        self.assertEqual(stats["retry_after"], 5)
+
+    def test_old_outcomes_leave_the_window(self):
+        self.record(True, True, True)
+        self.clock.now += 11
+        self.record(False, False, False, True)
+
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.assertEqual(self.breaker.stats()["failures"], 1)
+
+    def test_half_open_probe_success_closes(self):
+        self.record(True, True, True, True)
+        self.clock.now += 5
+
+        self.assertEqual(self.breaker.state, HALF_OPEN)
+        self.assertTrue(self.breaker.allow_request())
+        # Only one probe at a time
+        self.assertFalse(self.breaker.allow_request())
+        self.breaker.record_success()
+
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.assertTrue(self.breaker.allow_request())
+
+    def test_half_open_probe_failure_reopens(self):
+        self.record(True, True, True, True)
+        self.clock.now += 5
+        self.record(True)
+
+        self.assertEqual(self.breaker.state, OPEN)
+        self.assertEqual(self.breaker.stats()["times_opened"], 2)
+
+    def test_released_probe_frees_the_slot(self):
+        self.record(True, True, True, True)
+        self.clock.now += 5
+        self.assertTrue(self.breaker.allow_request())
+        self.breaker.release()
+
+        self.assertEqual(self.breaker.state, HALF_OPEN)
+        self.assertTrue(self.breaker.allow_request())
+
+    def test_invalid_threshold(self):
+        with self.assertRaises(ValueError):
+            CircuitBreaker(failure_rate_threshold=0)
+
+
+class TestUpstreamCircuitBreaker(unittest.TestCase):
+
+    def setUp(self):
+        set_cache(None)
+        configure_circuit_breaker(minimum_calls=3, open_seconds=60)
+        self.addCleanup(configure_circuit_breaker)
+
+    def test_dead_upstream_fails_fast(self):
+        with patch.object(http_client.HTTPClient, "post",
+                          side_effect=requests.exceptions.ConnectionError()) as mock_post, \
+                patch("builtins.print"), \
+                self.assertLogs("EmotionDetection.circuit_breaker", "WARNING"):
+            results = [emotion_detector(f"text {i}") for i in range(10)]
+
+        self.assertEqual(mock_post.call_count, 3)
+        self.assertTrue(all(r["dominant_emotion"] is None for r in results))
+        stats = circuit_breaker_stats()
+        self.assertEqual(stats["state"], OPEN)
+        self.assertEqual(stats["rejected"], 7)
+
+    def test_client_errors_do_not_open(self):
+        response = Mock(status_code=400, text=json.dumps({"error": "bad"}))
+        with patch.object(http_client.HTTPClient, "post", return_value=response) as mock_post:
+            for i in range(5):
+                emotion_detector(f"text {i}")
+
+        self.assertEqual(mock_post.call_count, 5)
+        self.assertEqual(circuit_breaker_stats()["state"], CLOSED)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,168 @@
+import unittest
+from unittest.mock import patch
+import csv
+import io
+import json
+import os
+import tempfile
+
+from EmotionDetection.backends import set_backend
+from EmotionDetection.cli import ProgressReporter, iter_records, main, save_checkpoint
+
+
+TEXTS = [
+    "I love my life",
+    "I am so sad about this",
+    "",
+    "I am really afraid that this will happen",
+    "I am really mad about this",
+]
+
+
+class TestCLI(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(set_backend, "watson")
+
+    def path(self, name):
+        return os.path.join(self.tmp.name, name)
+
+    def write(self, name, content):
+        with open(self.path(name), "w", encoding="utf-8") as f:
+            f.write(content)
+        return self.path(name)
+
+    def run_cli(self, *argv):
+        with patch("sys.stderr", io.StringIO()) as stderr:
+            self.assertEqual(main(list(argv) + ["--backend", "local"]), 0)
+        return stderr.getvalue()
+
+    def read_jsonl(self, name):
+        with open(self.path(name), encoding="utf-8") as f:
+            return [json.loads(line) for line in f]
+
+    def test_lines_to_jsonl(self):
+        source = self.write("input.txt", "\n".join(TEXTS) + "\n")
+
+        log = self.run_cli(source, "-o", self.path("out.jsonl"))
+
+        records = self.read_jsonl("out.jsonl")
+        self.assertEqual([r["index"] for r in records], list(range(5)))
+        self.assertEqual([r["dominant_emotion"] for r in records],
+                         ["joy", "sadness", None, "fear", "anger"])
+        self.assertIn("texts/s", log)
+        self.assertIn("Done: 5 records", log)
+
+    def test_jsonl_field_to_csv(self):
+        lines = [json.dumps({"request_id": f"r{i}", "body": text}) for i, text in enumerate(TEXTS)]
+        source = self.write("input.jsonl", "\n".join(lines) + "\n")
+
+        self.run_cli(source, "-o", self.path("out.csv"), "--field", "body")
+
+        with open(self.path("out.csv"), newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual([row["id"] for row in rows], ["r0", "r1", "r2", "r3", "r4"])
+        self.assertEqual(rows[0]["dominant_emotion"], "joy")
+        self.assertEqual(rows[2]["dominant_emotion"], "")
+
+    def test_csv_column_input(self):
+        source = self.write("input.csv", "id,comment\n1,I love my life\n2,\"so sad, really\"\n")
+
+        self.run_cli(source, "-o", self.path("out.jsonl"), "--field", "comment")
+
+        records = self.read_jsonl("out.jsonl")
+        self.assertEqual([(r["id"], r["dominant_emotion"]) for r in records],
+                         [("1", "joy"), ("2", "sadness")])
+
+    def test_resume_from_checkpoint(self):
+        source = self.write("input.txt", "\n".join(TEXTS) + "\n")
+        output = self.path("out.jsonl")
+
+        # A crashed run: two records checkpointed, then a partial line written
+        first_two = "".join(json.dumps({"index": i, "dominant_emotion": "joy"}) + "\n" for i in range(2))
+        self.write("out.jsonl", first_two + '{"index": 2, "ang')
+        save_checkpoint(output + ".checkpoint", 2, len(first_two.encode()))
+
+        log = self.run_cli(source, "-o", output, "--resume")
+
+        records = self.read_jsonl("out.jsonl")
+        self.assertIn("Resuming after 2 records", log)
+        self.assertEqual([r["index"] for r in records], list(range(5)))
+        self.assertEqual(records[3]["dominant_emotion"], "fear")
+
+    def test_resume_seeks_past_done_records(self):
+        done = "\n".join(TEXTS[:2]) + "\n"
+        # The done records are never read again: replace them with one line
+        # of the same size, which re-parsing would count as a single record
+        source = self.write("input.txt", "x" * (len(done) - 1) + "\n" + "\n".join(TEXTS[2:]) + "\n")
+        output = self.path("out.jsonl")
+        self.write("out.jsonl", "")
+        save_checkpoint(output + ".checkpoint", 2, 0, len(done.encode()))
+
+        self.run_cli(source, "-o", output, "--resume")
+
+        records = self.read_jsonl("out.jsonl")
+        self.assertEqual([r["index"] for r in records], [2, 3, 4])
+        self.assertEqual([r["dominant_emotion"] for r in records], [None, "fear", "anger"])
+
+    def test_resume_csv_after_header(self):
+        header_and_done = "id,comment\n1,I love my life\n"
+        source = self.write("input.csv", header_and_done + "2,\"so sad, really\"\n")
+        output = self.path("out.jsonl")
+        self.write("out.jsonl", "")
+        save_checkpoint(output + ".checkpoint", 1, 0, len(header_and_done.encode()))
+
+        self.run_cli(source, "-o", output, "--field", "comment", "--resume")
+
+        self.assertEqual([(r["index"], r["id"], r["dominant_emotion"]) for r in self.read_jsonl("out.jsonl")],
+                         [(1, "2", "sadness")])
+
+    def test_resume_without_checkpoint_starts_over(self):
+        source = self.write("input.txt", "I love my life\n")
+
+        self.run_cli(source, "-o", self.path("out.jsonl"), "--resume")
+
+        self.assertEqual(len(self.read_jsonl("out.jsonl")), 1)
+
+    def test_checkpoint_is_written(self):
+        source = self.write("input.txt", "\n".join(TEXTS) + "\n")
+
+        self.run_cli(source, "-o", self.path("out.jsonl"), "--checkpoint-every", "2")
+
+        with open(self.path("out.jsonl.checkpoint")) as f:
+            checkpoint = json.load(f)
+        self.assertEqual(checkpoint["records_done"], 5)
+        self.assertEqual(checkpoint["output_bytes"], os.path.getsize(self.path("out.jsonl")))
+        self.assertEqual(checkpoint["input_offset"], os.path.getsize(source))
+
+
+class TestHelpers(unittest.TestCase):
+
+    def test_iter_records_skips_blank_jsonl_lines(self):
+        stream = io.StringIO('{"text": "a"}\n\n"b"\nnot json\n')
+        self.assertEqual(list(iter_records(stream, "jsonl", "text")),
+                         [(0, None, "a"), (1, None, "b"), (2, None, "")])
+
+    def test_progress_reports_eta(self):
+        stream = io.StringIO()
+        reporter = ProgressReporter(total_bytes=1000, stream=stream)
+        reporter.update(10, 250, force=True)
+
+        self.assertIn("25.0%", stream.getvalue())
+        self.assertIn("ETA", stream.getvalue())
+
+    def test_eta_after_resume_counts_only_this_run(self):
+        stream = io.StringIO()
+        with patch("EmotionDetection.cli.time.monotonic", return_value=0.0):
+            reporter = ProgressReporter(total_bytes=1000, stream=stream, start_offset=500)
+        with patch("EmotionDetection.cli.time.monotonic", return_value=10.0):
+            reporter.update(10, 750, force=True)
+
+        # 250 bytes took 10 s, so the last 250 take another 10 s
+        self.assertIn("75.0% | ETA 00:00:10", stream.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,215 @@
+import unittest
+from unittest.mock import patch, Mock
+import json
+import threading
+
+from EmotionDetection import http_client
+from EmotionDetection.async_detector import emotion_detector_async
+from EmotionDetection.backends import set_backend
+from EmotionDetection.batch import emotion_detector_batch
+from EmotionDetection.cache import MemoryCache, set_cache
+from EmotionDetection.circuit_breaker import configure_circuit_breaker
+from EmotionDetection.emotion_detection import (
+    EmotionClient, configure_client, default_client, emotion_detector)
+from EmotionDetection.http_caching import result_etag
+from EmotionDetection.watson import HEADERS, URL
+
+
+SCORES = {'anger': 0.01, 'disgust': 0.02, 'fear': 0.03, 'joy': 0.9, 'sadness': 0.04}
+JOY_BODY = json.dumps({'emotionPredictions': [{'emotion': SCORES}]})
+
+
+def post():
+    # autospec passes the HTTPClient the request went through
+    return patch.object(http_client.HTTPClient, "post", autospec=True,
+                        return_value=Mock(status_code=200, text=JOY_BODY))
+
+
+class TestEmotionClient(unittest.TestCase):
+
+    def setUp(self):
+        set_cache(MemoryCache())
+        self.addCleanup(set_cache, None)
+        set_backend("watson")
+        configure_circuit_breaker()
+
+    def test_own_pool_and_timeouts(self):
+        interactive = EmotionClient(read_timeout=2, retries=0)
+        bulk = EmotionClient(pool_maxsize=64, read_timeout=30, cache=False)
+
+        self.assertEqual(interactive.http_client.timeout[1], 2)
+        self.assertEqual(interactive.http_client.retries, 0)
+        self.assertEqual(bulk.http_client.pool_maxsize, 64)
+        with post() as mock_post:
+            interactive.emotion_detector("I love my life")
+            bulk.emotion_detector("I hate rain")
+
+        self.assertEqual([call.args[0] for call in mock_post.call_args_list],
+                         [interactive.http_client, bulk.http_client])
+
+    def test_endpoint_and_model(self):
+        client = EmotionClient(url="http://emotions.internal/predict", model_id="emotion_v2")
+
+        with post() as mock_post:
+            result = client.emotion_detector("I love my life")
+
+        self.assertEqual(result['dominant_emotion'], 'joy')
+        self.assertIs(mock_post.call_args.args[0], http_client.default_http_client())
+        self.assertEqual(mock_post.call_args.args[1], "http://emotions.internal/predict")
+        self.assertEqual(mock_post.call_args.kwargs["headers"],
+                         {"grpc-metadata-mm-model-id": "emotion_v2"})
+
+    def test_models_do_not_share_cached_results(self):
+        with post() as mock_post:
+            EmotionClient(model_id="emotion_v2").emotion_detector("I love my life")
+            EmotionClient().emotion_detector("I love my life")
+
+        self.assertEqual(mock_post.call_count, 2)
+
+    def test_cache_can_be_disabled(self):
+        client = EmotionClient(cache=False)
+
+        with post() as mock_post:
+            client.emotion_detector("I love my life")
+            client.emotion_detector("I love my life")
+
+        self.assertEqual(mock_post.call_count, 2)
+        self.assertIsNone(client.result_cache())
+
+    def test_local_client_beside_watson(self):
+        client = EmotionClient(backend="local")
+
+        with post() as mock_post:
+            result = client.emotion_detector("I am so happy and glad")
+
+        self.assertEqual(result['dominant_emotion'], 'joy')
+        mock_post.assert_not_called()
+
+    def test_watson_options_need_watson_backend(self):
+        with self.assertRaises(ValueError):
+            EmotionClient(backend="local", read_timeout=1)
+
+    def test_batch_with_client(self):
+        bulk = EmotionClient(pool_maxsize=32, cache=False)
+
+        with post() as mock_post:
+            results = emotion_detector_batch(["one", "two", ""], client=bulk)
+
+        self.assertEqual([result['dominant_emotion'] for result in results], ['joy', 'joy', None])
+        self.assertTrue(all(call.args[0] is bulk.http_client for call in mock_post.call_args_list))
+
+    def test_clients_do_not_wait_on_each_other(self):
+        bulk = EmotionClient(url="http://bulk.internal/predict", cache=False)
+        interactive = EmotionClient(url="http://interactive.internal/predict", cache=False)
+        bulk_entered = threading.Event()
+        finish_bulk = threading.Event()
+
+        def post_to(client, url, **kwargs):
+            if url == "http://bulk.internal/predict":
+                bulk_entered.set()
+                finish_bulk.wait(5)
+            return Mock(status_code=200, text=JOY_BODY)
+
+        with patch.object(http_client.HTTPClient, "post", autospec=True, side_effect=post_to):
+            thread = threading.Thread(target=bulk.emotion_detector, args=("I love my life",))
+            thread.start()
+            self.assertTrue(bulk_entered.wait(5))
+
+            # The same text from the other client is sent on its own at once
+            results = []
+            other = threading.Thread(target=lambda: results.append(
+                interactive.emotion_detector("I love my life")))
+            other.start()
+            other.join(2)
+            answered_first = not other.is_alive()
+            finish_bulk.set()
+            thread.join(5)
+            other.join(5)
+
+        self.assertTrue(answered_first)
+        self.assertEqual(results[0]['dominant_emotion'], 'joy')
+
+    def test_close_releases_own_pool(self):
+        client = EmotionClient(read_timeout=1)
+
+        with patch.object(client.http_client, "close") as close:
+            client.close()
+
+        close.assert_called_once()
+
+
+class TestDefaultClient(unittest.TestCase):
+
+    def setUp(self):
+        set_cache(None)
+        set_backend("watson")
+        configure_circuit_breaker()
+        self.addCleanup(configure_client)
+
+    def test_default_follows_process_settings(self):
+        with post() as mock_post:
+            emotion_detector("I love my life")
+
+        self.assertIs(mock_post.call_args.args[0], http_client.default_http_client())
+        self.assertEqual(mock_post.call_args.args[1], URL)
+        self.assertEqual(mock_post.call_args.kwargs["headers"], HEADERS)
+
+    def test_configure_client(self):
+        client = configure_client(read_timeout=5)
+
+        with post() as mock_post:
+            emotion_detector("I love my life")
+
+        self.assertIs(default_client(), client)
+        self.assertIs(mock_post.call_args.args[0], client.http_client)
+
+    def test_etag_follows_default_client(self):
+        etag = result_etag("I love my life")
+        configure_client(model_id="emotion_v2")
+
+        self.assertNotEqual(result_etag("I love my life"), etag)
+
+
+class RecordingPool:
+    """Stand-in for AsyncHTTPPool that records where requests were sent."""
+
+    def __init__(self):
+        self.requests = []
+
+    async def post(self, url, json=None, headers=None):
+        self.requests.append((url, headers))
+        return 200, JOY_BODY.encode()
+
+
+class TestAsyncDefaultClient(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        set_cache(None)
+        set_backend("watson")
+        configure_circuit_breaker()
+        self.addCleanup(configure_client)
+
+    async def test_async_uses_default_client_endpoint_and_model(self):
+        configure_client(url="http://emotions.internal/predict", model_id="emotion_v2")
+        pool = RecordingPool()
+
+        result = await emotion_detector_async("I love my life", pool=pool)
+
+        self.assertEqual(result['dominant_emotion'], 'joy')
+        self.assertEqual(pool.requests, [("http://emotions.internal/predict",
+                                          {"grpc-metadata-mm-model-id": "emotion_v2"})])
+
+    async def test_async_uses_default_client_cache(self):
+        cache = MemoryCache()
+        configure_client(cache=cache)
+        pool = RecordingPool()
+
+        await emotion_detector_async("I love my life", pool=pool)
+        await emotion_detector_async("I love my life", pool=pool)
+
+        self.assertEqual(len(pool.requests), 1)
+        self.assertEqual(pool.requests[0], (URL, HEADERS))
+
+
+if __name__ == '__main__':
+    unittest.main()
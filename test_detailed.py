@@ -0,0 +1,151 @@
+import unittest
+from unittest.mock import patch, Mock, AsyncMock
+import json
+
+from server import app
+from EmotionDetection import http_client
+from EmotionDetection.backends import set_backend
+from EmotionDetection.cache import MemoryCache, set_cache
+from EmotionDetection.circuit_breaker import configure_circuit_breaker
+from EmotionDetection.emotion_detection import emotion_detector
+from EmotionDetection.http_caching import result_etag
+from EmotionDetection.sentences import sentence_spans
+from test_asgi_server import call
+
+
+TEXT = "I love my life. I am scared of spiders."
+JOY = {'anger': 0.01, 'disgust': 0.01, 'fear': 0.02, 'joy': 0.9, 'sadness': 0.06}
+FEAR = {'anger': 0.02, 'disgust': 0.05, 'fear': 0.8, 'joy': 0.03, 'sadness': 0.1}
+AGGREGATE = {'anger': 0.015, 'disgust': 0.03, 'fear': 0.41, 'joy': 0.465, 'sadness': 0.08}
+BODY = json.dumps({
+    'emotionPredictions': [{
+        'emotion': AGGREGATE,
+        'target': '',
+        'emotionMentions': [
+            {'span': {'begin': 0, 'end': 15, 'text': 'I love my life.'}, 'emotion': JOY},
+            {'span': {'begin': 16, 'end': 39, 'text': 'I am scared of spiders.'}, 'emotion': FEAR},
+        ],
+    }],
+    'producerId': {'name': 'Ensemble Aggregated Emotion Workflow', 'version': '0.0.1'},
+})
+
+
+def ok_response():
+    return Mock(status_code=200, content=BODY.encode(), text=BODY)
+
+
+class TestDetailedEmotionDetector(unittest.TestCase):
+
+    def setUp(self):
+        set_cache(None)
+        set_backend("watson")
+        configure_circuit_breaker()
+
+    def test_mentions_from_one_upstream_call(self):
+        with patch.object(http_client.HTTPClient, "post", return_value=ok_response()) as mock_post:
+            result = emotion_detector(TEXT, detailed=True)
+
+        self.assertEqual(mock_post.call_count, 1)
+        self.assertEqual(result['dominant_emotion'], 'joy')
+        self.assertEqual(result['mentions'], [
+            {'begin': 0, 'end': 15, 'text': 'I love my life.', **JOY, 'dominant_emotion': 'joy'},
+            {'begin': 16, 'end': 39, 'text': 'I am scared of spiders.', **FEAR,
+             'dominant_emotion': 'fear'},
+        ])
+
+    def test_plain_result_has_no_mentions(self):
+        with patch.object(http_client.HTTPClient, "post", return_value=ok_response()):
+            result = emotion_detector(TEXT)
+
+        self.assertNotIn('mentions', result)
+
+    def test_malformed_mention_is_a_parse_error(self):
+        body = json.dumps({'emotionPredictions': [{'emotion': JOY, 'emotionMentions': [{}]}]})
+        with patch.object(http_client.HTTPClient, "post",
+                          return_value=Mock(status_code=200, content=body.encode())):
+            result = emotion_detector(TEXT, detailed=True)
+
+        self.assertIsNone(result['dominant_emotion'])
+
+    def test_detailed_results_are_cached_separately(self):
+        set_cache(MemoryCache())
+        self.addCleanup(set_cache, None)
+
+        with patch.object(http_client.HTTPClient, "post", return_value=ok_response()) as mock_post:
+            plain = emotion_detector(TEXT)
+            detailed = emotion_detector(TEXT, detailed=True)
+            cached = emotion_detector(TEXT, detailed=True)
+
+        self.assertEqual(mock_post.call_count, 2)
+        self.assertNotIn('mentions', plain)
+        self.assertEqual(cached, detailed)
+        self.assertEqual(len(cached['mentions']), 2)
+
+    def test_whitespace_variants_are_not_shared(self):
+        set_cache(MemoryCache())
+        self.addCleanup(set_cache, None)
+        padded = "   I love my life.   I am scared of spiders."
+        padded_body = BODY.replace('"begin": 0, "end": 15', '"begin": 3, "end": 18').replace(
+            '"begin": 16, "end": 39', '"begin": 21, "end": 44')
+        responses = [ok_response(), Mock(status_code=200, content=padded_body.encode(),
+                                          text=padded_body)]
+
+        with patch.object(http_client.HTTPClient, "post", side_effect=responses) as mock_post:
+            emotion_detector(TEXT, detailed=True)
+            result = emotion_detector(padded, detailed=True)
+
+        self.assertEqual(mock_post.call_count, 2)
+        for mention in result['mentions']:
+            self.assertEqual(padded[mention['begin']:mention['end']], mention['text'])
+
+    def test_whitespace_variants_get_their_own_etag(self):
+        self.assertNotEqual(result_etag(TEXT, True), result_etag("  " + TEXT, True))
+        self.assertEqual(result_etag(TEXT), result_etag("  " + TEXT))
+
+    def test_local_backend_scores_sentences(self):
+        set_backend("local")
+        self.addCleanup(set_backend, "watson")
+
+        result = emotion_detector(TEXT, detailed=True)
+
+        self.assertEqual([m['text'] for m in result['mentions']],
+                         ['I love my life.', 'I am scared of spiders.'])
+        self.assertEqual([m['dominant_emotion'] for m in result['mentions']], ['joy', 'fear'])
+
+
+class TestSentenceSpans(unittest.TestCase):
+
+    def test_spans(self):
+        text = "Great news!  What now?\nnot sure"
+        self.assertEqual([text[begin:end] for begin, end in sentence_spans(text)],
+                         ['Great news!', 'What now?', 'not sure'])
+
+    def test_blank_text(self):
+        self.assertEqual(sentence_spans("  \n "), [])
+
+
+class TestDetailedRoutes(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        set_cache(None)
+        set_backend("watson")
+        configure_circuit_breaker()
+
+    def test_flask_detailed_flag(self):
+        with patch.object(http_client.HTTPClient, "post", return_value=ok_response()):
+            detailed = app.test_client().get(
+                '/emotionDetector', query_string={'textToAnalyze': TEXT, 'detailed': 'true'})
+            plain = app.test_client().get('/emotionDetector', query_string={'textToAnalyze': TEXT})
+
+        self.assertEqual(len(detailed.get_json()['mentions']), 2)
+        self.assertNotIn('mentions', plain.get_json())
+
+    async def test_asgi_detailed_flag(self):
+        with patch("asgi_server.emotion_detector_async", AsyncMock(return_value={})) as mock:
+            await call("/emotionDetector", b"textToAnalyze=hi&detailed=1")
+
+        mock.assert_awaited_once_with("hi", detailed=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
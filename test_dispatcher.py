@@ -0,0 +1,184 @@
+import unittest
+from unittest.mock import patch, Mock
+import json
+import threading
+import time
+
+from server import app
+from EmotionDetection import http_client
+from EmotionDetection.backends import set_backend
+from EmotionDetection.cache import set_cache
+from EmotionDetection.circuit_breaker import configure_circuit_breaker
+from EmotionDetection.limiter import Overloaded
+from EmotionDetection.dispatcher import MicroBatcher, configure_dispatcher, default_dispatcher
+
+
+def upper_batch(batches):
+    """Batch function recording each batch it is called with"""
+    def analyze(texts):
+        batches.append(list(texts))
+        return [{"text": text.upper()} for text in texts]
+    return analyze
+
+
+def submit_concurrently(dispatcher, texts):
+    results = [None] * len(texts)
+    barrier = threading.Barrier(len(texts))
+
+    def worker(index):
+        barrier.wait()
+        results[index] = dispatcher.analyze(texts[index], timeout=5)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(len(texts))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+class TestMicroBatcher(unittest.TestCase):
+
+    def make(self, **options):
+        dispatcher = MicroBatcher(**options)
+        self.addCleanup(dispatcher.close)
+        return dispatcher
+
+    def test_concurrent_requests_share_a_batch(self):
+        batches = []
+        dispatcher = self.make(window=0.2, max_batch_size=100, batch_fn=upper_batch(batches))
+        texts = [f"text {i}" for i in range(10)]
+
+        results = submit_concurrently(dispatcher, texts)
+
+        self.assertEqual(results, [{"text": text.upper()} for text in texts])
+        self.assertEqual(len(batches), 1)
+        self.assertEqual(dispatcher.stats(), {"batches": 1, "items": 10, "mean_batch_size": 10.0})
+
+    def test_max_batch_size(self):
+        batches = []
+        dispatcher = self.make(window=0.2, max_batch_size=4, batch_fn=upper_batch(batches))
+
+        submit_concurrently(dispatcher, [f"text {i}" for i in range(10)])
+
+        self.assertTrue(all(len(batch) <= 4 for batch in batches))
+        self.assertEqual(sum(len(batch) for batch in batches), 10)
+
+    def test_zero_window_does_not_wait(self):
+        dispatcher = self.make(window=0, batch_fn=upper_batch([]))
+
+        started = time.perf_counter()
+        self.assertEqual(dispatcher.analyze("hi", timeout=5), {"text": "HI"})
+        self.assertLess(time.perf_counter() - started, 0.1)
+
+    def test_errors_reach_every_caller(self):
+        def failing(texts):
+            raise RuntimeError("backend down")
+
+        dispatcher = self.make(window=0.05, batch_fn=failing)
+        futures = [dispatcher.submit(text) for text in ("a", "b")]
+
+        for future in futures:
+            with self.assertRaises(RuntimeError):
+                future.result(timeout=5)
+
+    def test_cancelled_requests_are_skipped(self):
+        batches = []
+        dispatcher = self.make(window=0.1, batch_fn=upper_batch(batches))
+        cancelled = dispatcher.submit("gone")
+        cancelled.cancel()
+
+        self.assertEqual(dispatcher.analyze("kept", timeout=5), {"text": "KEPT"})
+        self.assertEqual(batches, [["kept"]])
+
+    def test_remote_batches_overlap(self):
+        # A slow remote batch must not hold up collecting and sending the next
+        set_backend("watson")
+        set_cache(None)
+        configure_circuit_breaker()
+        self.addCleanup(set_cache, None)
+        dispatcher = self.make(window=0.01, max_batch_size=2, max_concurrency=1)
+        in_flight = [0]
+        peak = [0]
+        lock = threading.Lock()
+        body = json.dumps({'emotionPredictions': [{'emotion': {
+            'anger': 0.01, 'disgust': 0.01, 'fear': 0.01, 'joy': 0.9, 'sadness': 0.07}}]})
+
+        def slow_post(url, **kwargs):
+            with lock:
+                in_flight[0] += 1
+                peak[0] = max(peak[0], in_flight[0])
+            time.sleep(0.1)
+            with lock:
+                in_flight[0] -= 1
+            return Mock(status_code=200, text=body)
+
+        with patch.object(http_client.HTTPClient, "post", side_effect=slow_post):
+            results = submit_concurrently(dispatcher, [f"text {i}" for i in range(8)])
+
+        self.assertEqual([r['dominant_emotion'] for r in results], ['joy'] * 8)
+        self.assertGreater(dispatcher.stats()["batches"], 1)
+        self.assertGreater(peak[0], 1)
+
+    def test_shed_text_fails_only_its_caller(self):
+        set_backend("watson")
+        dispatcher = self.make(window=0.2, max_batch_size=3)
+        joy = {"anger": 0.1, "disgust": 0.1, "fear": 0.1, "joy": 0.6, "sadness": 0.1,
+               "dominant_emotion": "joy"}
+
+        def detector(text):
+            if text == "b":
+                raise Overloaded("busy")
+            return joy
+
+        with patch("EmotionDetection.dispatcher.emotion_detector", side_effect=detector):
+            futures = [dispatcher.submit(text) for text in ("a", "b", "c")]
+            self.assertEqual(futures[0].result(5), joy)
+            self.assertIsInstance(futures[1].exception(5), Overloaded)
+            self.assertEqual(futures[2].result(5), joy)
+        self.assertEqual(dispatcher.stats()["batches"], 1)
+
+    def test_invalid_batch_size(self):
+        with self.assertRaises(ValueError):
+            MicroBatcher(max_batch_size=0)
+
+
+class TestServerDispatch(unittest.TestCase):
+
+    def setUp(self):
+        self.app = app.test_client()
+        self.addCleanup(set_backend, "watson")
+        self.addCleanup(configure_dispatcher, mode="auto")
+
+    def test_local_backend_is_batched_in_auto_mode(self):
+        set_backend("local")
+        configure_dispatcher(mode="auto", window=0)
+
+        response = self.app.get('/emotionDetector', query_string={'textToAnalyze': 'I love my life'})
+
+        self.assertEqual(response.get_json()['dominant_emotion'], 'joy')
+        self.assertEqual(default_dispatcher().stats()["items"], 1)
+
+    def test_remote_backend_bypasses_in_auto_mode(self):
+        configure_dispatcher(mode="auto")
+        result = {"anger": 0.1, "disgust": 0.1, "fear": 0.1, "joy": 0.6, "sadness": 0.1,
+                  "dominant_emotion": "joy"}
+
+        with patch("EmotionDetection.dispatcher.emotion_detector", return_value=result) as mock:
+            response = self.app.get('/emotionDetector', query_string={'textToAnalyze': 'hello'})
+
+        self.assertEqual(response.get_json(), result)
+        mock.assert_called_once_with('hello', detailed=False)
+        self.assertEqual(default_dispatcher().stats()["items"], 0)
+
+    def test_off_mode(self):
+        set_backend("local")
+        configure_dispatcher(mode="off")
+
+        self.app.get('/emotionDetector', query_string={'textToAnalyze': 'I love my life'})
+
+        self.assertEqual(default_dispatcher().stats()["items"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
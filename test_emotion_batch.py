@@ -0,0 +1,114 @@
+import unittest
+from unittest.mock import patch, Mock
+import json
+import threading
+import time
+
+from EmotionDetection import http_client
+from EmotionDetection.cache import MemoryCache, set_cache
+from EmotionDetection.batch import emotion_detector_batch, iter_emotion_detector_batch
+
+
+def make_response(dominant):
+    emotions = {'anger': 0.1, 'disgust': 0.1, 'fear': 0.1, 'joy': 0.1, 'sadness': 0.1}
+    emotions[dominant] = 0.9
+    mock_response = Mock()
+    mock_response.status_code = 200
+    mock_response.text = json.dumps({'emotionPredictions': [{'emotion': emotions}]})
+    return mock_response
+
+
+class TestEmotionDetectorBatch(unittest.TestCase):
+
+    def setUp(self):
+        set_cache(MemoryCache())
+
+    def test_results_keep_input_order(self):
+        """Results line up with inputs even when calls finish out of order"""
+        emotions = ['joy', 'anger', 'fear', 'sadness', 'disgust'] * 4
+
+        def fake_post(url, json=None, **kwargs):
+            text = json['raw_document']['text']
+            index = int(text.split()[-1])
+            # Later items finish first
+            time.sleep(0.001 * (len(emotions) - index))
+            return make_response(emotions[index])
+
+        with patch.object(http_client.HTTPClient, "post", side_effect=fake_post):
+            results = emotion_detector_batch(
+                [f"text {i}" for i in range(len(emotions))], max_concurrency=5)
+
+        self.assertEqual([r['dominant_emotion'] for r in results], emotions)
+
+    def test_failures_are_none_filled(self):
+        """A failing item gets the None-filled dictionary, others succeed"""
+        def fake_post(url, json=None, **kwargs):
+            if json['raw_document']['text'] == "bad":
+                response = make_response('joy')
+                response.status_code = 500
+                return response
+            return make_response('joy')
+
+        with patch.object(http_client.HTTPClient, "post", side_effect=fake_post):
+            results = emotion_detector_batch(["good", "bad", "", "good"])
+
+        self.assertEqual(results[0]['dominant_emotion'], 'joy')
+        self.assertEqual(results[1], dict.fromkeys(results[1]))
+        self.assertIsNone(results[2]['dominant_emotion'])
+        self.assertEqual(results[3]['dominant_emotion'], 'joy')
+
+    def test_concurrency_is_bounded(self):
+        """No more than max_concurrency detector calls run at once"""
+        lock = threading.Lock()
+        state = {'active': 0, 'peak': 0}
+
+        def detector(text):
+            with lock:
+                state['active'] += 1
+                state['peak'] = max(state['peak'], state['active'])
+            time.sleep(0.01)
+            with lock:
+                state['active'] -= 1
+            return {'dominant_emotion': text}
+
+        results = emotion_detector_batch(map(str, range(30)), max_concurrency=3, detector=detector)
+
+        self.assertEqual(len(results), 30)
+        self.assertLessEqual(state['peak'], 3)
+        self.assertGreater(state['peak'], 1)
+
+    def test_detector_exception_is_contained(self):
+        """An exception in a custom detector becomes a None-filled result"""
+        def detector(text):
+            raise RuntimeError("boom")
+
+        with patch('builtins.print'):
+            results = emotion_detector_batch(["a"], detector=detector)
+
+        self.assertIsNone(results[0]['dominant_emotion'])
+        self.assertEqual(len(results[0]), 6)
+
+    def test_iterator_is_lazy(self):
+        """The streaming variant consumes input incrementally"""
+        consumed = []
+
+        def texts():
+            for i in range(1000):
+                consumed.append(i)
+                yield str(i)
+
+        results = iter_emotion_detector_batch(texts(), max_concurrency=2,
+                                              detector=lambda text: {'dominant_emotion': text})
+        first = next(results)
+        results.close()
+
+        self.assertEqual(first['dominant_emotion'], '0')
+        self.assertLess(len(consumed), 10)
+
+    def test_invalid_concurrency(self):
+        with self.assertRaises(ValueError):
+            emotion_detector_batch(["a"], max_concurrency=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
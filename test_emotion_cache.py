@@ -0,0 +1,182 @@
+import unittest
+from unittest.mock import patch, Mock
+import json
+import os
+import tempfile
+import time
+
+from EmotionDetection import http_client
+from EmotionDetection.cache import DiskCache, MemoryCache, cache_key, get_cache, set_cache
+from EmotionDetection.emotion_detection import emotion_detector
+from EmotionDetection.watson import MODEL_ID
+
+
+SAMPLE_RESPONSE = {
+    'emotionPredictions': [{
+        'emotion': {
+            'anger': 0.0132405795,
+            'disgust': 0.0020517302,
+            'fear': 0.009090992,
+            'joy': 0.9699522,
+            'sadness': 0.054984167
+        }
+    }]
+}
+
+RESULT = {**SAMPLE_RESPONSE['emotionPredictions'][0]['emotion'], 'dominant_emotion': 'joy'}
+
+
+def make_response(status_code=200):
+    mock_response = Mock()
+    mock_response.status_code = status_code
+    mock_response.text = json.dumps(SAMPLE_RESPONSE)
+    return mock_response
+
+
+class TestCacheKey(unittest.TestCase):
+
+    def test_whitespace_is_normalized(self):
+        self.assertEqual(cache_key("I love  my life ", MODEL_ID), cache_key("I love my life", MODEL_ID))
+
+    def test_detailed_key_keeps_whitespace(self):
+        # Mention offsets point into the exact text
+        self.assertNotEqual(cache_key("I love  my life ", MODEL_ID, detailed=True),
+                            cache_key("I love my life", MODEL_ID, detailed=True))
+
+    def test_case_is_preserved(self):
+        self.assertNotEqual(cache_key("I love my life", MODEL_ID), cache_key("i love my life", MODEL_ID))
+
+    def test_model_is_part_of_key(self):
+        self.assertNotEqual(cache_key("text", "model-a"), cache_key("text", "model-b"))
+
+
+class TestMemoryCache(unittest.TestCase):
+
+    def test_get_set_and_stats(self):
+        cache = MemoryCache()
+        self.assertIsNone(cache.get("k"))
+        cache.set("k", RESULT)
+
+        self.assertEqual(cache.get("k"), RESULT)
+        self.assertEqual(cache.stats(), {"hits": 1, "misses": 1, "size": 1, "hit_rate": 0.5})
+
+    def test_returns_copies(self):
+        cache = MemoryCache()
+        cache.set("k", RESULT)
+        cache.get("k")['joy'] = 0
+
+        self.assertEqual(cache.get("k"), RESULT)
+
+    def test_least_recently_used_is_evicted(self):
+        cache = MemoryCache(maxsize=2)
+        cache.set("a", RESULT)
+        cache.set("b", RESULT)
+        cache.get("a")
+        cache.set("c", RESULT)
+
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("c"))
+
+    def test_entries_expire(self):
+        cache = MemoryCache(ttl=10)
+        cache.set("k", RESULT)
+
+        with patch("EmotionDetection.cache.time.monotonic", return_value=time.monotonic() + 11):
+            self.assertIsNone(cache.get("k"))
+        self.assertEqual(cache.stats()["size"], 0)
+
+
+class TestDiskCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_entries_are_shared_between_instances(self):
+        """A second cache on the same directory (e.g. another worker) sees hits"""
+        DiskCache(self.directory).set("k", RESULT)
+
+        other = DiskCache(self.directory)
+        self.assertEqual(other.get("k"), RESULT)
+        self.assertEqual(other.stats()["hits"], 1)
+
+    def test_entries_expire(self):
+        cache = DiskCache(self.directory, ttl=10)
+        cache.set("k", RESULT)
+        old = time.time() - 20
+        os.utime(os.path.join(self.directory, "k.json"), (old, old))
+
+        self.assertIsNone(cache.get("k"))
+
+    def test_corrupt_entry_is_a_miss(self):
+        cache = DiskCache(self.directory)
+        with open(os.path.join(self.directory, "k.json"), "w") as f:
+            f.write("{not json")
+
+        self.assertIsNone(cache.get("k"))
+
+    def test_prune_enforces_maxsize(self):
+        cache = DiskCache(self.directory, maxsize=3, prune_interval=1000)
+        for i in range(5):
+            cache.set(f"k{i}", RESULT)
+            stamp = time.time() - 100 + i
+            os.utime(os.path.join(self.directory, f"k{i}.json"), (stamp, stamp))
+
+        cache.prune()
+
+        self.assertEqual(cache.stats()["size"], 3)
+        self.assertIsNone(cache.get("k0"))
+        self.assertIsNotNone(cache.get("k4"))
+
+
+class TestEmotionDetectorCaching(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = MemoryCache()
+        set_cache(self.cache)
+
+    def tearDown(self):
+        set_cache(MemoryCache())
+
+    def test_repeated_text_is_served_from_cache(self):
+        with patch.object(http_client.HTTPClient, "post", return_value=make_response()) as mock_post:
+            first = emotion_detector("I love my life")
+            second = emotion_detector("I love my life ")
+
+        self.assertEqual(mock_post.call_count, 1)
+        self.assertEqual(first, second)
+        self.assertEqual(self.cache.stats()["hits"], 1)
+
+    def test_error_results_are_not_cached(self):
+        with patch.object(http_client.HTTPClient, "post", return_value=make_response(500)) as mock_post:
+            emotion_detector("I love my life")
+            emotion_detector("I love my life")
+
+        self.assertEqual(mock_post.call_count, 2)
+        self.assertEqual(self.cache.stats()["size"], 0)
+
+    def test_cache_can_be_bypassed(self):
+        with patch.object(http_client.HTTPClient, "post", return_value=make_response()) as mock_post:
+            emotion_detector("I love my life", use_cache=False)
+            emotion_detector("I love my life", use_cache=False)
+
+        self.assertEqual(mock_post.call_count, 2)
+        self.assertEqual(self.cache.stats()["size"], 0)
+
+    def test_cache_can_be_disabled(self):
+        set_cache(None)
+        self.assertIsNone(get_cache())
+
+        with patch.object(http_client.HTTPClient, "post", return_value=make_response()) as mock_post:
+            emotion_detector("I love my life")
+            emotion_detector("I love my life")
+
+        self.assertEqual(mock_post.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
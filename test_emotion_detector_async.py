@@ -0,0 +1,114 @@
+import unittest
+from unittest.mock import patch
+import asyncio
+
+from aiohttp import web
+
+from EmotionDetection.cache import MemoryCache, set_cache
+from EmotionDetection.async_detector import (
+    AsyncHTTPPool,
+    close_async_pool,
+    default_async_pool,
+    emotion_detector_async,
+)
+
+
+SAMPLE_RESPONSE = {
+    'emotionPredictions': [{
+        'emotion': {
+            'anger': 0.0132405795,
+            'disgust': 0.0020517302,
+            'fear': 0.009090992,
+            'joy': 0.9699522,
+            'sadness': 0.054984167
+        }
+    }]
+}
+
+
+class TestEmotionDetectorAsync(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        set_cache(MemoryCache())
+        self.statuses = []
+        self.bodies = []
+        self.active = 0
+        self.peak = 0
+
+        async def handler(request):
+            payload = await request.json()
+            self.bodies.append(payload)
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            await asyncio.sleep(0.01)
+            self.active -= 1
+            status = self.statuses.pop(0) if self.statuses else 200
+            return web.json_response(SAMPLE_RESPONSE, status=status)
+
+        app = web.Application()
+        app.router.add_post("/EmotionPredict", handler)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+
+        self.url_patch = patch("EmotionDetection.async_detector.URL",
+                               f"http://127.0.0.1:{port}/EmotionPredict")
+        self.url_patch.start()
+        self.pool = AsyncHTTPPool(max_concurrency=4, backoff_factor=0)
+
+    async def asyncTearDown(self):
+        self.url_patch.stop()
+        await self.pool.close()
+        await self.runner.cleanup()
+
+    async def test_successful_call(self):
+        result = await emotion_detector_async("I love new technology", pool=self.pool)
+
+        self.assertEqual(result['dominant_emotion'], 'joy')
+        self.assertEqual(set(result), {'anger', 'disgust', 'fear', 'joy', 'sadness', 'dominant_emotion'})
+        self.assertEqual(self.bodies[0], {"raw_document": {"text": "I love new technology"}})
+
+    async def test_empty_input_skips_request(self):
+        result = await emotion_detector_async("   ", pool=self.pool)
+
+        self.assertIsNone(result['dominant_emotion'])
+        self.assertEqual(self.bodies, [])
+
+    async def test_error_statuses_return_none_filled(self):
+        for status in (400, 500, 404):
+            with self.subTest(status=status):
+                self.statuses = [status]
+                result = await emotion_detector_async("text", pool=self.pool)
+                self.assertEqual(result, dict.fromkeys(result))
+
+    async def test_gateway_error_is_retried(self):
+        self.statuses = [503]
+
+        result = await emotion_detector_async("text", pool=self.pool)
+
+        self.assertEqual(result['dominant_emotion'], 'joy')
+        self.assertEqual(len(self.bodies), 2)
+
+    async def test_concurrency_is_bounded_by_semaphore(self):
+        results = await asyncio.gather(
+            *(emotion_detector_async(f"text {i}", pool=self.pool) for i in range(20)))
+
+        self.assertTrue(all(r['dominant_emotion'] == 'joy' for r in results))
+        self.assertLessEqual(self.peak, 4)
+
+    async def test_connection_error_returns_none_filled(self):
+        with patch("EmotionDetection.async_detector.URL", "http://127.0.0.1:1/EmotionPredict"), \
+                patch('builtins.print'):
+            result = await emotion_detector_async("text", pool=self.pool)
+
+        self.assertIsNone(result['dominant_emotion'])
+
+    async def test_default_pool_is_shared_per_loop(self):
+        self.assertIs(default_async_pool(), default_async_pool())
+        await close_async_pool()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,170 @@
+import unittest
+from unittest.mock import patch, Mock
+import itertools
+import json
+import os
+import threading
+import time
+
+from EmotionDetection import http_client
+from EmotionDetection.cache import set_cache
+from EmotionDetection.circuit_breaker import configure_circuit_breaker
+from EmotionDetection.emotion_detection import emotion_detector
+from EmotionDetection.hedging import Hedger, _hedger_from_env, configure_hedging, hedging_stats
+
+
+JOY = {'anger': 0.01, 'disgust': 0.01, 'fear': 0.01, 'joy': 0.9, 'sadness': 0.07,
+       'dominant_emotion': 'joy'}
+FAILED = dict.fromkeys(JOY)
+
+
+def scripted(*steps):
+    """Function whose n-th call sleeps and returns the n-th (delay, result) step"""
+    counter = itertools.count()
+    lock = threading.Lock()
+
+    def fn(text):
+        with lock:
+            delay, result = steps[min(next(counter), len(steps) - 1)]
+        time.sleep(delay)
+        return result
+    return fn
+
+
+class TestHedger(unittest.TestCase):
+
+    def make(self, **options):
+        options.setdefault("min_samples", 3)
+        options.setdefault("min_delay", 0.01)
+        hedger = Hedger(**options)
+        self.addCleanup(hedger.close)
+        # Warm up the latency window with fast calls
+        for _ in range(options["min_samples"]):
+            hedger.call(lambda text: JOY, "warm")
+        return hedger
+
+    def test_no_hedging_before_enough_samples(self):
+        hedger = Hedger(min_samples=5)
+        self.addCleanup(hedger.close)
+
+        self.assertIsNone(hedger.delay())
+        hedger.call(scripted((0.05, JOY)), "text")
+        self.assertEqual(hedger.stats()["hedges_sent"], 0)
+
+    def test_slow_call_is_hedged_and_hedge_wins(self):
+        hedger = self.make()
+        fn = scripted((1.0, JOY), (0.0, {**JOY, "joy": 0.8}))
+
+        started = time.perf_counter()
+        result = hedger.call(fn, "text")
+
+        self.assertLess(time.perf_counter() - started, 0.5)
+        self.assertEqual(result["joy"], 0.8)
+        stats = hedger.stats()
+        self.assertEqual(stats["hedges_sent"], 1)
+        self.assertEqual(stats["hedges_won"], 1)
+
+    def test_fast_call_is_not_hedged(self):
+        hedger = self.make(min_delay=0.2)
+        hedger.call(scripted((0.0, JOY)), "text")
+
+        self.assertEqual(hedger.stats()["hedges_sent"], 0)
+
+    def test_failed_hedge_does_not_win(self):
+        hedger = self.make()
+        fn = scripted((0.1, JOY), (0.0, FAILED))
+
+        self.assertEqual(hedger.call(fn, "text"), JOY)
+        self.assertEqual(hedger.stats()["hedges_won"], 0)
+
+    def test_both_failing_returns_failure(self):
+        hedger = self.make()
+        fn = scripted((0.05, FAILED), (0.0, FAILED))
+
+        self.assertEqual(hedger.call(fn, "text"), FAILED)
+
+    def test_hedge_rate_is_capped(self):
+        hedger = self.make(max_hedge_ratio=0.0, burst=1)
+        for _ in range(3):
+            hedger.call(scripted((0.05, JOY)), "text")
+
+        self.assertEqual(hedger.stats()["hedges_sent"], 1)
+
+    def test_delay_follows_percentile(self):
+        hedger = Hedger(min_samples=10, percentile=0.9, min_delay=0)
+        self.addCleanup(hedger.close)
+        for delay in [0.0] * 9 + [0.05]:
+            hedger.call(scripted((delay, JOY)), "text")
+
+        self.assertGreaterEqual(hedger.delay(), 0.05)
+
+    def test_invalid_percentile(self):
+        with self.assertRaises(ValueError):
+            Hedger(percentile=1.5)
+
+    def test_pool_fits_the_limiter(self):
+        with patch.dict(os.environ, {"EMOTION_LIMITER_MAX": "300", "EMOTION_LIMITER_QUEUE": "50"}):
+            hedger = Hedger(burst=10)
+        self.addCleanup(hedger.close)
+        self.assertEqual(hedger._executor._max_workers, 360)
+
+        with patch.dict(os.environ, {"EMOTION_HEDGING_MAX_WORKERS": "16"}):
+            hedger = _hedger_from_env()
+        self.addCleanup(hedger.close)
+        self.assertEqual(hedger._executor._max_workers, 16)
+
+    def test_time_queued_for_a_thread_is_not_latency(self):
+        hedger = Hedger(max_workers=1, min_samples=2)
+        self.addCleanup(hedger.close)
+        slow = scripted((0.1, JOY))
+
+        threads = [threading.Thread(target=hedger.call, args=(slow, "text")) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # The second call waited 0.1s for the only thread; that is not upstream time
+        self.assertLess(hedger.delay(), 0.15)
+
+
+class TestEmotionDetectorHedging(unittest.TestCase):
+
+    def setUp(self):
+        set_cache(None)
+        configure_circuit_breaker()
+        configure_hedging(enabled=False, min_samples=2, min_delay=0.01)
+        self.addCleanup(configure_hedging, enabled=False)
+
+    def test_hedged_emotion_detector(self):
+        body = json.dumps({'emotionPredictions': [{'emotion': {
+            'anger': 0.01, 'disgust': 0.01, 'fear': 0.01, 'joy': 0.9, 'sadness': 0.07}}]})
+        delays = iter([0.0, 0.0, 1.0])
+
+        def fake_post(url, **kwargs):
+            time.sleep(next(delays, 0.0))
+            return Mock(status_code=200, text=body)
+
+        with patch.object(http_client.HTTPClient, "post", side_effect=fake_post) as mock_post:
+            emotion_detector("warm up one", hedge=True)
+            emotion_detector("warm up two", hedge=True)
+            started = time.perf_counter()
+            result = emotion_detector("I love my life", hedge=True)
+
+        self.assertLess(time.perf_counter() - started, 0.5)
+        self.assertEqual(result['dominant_emotion'], 'joy')
+        self.assertEqual(mock_post.call_count, 4)
+        self.assertEqual(hedging_stats()["hedges_won"], 1)
+
+    def test_hedging_is_off_by_default(self):
+        body = json.dumps({'emotionPredictions': [{'emotion': {
+            'anger': 0.01, 'disgust': 0.01, 'fear': 0.01, 'joy': 0.9, 'sadness': 0.07}}]})
+        with patch.object(http_client.HTTPClient, "post",
+                          return_value=Mock(status_code=200, text=body)):
+            emotion_detector("I love my life")
+
+        self.assertEqual(hedging_stats()["calls"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+import unittest
+from unittest.mock import patch, AsyncMock
+import os
+
+from server import app
+from EmotionDetection.backends import set_backend
+from EmotionDetection.http_caching import cache_headers, etag_matches, result_etag
+from test_asgi_server import call
+
+
+JOY_RESULT = {'anger': 0.01, 'disgust': 0.01, 'fear': 0.01, 'joy': 0.9, 'sadness': 0.07,
+              'dominant_emotion': 'joy'}
+EMPTY_RESULT = dict.fromkeys(JOY_RESULT)
+
+
+class TestCachingHeaders(unittest.TestCase):
+
+    def setUp(self):
+        set_backend("watson")
+
+    def test_etag_is_deterministic(self):
+        self.assertEqual(result_etag("I love my life"), result_etag("I love my life"))
+        self.assertNotEqual(result_etag("I love my life"), result_etag("I hate rain"))
+        self.assertNotEqual(result_etag("I love my life"), result_etag("I love my life", True))
+
+    def test_etag_depends_on_model(self):
+        etag = result_etag("I love my life")
+        set_backend("local")
+        self.addCleanup(set_backend, "watson")
+
+        self.assertNotEqual(result_etag("I love my life"), etag)
+
+    def test_if_none_match(self):
+        etag = '"abc"'
+
+        self.assertTrue(etag_matches('"abc"', etag))
+        self.assertTrue(etag_matches('"x", W/"abc"', etag))
+        self.assertTrue(etag_matches('*', etag))
+        self.assertFalse(etag_matches('"abcd"', etag))
+        self.assertFalse(etag_matches(None, etag))
+
+    def test_max_age(self):
+        with patch.dict(os.environ, {"EMOTION_HTTP_CACHE_MAX_AGE": "60"}):
+            self.assertIn(("Cache-Control", "public, max-age=60"), cache_headers('"abc"'))
+        with patch.dict(os.environ, {"EMOTION_HTTP_CACHE_MAX_AGE": "0"}):
+            self.assertIn(("Cache-Control", "no-cache"), cache_headers('"abc"'))
+
+    def test_failures_are_not_cacheable(self):
+        self.assertEqual(dict(cache_headers('"abc"', ok=False)),
+                         {"Cache-Control": "no-store", "Vary": "Accept-Encoding"})
+
+
+class TestFlaskCaching(unittest.TestCase):
+
+    def setUp(self):
+        set_backend("watson")
+        self.client = app.test_client()
+
+    def test_result_carries_cache_headers(self):
+        with patch("server.emotion_detector_dispatched", return_value=JOY_RESULT):
+            response = self.client.get("/emotionDetector?textToAnalyze=I love my life")
+
+        self.assertEqual(response.headers["ETag"], result_etag("I love my life"))
+        self.assertEqual(response.headers["Cache-Control"], "public, max-age=3600")
+        self.assertEqual(response.headers["Vary"], "Accept-Encoding")
+
+    def test_conditional_request_skips_analysis(self):
+        etag = result_etag("I love my life")
+        with patch("server.emotion_detector_dispatched") as mock:
+            response = self.client.get("/emotionDetector?textToAnalyze=I love my life",
+                                       headers={"If-None-Match": etag})
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers["ETag"], etag)
+        self.assertEqual(response.get_data(), b"")
+        mock.assert_not_called()
+
+    def test_stale_etag_is_analyzed(self):
+        with patch("server.emotion_detector_dispatched", return_value=JOY_RESULT) as mock:
+            response = self.client.get("/emotionDetector?textToAnalyze=I love my life",
+                                       headers={"If-None-Match": result_etag("I hate rain")})
+
+        self.assertEqual(response.status_code, 200)
+        mock.assert_called_once()
+
+    def test_failed_result_has_no_etag(self):
+        with patch("server.emotion_detector_dispatched", return_value=EMPTY_RESULT):
+            response = self.client.get("/emotionDetector?textToAnalyze=I love my life")
+
+        self.assertNotIn("ETag", response.headers)
+        self.assertEqual(response.headers["Cache-Control"], "no-store")
+
+    def test_text_without_signal_has_no_etag(self):
+        set_backend("local")
+        self.addCleanup(set_backend, "watson")
+
+        response = self.client.get("/emotionDetector?textToAnalyze=Hello world")
+
+        self.assertIsNone(response.get_json()['dominant_emotion'])
+        self.assertAlmostEqual(response.get_json()['joy'], 0.2)
+        self.assertNotIn("ETag", response.headers)
+
+
+class TestASGICaching(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        set_backend("watson")
+
+    async def test_result_carries_cache_headers(self):
+        with patch("asgi_server.emotion_detector_async", AsyncMock(return_value=JOY_RESULT)):
+            status, headers, _ = await call("/emotionDetector", b"textToAnalyze=hi")
+
+        self.assertEqual(status, 200)
+        self.assertEqual(headers[b"etag"], result_etag("hi").encode())
+        self.assertEqual(headers[b"vary"], b"Accept-Encoding")
+
+    async def test_conditional_request_skips_analysis(self):
+        etag = result_etag("hi")
+        scope_headers = [(b"if-none-match", etag.encode())]
+        with patch("asgi_server.emotion_detector_async", AsyncMock()) as mock:
+            status, headers, body = await call("/emotionDetector", b"textToAnalyze=hi",
+                                               headers=scope_headers)
+
+        self.assertEqual(status, 304)
+        self.assertEqual(headers[b"etag"], etag.encode())
+        self.assertEqual(body, b"")
+        mock.assert_not_awaited()
+
+    async def test_failed_result_has_no_etag(self):
+        with patch("asgi_server.emotion_detector_async", AsyncMock(return_value=EMPTY_RESULT)):
+            _, headers, _ = await call("/emotionDetector", b"textToAnalyze=hi")
+
+        self.assertNotIn(b"etag", headers)
+        self.assertEqual(headers[b"cache-control"], b"no-store")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,176 @@
+import unittest
+from unittest.mock import patch, Mock
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from EmotionDetection import http_client
+from EmotionDetection.cache import MemoryCache, set_cache
+from EmotionDetection.http_client import HTTPClient, configure_http_client, default_http_client
+from EmotionDetection.emotion_detection import emotion_detector
+
+
+SAMPLE_RESPONSE = {
+    'emotionPredictions': [{
+        'emotion': {
+            'anger': 0.0132405795,
+            'disgust': 0.0020517302,
+            'fear': 0.009090992,
+            'joy': 0.9699522,
+            'sadness': 0.054984167
+        }
+    }]
+}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Answers EmotionPredict POSTs with a canned body over HTTP/1.1 keep-alive"""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        server = self.server
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+
+        with server.lock:
+            server.requests_seen += 1
+            status = server.statuses.pop(0) if server.statuses else 200
+
+        body = json.dumps(SAMPLE_RESPONSE).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.lock = threading.Lock()
+        self.requests_seen = 0
+        self.connections_seen = 0
+        self.statuses = []
+
+    def process_request(self, request, client_address):
+        with self.lock:
+            self.connections_seen += 1
+        super().process_request(request, client_address)
+
+
+class TestHTTPClient(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubServer()
+        self.thread = threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True)
+        self.thread.start()
+        self.url = "http://127.0.0.1:%d/EmotionPredict" % self.server.server_address[1]
+        self.client = HTTPClient(backoff_factor=0)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_connection_is_reused(self):
+        """Sequential calls on one thread share a single keep-alive connection"""
+        for _ in range(5):
+            response = self.client.post(self.url, json={"raw_document": {"text": "hi"}})
+            self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(self.server.requests_seen, 5)
+        self.assertEqual(self.server.connections_seen, 1)
+
+    def test_each_thread_gets_its_own_session(self):
+        """Sessions are not shared between threads"""
+        sessions = []
+
+        def grab():
+            sessions.append(self.client.session)
+
+        threads = [threading.Thread(target=grab) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(set(map(id, sessions))), 3)
+
+    def test_gateway_errors_are_retried(self):
+        """A 503 followed by a 200 is retried transparently"""
+        self.server.statuses = [503]
+
+        response = self.client.post(self.url, json={})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.server.requests_seen, 2)
+
+    def test_server_errors_are_not_retried(self):
+        """A 500 is returned as-is so emotion_detector can handle it"""
+        self.server.statuses = [500]
+
+        response = self.client.post(self.url, json={})
+
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(self.server.requests_seen, 1)
+
+    def test_retries_exhausted_returns_last_status(self):
+        """When every attempt fails the last gateway status is returned"""
+        self.server.statuses = [503, 503, 503]
+
+        response = self.client.post(self.url, json={})
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(self.server.requests_seen, 3)
+
+    def test_default_timeout_is_applied(self):
+        """Calls without an explicit timeout use the client's timeouts"""
+        client = HTTPClient(connect_timeout=1, read_timeout=2)
+        with patch.object(requests.Session, "post") as mock_post:
+            client.post(self.url, json={})
+        self.assertEqual(mock_post.call_args[1]["timeout"], (1, 2))
+        client.close()
+
+
+class TestDefaultHTTPClient(unittest.TestCase):
+
+    def setUp(self):
+        set_cache(MemoryCache())
+
+    def tearDown(self):
+        configure_http_client()
+
+    def test_default_client_is_shared(self):
+        self.assertIs(default_http_client(), default_http_client())
+
+    def test_configure_replaces_default(self):
+        old_client = default_http_client()
+        new_client = configure_http_client(pool_maxsize=64, read_timeout=5)
+
+        self.assertIsNot(old_client, new_client)
+        self.assertIs(default_http_client(), new_client)
+        self.assertEqual(new_client.pool_maxsize, 64)
+        self.assertEqual(new_client.timeout[1], 5)
+
+    def test_emotion_detector_uses_default_client(self):
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.text = json.dumps(SAMPLE_RESPONSE)
+
+        with patch.object(http_client.HTTPClient, "post", return_value=mock_response) as mock_post:
+            result = emotion_detector("I love new technology")
+
+        mock_post.assert_called_once()
+        self.assertEqual(result['dominant_emotion'], 'joy')
+
+
+if __name__ == '__main__':
+    unittest.main()
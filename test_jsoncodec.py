@@ -0,0 +1,79 @@
+import unittest
+from unittest.mock import patch
+import json
+
+import numpy as np
+
+from server import app
+from EmotionDetection import jsoncodec
+from EmotionDetection.watson import parse_emotions
+
+
+EMOTION = {'anger': 0.01, 'disgust': 0.02, 'fear': 0.03, 'joy': 0.9, 'sadness': 0.04}
+BODY = json.dumps({
+    'emotionPredictions': [{
+        'emotion': EMOTION,
+        'target': '',
+        'emotionMentions': [{'span': {'begin': 0, 'end': 14, 'text': 'I love my life'},
+                             'emotion': EMOTION}],
+    }],
+    'producerId': {'name': 'Ensemble Aggregated Emotion Workflow', 'version': '0.0.1'},
+})
+
+
+class TestParseEmotion(unittest.TestCase):
+
+    def test_bytes_and_text(self):
+        self.assertEqual(jsoncodec.parse_emotion(BODY.encode()), EMOTION)
+        self.assertEqual(jsoncodec.parse_emotion(BODY), EMOTION)
+
+    def test_mentions_are_not_decoded(self):
+        with patch.object(jsoncodec, "loads", wraps=jsoncodec.loads) as loads:
+            jsoncodec.parse_emotion(BODY)
+
+        # Only the small aggregate object is parsed
+        self.assertEqual(loads.call_args.args[0], json.dumps(EMOTION).encode())
+
+    def test_other_layouts_take_full_parse(self):
+        body = json.dumps({'producerId': {}, 'emotionPredictions': [
+            {'target': '', 'emotion': EMOTION}]})
+
+        self.assertEqual(jsoncodec.parse_emotion(body), EMOTION)
+
+    def test_malformed_bodies_raise(self):
+        for body in ('not json', '{}', '{"emotionPredictions": []}'):
+            with self.subTest(body=body):
+                with self.assertRaises((KeyError, IndexError, ValueError)):
+                    jsoncodec.parse_emotion(body)
+
+    def test_parse_emotions_result(self):
+        self.assertEqual(parse_emotions(BODY.encode()).dominant_emotion, 'joy')
+
+    def test_without_orjson(self):
+        with patch.object(jsoncodec, "orjson", None):
+            self.assertEqual(jsoncodec.parse_emotion(BODY.encode()), EMOTION)
+            self.assertEqual(jsoncodec.dumps({'a': 1}), b'{"a":1}')
+
+
+class TestDumps(unittest.TestCase):
+
+    def test_compact_bytes(self):
+        self.assertEqual(jsoncodec.dumps({'joy': 0.5, 'text': 'é'}), '{"joy":0.5,"text":"é"}'.encode())
+
+    def test_unusual_types_fall_back(self):
+        self.assertEqual(json.loads(jsoncodec.dumps({'joy': np.float64(0.5), 1: None})),
+                         {'joy': 0.5, '1': None})
+
+
+class TestFlaskProvider(unittest.TestCase):
+
+    def test_jsonify_uses_codec(self):
+        with app.test_request_context():
+            response = app.json.response({'dominant_emotion': 'joy'})
+
+        self.assertEqual(response.get_data(), b'{"dominant_emotion":"joy"}\n')
+        self.assertEqual(response.mimetype, 'application/json')
+
+
+if __name__ == '__main__':
+    unittest.main()
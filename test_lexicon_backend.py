@@ -0,0 +1,121 @@
+import unittest
+from unittest.mock import patch
+import os
+
+from EmotionDetection import http_client
+from EmotionDetection.backends import Backend, create_backend, get_backend, set_backend
+from EmotionDetection.batch import emotion_detector_batch
+from EmotionDetection.emotion_detection import analyze_emotions, emotion_detector
+from EmotionDetection.lexicon import LexiconBackend, tokenize
+from EmotionDetection.result import NO_SIGNAL
+from EmotionDetection.watson import WatsonBackend
+
+
+EMOTIONS = ['anger', 'disgust', 'fear', 'joy', 'sadness']
+
+
+class TestLexiconBackend(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = LexiconBackend()
+
+    def test_result_shape(self):
+        result = self.backend.analyze("I love my life")
+
+        self.assertEqual(list(result), EMOTIONS + ['dominant_emotion'])
+        for emotion in EMOTIONS:
+            self.assertIsInstance(result[emotion], float)
+            self.assertGreaterEqual(result[emotion], 0.0)
+            self.assertLessEqual(result[emotion], 1.0)
+        self.assertAlmostEqual(sum(result[e] for e in EMOTIONS), 1.0)
+
+    def test_required_statements(self):
+        """The statements used throughout the test suite get the expected emotion"""
+        cases = {
+            'I love my life': 'joy',
+            'I am glad this happened': 'joy',
+            'I am really mad about this': 'anger',
+            'I feel disgusted just hearing about this': 'disgust',
+            'I am so sad about this': 'sadness',
+            'I am really afraid that this will happen': 'fear',
+        }
+        for text, expected in cases.items():
+            with self.subTest(text=text):
+                self.assertEqual(self.backend.analyze(text)['dominant_emotion'], expected)
+
+    def test_unknown_words_score_uniformly(self):
+        result = self.backend.analyze("the quick brown fox")
+
+        self.assertEqual(len({result[e] for e in EMOTIONS}), 1)
+        self.assertIsNone(result['dominant_emotion'])
+
+    def test_no_signal_status(self):
+        set_backend("local")
+        self.addCleanup(set_backend, "watson")
+
+        for text in ("The meeting is at noon.", "Hello world"):
+            with self.subTest(text=text):
+                result = analyze_emotions(text)
+                self.assertEqual(result.status, NO_SIGNAL)
+                self.assertAlmostEqual(result.joy, 0.2)
+                self.assertFalse(result.ok)
+
+    def test_batch_matches_single_scoring(self):
+        texts = ["I love my life", "so sad and lonely", "nothing here", "I hate this gross food"]
+
+        batch = self.backend.analyze_batch(texts)
+
+        self.assertEqual(batch, [self.backend.analyze(text) for text in texts])
+
+    def test_empty_batch(self):
+        self.assertEqual(self.backend.analyze_batch([]), [])
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize("I don't LIKE this!"), ["i", "don't", "like", "this"])
+
+
+class TestBackendSelection(unittest.TestCase):
+
+    def tearDown(self):
+        set_backend("watson")
+
+    def test_create_backend(self):
+        self.assertIsInstance(create_backend("watson"), WatsonBackend)
+        self.assertIsInstance(create_backend("local"), LexiconBackend)
+        with self.assertRaises(ValueError):
+            create_backend("nope")
+
+    def test_backend_from_environment(self):
+        with patch.dict(os.environ, {"EMOTION_DETECTOR_BACKEND": "local"}), \
+                patch("EmotionDetection.backends._backend", None):
+            self.assertIsInstance(get_backend(), LexiconBackend)
+
+    def test_local_backend_never_calls_upstream(self):
+        set_backend("local")
+
+        with patch.object(http_client.HTTPClient, "post") as mock_post:
+            result = emotion_detector("I love my life")
+            batch = emotion_detector_batch(["I am so sad about this", "", "I am really afraid"])
+
+        mock_post.assert_not_called()
+        self.assertEqual(result['dominant_emotion'], 'joy')
+        self.assertEqual([r['dominant_emotion'] for r in batch], ['sadness', None, 'fear'])
+
+    def test_empty_input_with_local_backend(self):
+        set_backend("local")
+        self.assertIsNone(emotion_detector("  ")['dominant_emotion'])
+
+    def test_custom_backend(self):
+        class ConstantBackend(Backend):
+            name = "constant"
+
+            def analyze(self, text_to_analyse):
+                return dict.fromkeys(EMOTIONS, 0.2) | {'dominant_emotion': 'joy'}
+
+        set_backend(ConstantBackend())
+
+        self.assertEqual(emotion_detector("anything")['dominant_emotion'], 'joy')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,292 @@
+import unittest
+from unittest.mock import patch, AsyncMock, Mock
+import asyncio
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+
+from server import app
+from EmotionDetection import http_client
+from EmotionDetection.async_detector import emotion_detector_async
+from EmotionDetection.batch import emotion_detector_batch
+from EmotionDetection.cache import set_cache
+from EmotionDetection.circuit_breaker import configure_circuit_breaker
+from EmotionDetection.cli import main as cli_main
+from EmotionDetection.limiter import AdaptiveLimiter, Overloaded, configure_limiter
+from test_asgi_server import call
+
+
+JOY_BODY = json.dumps({'emotionPredictions': [{'emotion': {
+    'anger': 0.01, 'disgust': 0.01, 'fear': 0.01, 'joy': 0.9, 'sadness': 0.07}}]})
+
+
+class TestAdaptiveLimiter(unittest.TestCase):
+
+    def test_limit_grows_while_fast_and_utilized(self):
+        limiter = AdaptiveLimiter(initial_limit=2, max_limit=10)
+        for _ in range(20):
+            limiter.acquire()
+            limiter.acquire()
+            limiter.release(0.01)
+            limiter.release(0.01)
+
+        self.assertGreater(limiter.limit, 2)
+
+    def test_limit_does_not_grow_when_idle(self):
+        limiter = AdaptiveLimiter(initial_limit=4, max_limit=10)
+        for _ in range(20):
+            limiter.acquire()
+            limiter.release(0.01)
+
+        self.assertEqual(limiter.limit, 4)
+
+    def test_slow_calls_shrink_the_limit(self):
+        limiter = AdaptiveLimiter(initial_limit=10, tolerance=2.0, backoff_ratio=0.5)
+        limiter.acquire()
+        limiter.release(0.01)
+
+        limiter.acquire()
+        limiter.release(0.5)
+        self.assertEqual(limiter.limit, 5)
+
+    def test_one_decrease_per_limit_of_calls(self):
+        limiter = AdaptiveLimiter(initial_limit=4, backoff_ratio=0.5)
+        limiter.acquire()
+        limiter.release(0.01, dropped=True)
+        self.assertEqual(limiter.limit, 2)
+
+        # The next two dropped calls belong to the same congestion episode
+        for _ in range(2):
+            limiter.acquire()
+            limiter.release(0.01, dropped=True)
+        self.assertEqual(limiter.limit, 2)
+
+        limiter.acquire()
+        limiter.release(0.01, dropped=True)
+        self.assertEqual(limiter.limit, 1)
+
+    def test_limit_respects_bounds(self):
+        limiter = AdaptiveLimiter(initial_limit=2, min_limit=2, backoff_ratio=0.1)
+        limiter.acquire()
+        limiter.release(1.0, dropped=True)
+
+        self.assertEqual(limiter.limit, 2)
+
+    def test_full_queue_sheds_immediately(self):
+        limiter = AdaptiveLimiter(initial_limit=1, max_limit=1, max_queue=0, queue_timeout=3)
+        limiter.acquire()
+
+        with self.assertRaises(Overloaded) as raised:
+            limiter.acquire()
+        self.assertEqual(raised.exception.retry_after, 3)
+        self.assertEqual(limiter.stats()["rejected"], 1)
+
+    def test_queue_timeout(self):
+        limiter = AdaptiveLimiter(initial_limit=1, max_limit=1, queue_timeout=0.05)
+        limiter.acquire()
+
+        with self.assertRaises(Overloaded):
+            limiter.acquire()
+        self.assertEqual(limiter.stats()["waiting"], 0)
+
+    def test_waiter_gets_released_slot(self):
+        limiter = AdaptiveLimiter(initial_limit=1, max_limit=1, queue_timeout=5)
+        limiter.acquire()
+        acquired = threading.Event()
+
+        def waiter():
+            limiter.acquire()
+            acquired.set()
+
+        thread = threading.Thread(target=waiter)
+        thread.start()
+        self.assertFalse(acquired.wait(0.05))
+        limiter.release(0.01)
+        thread.join(5)
+
+        self.assertTrue(acquired.is_set())
+        self.assertEqual(limiter.stats()["in_flight"], 1)
+
+    def test_invalid_bounds(self):
+        with self.assertRaises(ValueError):
+            AdaptiveLimiter(initial_limit=5, max_limit=2)
+
+
+class TestAsyncAcquire(unittest.IsolatedAsyncioTestCase):
+
+    async def test_waiter_gets_released_slot(self):
+        limiter = AdaptiveLimiter(initial_limit=1, max_limit=1, queue_timeout=5)
+        await limiter.acquire_async()
+        waiter = asyncio.ensure_future(limiter.acquire_async())
+        await asyncio.sleep(0.01)
+        self.assertFalse(waiter.done())
+
+        limiter.release(0.01)
+        await asyncio.wait_for(waiter, 5)
+
+        self.assertEqual(limiter.stats(), {"limit": 1, "in_flight": 1, "waiting": 0, "rejected": 0})
+
+    async def test_thread_release_wakes_coroutine(self):
+        limiter = AdaptiveLimiter(initial_limit=1, max_limit=1, queue_timeout=5)
+        limiter.acquire()
+        waiter = asyncio.ensure_future(limiter.acquire_async())
+        await asyncio.sleep(0.01)
+
+        threading.Thread(target=limiter.release, args=(0.01,)).start()
+        await asyncio.wait_for(waiter, 5)
+
+        self.assertEqual(limiter.stats()["in_flight"], 1)
+
+    async def test_queue_timeout_and_full_queue(self):
+        limiter = AdaptiveLimiter(initial_limit=1, max_limit=1, max_queue=1, queue_timeout=0.05)
+        await limiter.acquire_async()
+        waiter = asyncio.ensure_future(limiter.acquire_async())
+        await asyncio.sleep(0)
+
+        with self.assertRaises(Overloaded):
+            await limiter.acquire_async()
+        with self.assertRaises(Overloaded):
+            await waiter
+        self.assertEqual(limiter.stats(), {"limit": 1, "in_flight": 1, "waiting": 0, "rejected": 2})
+
+
+class TestLibraryCallers(unittest.TestCase):
+
+    def setUp(self):
+        set_cache(None)
+        configure_circuit_breaker()
+        self.addCleanup(configure_limiter)
+
+    def test_only_servers_install_a_limiter(self):
+        code = ("from EmotionDetection.limiter import default_limiter\n"
+                "print(default_limiter() is None)\n"
+                "import {}\n"
+                "print(default_limiter() is None)")
+        root = os.path.dirname(os.path.abspath(__file__))
+        for module in ("server", "asgi_server"):
+            with self.subTest(module=module):
+                output = subprocess.run([sys.executable, "-c", code.format(module)], cwd=root,
+                                        check=True, capture_output=True, text=True).stdout
+                self.assertEqual(output.split(), ["True", "False"])
+
+    def test_batch_waits_without_a_limiter(self):
+        configure_limiter(enabled=False)
+        with patch.object(http_client.HTTPClient, "post",
+                          return_value=Mock(status_code=200, text=JOY_BODY)):
+            results = emotion_detector_batch([f"text {i}" for i in range(20)], 10)
+
+        self.assertEqual([r['dominant_emotion'] for r in results], ['joy'] * 20)
+
+    def test_shed_text_is_not_a_result(self):
+        configure_limiter(initial_limit=1, max_limit=1, max_queue=0)
+        finish = threading.Event()
+
+        def slow_post(url, **kwargs):
+            finish.wait(5)
+            return Mock(status_code=200, text=JOY_BODY)
+
+        with patch.object(http_client.HTTPClient, "post", side_effect=slow_post):
+            with self.assertRaises(Overloaded):
+                try:
+                    emotion_detector_batch(["first", "second"], 2)
+                finally:
+                    finish.set()
+
+    def test_cli_stops_without_checkpointing_shed_texts(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, "texts.txt")
+            output = os.path.join(tmp, "results.jsonl")
+            with open(source, "w") as f:
+                f.write("first\nsecond\nthird\n")
+
+            with patch("EmotionDetection.cli.iter_emotion_detector_batch",
+                       side_effect=Overloaded("busy")), \
+                    patch("sys.stderr", io.StringIO()) as stderr:
+                status = cli_main([source, "-o", output])
+
+            self.assertEqual(status, 1)
+            self.assertIn("--resume", stderr.getvalue())
+            self.assertFalse(os.path.exists(output + ".checkpoint"))
+
+
+class TestASGILoadShedding(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        set_cache(None)
+        configure_circuit_breaker()
+        self.addCleanup(configure_limiter)
+
+    async def test_async_upstream_call_is_limited(self):
+        limiter = configure_limiter(initial_limit=1, max_limit=1, max_queue=0)
+        limiter.acquire()
+
+        with self.assertRaises(Overloaded):
+            await emotion_detector_async("I love my life")
+        limiter.release(0.01)
+        self.assertEqual(limiter.stats()["rejected"], 1)
+
+    async def test_overload_returns_503_with_retry_after(self):
+        with patch("asgi_server.emotion_detector_async", AsyncMock(side_effect=Overloaded("busy", 3))):
+            status, headers, body = await call("/emotionDetector", b"textToAnalyze=hi")
+
+        self.assertEqual(status, 503)
+        self.assertEqual(headers[b"retry-after"], b"3")
+        self.assertIn("error", json.loads(body))
+
+
+class TestServerLoadShedding(unittest.TestCase):
+
+    def setUp(self):
+        self.app = app.test_client()
+        set_cache(None)
+        configure_circuit_breaker()
+        self.addCleanup(configure_limiter)
+
+    def test_overload_returns_503_with_retry_after(self):
+        configure_limiter(initial_limit=1, max_limit=1, max_queue=0, queue_timeout=2)
+        entered = threading.Event()
+        finish = threading.Event()
+
+        def slow_post(url, **kwargs):
+            entered.set()
+            finish.wait(5)
+            return Mock(status_code=200, text=JOY_BODY)
+
+        responses = []
+        with patch.object(http_client.HTTPClient, "post", side_effect=slow_post):
+            first = threading.Thread(target=lambda: responses.append(
+                app.test_client().get('/emotionDetector', query_string={'textToAnalyze': 'first'})))
+            first.start()
+            self.assertTrue(entered.wait(5))
+
+            shed = self.app.get('/emotionDetector', query_string={'textToAnalyze': 'second'})
+            finish.set()
+            first.join(5)
+
+        self.assertEqual(shed.status_code, 503)
+        self.assertEqual(shed.headers["Retry-After"], "2")
+        self.assertIn("error", shed.get_json())
+        self.assertEqual(responses[0].get_json()['dominant_emotion'], 'joy')
+
+    def test_batch_route_ends_with_an_error_line(self):
+        with patch("server.iter_emotion_detector_completed", side_effect=Overloaded("busy", 2)):
+            response = self.app.post('/emotionDetector/batch', json=["hi", "there"])
+
+        lines = [json.loads(line) for line in response.get_data().splitlines()]
+        self.assertEqual(lines, [{"error": "Service overloaded, retry later", "retry_after": 2}])
+
+    def test_disabled_limiter(self):
+        configure_limiter(enabled=False)
+        with patch.object(http_client.HTTPClient, "post",
+                          return_value=Mock(status_code=200, text=JOY_BODY)):
+            response = self.app.get('/emotionDetector', query_string={'textToAnalyze': 'hi'})
+
+        self.assertEqual(response.status_code, 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,150 @@
+import unittest
+from unittest.mock import patch, Mock
+import asyncio
+import json
+
+import requests
+
+from server import app
+import asgi_server
+from EmotionDetection import http_client, metrics
+from EmotionDetection.cache import MemoryCache, set_cache
+from EmotionDetection.circuit_breaker import configure_circuit_breaker
+from EmotionDetection.metrics import Counter, Gauge, Histogram
+
+
+def fake_post(url, **kwargs):
+    """Scores every text as joy; 'fail' gets a 500 and 'slow' times out"""
+    text = kwargs['json']['raw_document']['text']
+    if text == "slow":
+        raise requests.exceptions.Timeout()
+    mock_response = Mock()
+    mock_response.status_code = 500 if text == "fail" else 200
+    mock_response.text = json.dumps({'emotionPredictions': [{'emotion': {
+        'anger': 0.01, 'disgust': 0.01, 'fear': 0.01, 'joy': 0.9, 'sadness': 0.07}}]})
+    return mock_response
+
+
+class TestMetricTypes(unittest.TestCase):
+
+    def test_counter_with_labels(self):
+        counter = Counter("test_total", "A counter", ("status",), register=False)
+        counter.inc("200")
+        counter.inc("200")
+        counter.inc("500", amount=3)
+
+        self.assertEqual(counter.value("200"), 2)
+        self.assertEqual(list(counter.samples()),
+                         ['test_total{status="200"} 2', 'test_total{status="500"} 3'])
+
+    def test_wrong_label_count(self):
+        counter = Counter("test_total", "A counter", ("status",), register=False)
+        with self.assertRaises(ValueError):
+            counter.inc()
+
+    def test_gauge(self):
+        gauge = Gauge("test_in_flight", "A gauge", register=False)
+        gauge.inc()
+        gauge.inc()
+        gauge.dec()
+
+        self.assertEqual(gauge.value(), 1)
+        self.assertEqual(gauge.header()[1], "# TYPE test_in_flight gauge")
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = Histogram("test_seconds", "A histogram", buckets=(0.1, 1.0), register=False)
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value)
+
+        self.assertEqual(list(histogram.samples()), [
+            'test_seconds_bucket{le="0.1"} 2',
+            'test_seconds_bucket{le="1.0"} 3',
+            'test_seconds_bucket{le="+Inf"} 4',
+            'test_seconds_sum 3.65',
+            'test_seconds_count 4',
+        ])
+
+    def test_label_values_are_escaped(self):
+        counter = Counter("test_total", "A counter", ("route",), register=False)
+        counter.inc('a"b\\c')
+
+        self.assertEqual(list(counter.samples()), ['test_total{route="a\\"b\\\\c"} 1'])
+
+
+class TestFlaskMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.app = app.test_client()
+        set_cache(MemoryCache())
+        self.addCleanup(set_cache, None)
+        configure_circuit_breaker()
+        post_patch = patch.object(http_client.HTTPClient, "post", side_effect=fake_post)
+        post_patch.start()
+        self.addCleanup(post_patch.stop)
+
+    def test_request_and_upstream_counters(self):
+        ok = metrics.UPSTREAM_RESPONSES.value("200")
+        errors = metrics.UPSTREAM_RESPONSES.value("500")
+        timeouts = metrics.UPSTREAM_RESPONSES.value("timeout")
+        fallbacks = metrics.DETECTOR_RESULTS.value("fallback")
+        served = metrics.HTTP_REQUESTS.value("/emotionDetector", "200")
+        totals = metrics.REQUEST_PHASES.count("total")
+
+        with patch("builtins.print"):
+            for text in ("I love my life", "fail", "slow"):
+                self.app.get('/emotionDetector', query_string={'textToAnalyze': text})
+
+        self.assertEqual(metrics.UPSTREAM_RESPONSES.value("200"), ok + 1)
+        self.assertEqual(metrics.UPSTREAM_RESPONSES.value("500"), errors + 1)
+        self.assertEqual(metrics.UPSTREAM_RESPONSES.value("timeout"), timeouts + 1)
+        self.assertEqual(metrics.DETECTOR_RESULTS.value("fallback"), fallbacks + 2)
+        self.assertEqual(metrics.HTTP_REQUESTS.value("/emotionDetector", "200"), served + 3)
+        self.assertEqual(metrics.REQUEST_PHASES.count("total"), totals + 3)
+        self.assertEqual(metrics.HTTP_IN_FLIGHT.value(), 0)
+
+    def test_metrics_endpoint(self):
+        self.app.get('/emotionDetector', query_string={'textToAnalyze': 'I love my life'})
+        self.app.get('/emotionDetector', query_string={'textToAnalyze': 'I love my life'})
+
+        response = self.app.get('/metrics')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith("text/plain; version=0.0.4"))
+        body = response.get_data(as_text=True)
+        self.assertIn('emotion_request_duration_seconds_bucket{phase="upstream",le="+Inf"}', body)
+        self.assertIn('emotion_request_duration_seconds_count{phase="parse"}', body)
+        self.assertIn("# TYPE emotion_http_requests_in_flight gauge", body)
+        self.assertIn("emotion_cache_hits_total 1", body)
+        self.assertIn("emotion_cache_hit_ratio 0.5", body)
+        self.assertIn('emotion_circuit_breaker_state{state="closed"} 1', body)
+
+    def test_unmatched_routes_share_a_label(self):
+        before = metrics.HTTP_REQUESTS.value("unmatched", "404")
+
+        self.app.get('/no/such/page')
+
+        self.assertEqual(metrics.HTTP_REQUESTS.value("unmatched", "404"), before + 1)
+
+
+class TestASGIMetrics(unittest.TestCase):
+
+    def test_metrics_route(self):
+        messages = []
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            messages.append(message)
+
+        before = metrics.HTTP_REQUESTS.value("/metrics", "200")
+        scope = {"type": "http", "method": "GET", "path": "/metrics", "query_string": b""}
+        asyncio.run(asgi_server.app(scope, receive, send))
+
+        self.assertEqual(messages[0]["status"], 200)
+        self.assertIn(b"# TYPE emotion_upstream_responses_total counter", messages[1]["body"])
+        self.assertEqual(metrics.HTTP_REQUESTS.value("/metrics", "200"), before + 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+import json
+import os
+import subprocess
+import sys
+
+import EmotionDetection
+from EmotionDetection import emotion_detection, emotion_detection_latest, watson
+
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def modules_after(statement):
+    """Modules a fresh interpreter has loaded after running ``statement``."""
+    code = f"import json, sys\n{statement}\nprint(json.dumps(sorted(sys.modules)))"
+    output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True,
+                            capture_output=True, text=True).stdout
+    return set(json.loads(output))
+
+
+class TestPackage(unittest.TestCase):
+
+    def test_one_canonical_entry_point(self):
+        self.assertIs(EmotionDetection.emotion_detector, emotion_detection.emotion_detector)
+        self.assertIs(emotion_detection_latest.emotion_detector, emotion_detection.emotion_detector)
+
+    def test_old_reexports_still_resolve(self):
+        self.assertEqual(emotion_detection_latest.MODEL_ID, watson.MODEL_ID)
+        self.assertIs(emotion_detection_latest.parse_emotions, watson.parse_emotions)
+
+    def test_unknown_name(self):
+        with self.assertRaises(AttributeError):
+            EmotionDetection.no_such_name
+
+    def test_all_exports_resolve(self):
+        for name in EmotionDetection.__all__:
+            with self.subTest(name=name):
+                self.assertIsNotNone(getattr(EmotionDetection, name))
+
+
+class TestImportCost(unittest.TestCase):
+
+    HEAVY = {"requests", "urllib3", "numpy", "asyncio", "aiohttp", "flask"}
+
+    def test_package_import_loads_nothing(self):
+        loaded = modules_after("import EmotionDetection")
+
+        self.assertNotIn("EmotionDetection.emotion_detection", loaded)
+        self.assertFalse(self.HEAVY & loaded)
+
+    def test_entry_point_skips_backends(self):
+        loaded = modules_after("from EmotionDetection import emotion_detector")
+
+        self.assertFalse(self.HEAVY & loaded)
+        self.assertNotIn("EmotionDetection.watson", loaded)
+
+    def test_cli_skips_backends(self):
+        loaded = modules_after("import EmotionDetection.cli")
+
+        self.assertFalse(self.HEAVY & loaded)
+
+    def test_server_does_not_load_requests(self):
+        loaded = modules_after("import server")
+
+        self.assertNotIn("requests", loaded)
+        self.assertNotIn("EmotionDetection.watson", loaded)
+
+    def test_backend_loads_on_first_use(self):
+        loaded = modules_after(
+            "from EmotionDetection.backends import create_backend\ncreate_backend('watson')")
+
+        self.assertIn("requests", loaded)
+
+
+if __name__ == '__main__':
+    unittest.main()
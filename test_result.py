@@ -0,0 +1,126 @@
+import unittest
+from unittest.mock import patch, Mock
+import json
+import sys
+
+from EmotionDetection import http_client
+from EmotionDetection.backends import set_backend
+from EmotionDetection.batch import emotion_detector_batch
+from EmotionDetection.cache import set_cache
+from EmotionDetection.circuit_breaker import configure_circuit_breaker
+from EmotionDetection.emotion_detection import analyze_emotions, emotion_detector
+from EmotionDetection.result import (
+    EMPTY_RESULT, NO_SIGNAL, PARSE_ERROR, TIMEOUT, UPSTREAM_ERROR, EmotionResult, as_result)
+from EmotionDetection.watson import analyze_upstream
+
+
+SCORES = {'anger': 0.01, 'disgust': 0.02, 'fear': 0.03, 'joy': 0.9, 'sadness': 0.04}
+JOY_BODY = json.dumps({'emotionPredictions': [{'emotion': SCORES}]})
+
+
+class TestEmotionResult(unittest.TestCase):
+
+    def test_from_scores_picks_dominant(self):
+        result = EmotionResult.from_scores(SCORES)
+
+        self.assertEqual(result.dominant_emotion, 'joy')
+        self.assertTrue(result.ok)
+        self.assertEqual(result.status, 'ok')
+
+    def test_to_dict_keeps_json_shape(self):
+        result = EmotionResult.from_scores(SCORES)
+
+        self.assertEqual(result.to_dict(), {**SCORES, 'dominant_emotion': 'joy'})
+        self.assertEqual(EMPTY_RESULT.to_dict(), dict.fromkeys(list(SCORES) + ['dominant_emotion']))
+
+    def test_dictionary_style_access(self):
+        result = EmotionResult.from_scores(SCORES)
+
+        self.assertEqual(result['joy'], 0.9)
+        self.assertEqual(result.get('dominant_emotion'), 'joy')
+        self.assertIsNone(result.get('status'))
+        self.assertEqual(result[3], 0.9)
+        with self.assertRaises(KeyError):
+            result['missing']
+
+    def test_failures_are_shared(self):
+        self.assertIs(EmotionResult.failure(TIMEOUT), EmotionResult.failure(TIMEOUT))
+        self.assertFalse(EMPTY_RESULT.ok)
+        self.assertEqual(EmotionResult.failure(TIMEOUT, "slow").reason, "slow")
+
+    def test_as_result_converts_dictionaries(self):
+        result = as_result({**SCORES, 'dominant_emotion': 'joy'})
+
+        self.assertEqual(result, EmotionResult.from_scores(SCORES))
+        self.assertIs(as_result(dict.fromkeys(SCORES, None)), EMPTY_RESULT)
+
+    def test_uniform_scores_have_no_dominant_emotion(self):
+        result = EmotionResult.from_scores(dict.fromkeys(SCORES, 0.2))
+
+        self.assertIsNone(result.dominant_emotion)
+        self.assertEqual(result.status, NO_SIGNAL)
+        self.assertTrue(result.scored)
+        self.assertFalse(result.ok)
+        self.assertEqual(as_result(result.to_dict()), result)
+
+    def test_smaller_than_dictionary(self):
+        result = EmotionResult.from_scores(SCORES)
+
+        self.assertLess(sys.getsizeof(result), sys.getsizeof(result.to_dict()))
+
+
+class TestResultStatus(unittest.TestCase):
+
+    def setUp(self):
+        set_cache(None)
+        set_backend("watson")
+        configure_circuit_breaker()
+
+    def test_server_error_status(self):
+        with patch.object(http_client.HTTPClient, "post",
+                          return_value=Mock(status_code=500, text="")):
+            result = analyze_upstream("text")
+
+        self.assertEqual(result.status, UPSTREAM_ERROR)
+        self.assertIsNone(result.dominant_emotion)
+
+    def test_parse_error_has_reason(self):
+        with patch.object(http_client.HTTPClient, "post",
+                          return_value=Mock(status_code=200, text="{}")):
+            result = analyze_upstream("text")
+
+        self.assertEqual(result.status, PARSE_ERROR)
+        self.assertTrue(result.reason)
+
+    def test_analyze_emotions_and_emotion_detector_agree(self):
+        with patch.object(http_client.HTTPClient, "post",
+                          return_value=Mock(status_code=200, text=JOY_BODY)):
+            result = analyze_emotions("I love my life")
+            legacy = emotion_detector("I love my life")
+
+        self.assertIsInstance(result, EmotionResult)
+        self.assertEqual(result.to_dict(), legacy)
+
+    def test_empty_input(self):
+        self.assertIs(analyze_emotions("   "), EMPTY_RESULT)
+
+    def test_compact_batch(self):
+        with patch.object(http_client.HTTPClient, "post",
+                          return_value=Mock(status_code=200, text=JOY_BODY)):
+            results = emotion_detector_batch(["one", "", "two"], compact=True)
+
+        self.assertTrue(all(isinstance(result, EmotionResult) for result in results))
+        self.assertEqual([result.dominant_emotion for result in results], ['joy', None, 'joy'])
+
+    def test_compact_local_batch(self):
+        set_backend("local")
+        self.addCleanup(set_backend, "watson")
+
+        results = emotion_detector_batch(["I love my life", ""], compact=True)
+
+        self.assertIsInstance(results[0], EmotionResult)
+        self.assertIs(results[1], EMPTY_RESULT)
+
+
+if __name__ == '__main__':
+    unittest.main()
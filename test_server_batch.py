@@ -0,0 +1,89 @@
+import unittest
+from unittest.mock import patch, Mock
+import json
+
+from server import app
+from EmotionDetection import http_client
+from EmotionDetection.cache import MemoryCache, set_cache
+
+
+def fake_post(url, **kwargs):
+    """Scores every text as joy, except 'fail' which gets a 500"""
+    text = kwargs['json']['raw_document']['text']
+    mock_response = Mock()
+    mock_response.status_code = 500 if text == "fail" else 200
+    mock_response.text = json.dumps({'emotionPredictions': [{'emotion': {
+        'anger': 0.01, 'disgust': 0.01, 'fear': 0.01, 'joy': 0.9, 'sadness': 0.07}}]})
+    return mock_response
+
+
+class TestEmotionDetectorBatchEndpoint(unittest.TestCase):
+
+    def setUp(self):
+        self.app = app.test_client()
+        self.app.testing = True
+        set_cache(MemoryCache())
+        self.post_patch = patch.object(http_client.HTTPClient, "post", side_effect=fake_post)
+        self.mock_post = self.post_patch.start()
+
+    def tearDown(self):
+        self.post_patch.stop()
+
+    def read_lines(self, response):
+        return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+    def test_json_array_of_strings(self):
+        response = self.app.post('/emotionDetector/batch',
+                                 json=["I love my life", "I am glad", "So happy"])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, "application/x-ndjson")
+        lines = self.read_lines(response)
+        self.assertEqual(sorted(line['id'] for line in lines), [0, 1, 2])
+        self.assertTrue(all(line['dominant_emotion'] == 'joy' for line in lines))
+
+    def test_ndjson_objects_keep_ids(self):
+        body = '{"id": "a", "text": "I love my life"}\n\n{"id": "b", "text": "fail"}\n"plain"\n'
+        response = self.app.post('/emotionDetector/batch', data=body,
+                                 content_type="application/x-ndjson")
+
+        self.assertEqual(response.status_code, 200)
+        lines = {line['id']: line for line in self.read_lines(response)}
+        self.assertEqual(set(lines), {"a", "b", 2})
+        self.assertEqual(lines["a"]['dominant_emotion'], 'joy')
+        self.assertIsNone(lines["b"]['dominant_emotion'])
+        self.assertEqual(lines[2]['dominant_emotion'], 'joy')
+
+    def test_every_text_is_sent_upstream(self):
+        texts = [f"text {i}" for i in range(50)]
+        response = self.app.post('/emotionDetector/batch?concurrency=4', json=texts)
+
+        self.assertEqual(len(self.read_lines(response)), 50)
+        self.assertEqual(self.mock_post.call_count, 50)
+
+    def test_malformed_body(self):
+        response = self.app.post('/emotionDetector/batch', data="not json",
+                                 content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('error', json.loads(response.data))
+
+    def test_non_array_body(self):
+        response = self.app.post('/emotionDetector/batch', json={"text": "hi"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_invalid_item(self):
+        response = self.app.post('/emotionDetector/batch', json=["ok", 42])
+        self.assertEqual(response.status_code, 400)
+
+    def test_empty_batch(self):
+        response = self.app.post('/emotionDetector/batch', json=[])
+        self.assertEqual(response.status_code, 400)
+
+    def test_too_many_items(self):
+        with patch("server.BATCH_MAX_ITEMS", 2):
+            response = self.app.post('/emotionDetector/batch', json=["a", "b", "c"])
+        self.assertEqual(response.status_code, 413)
+
+
+if __name__ == '__main__':
+    unittest.main()
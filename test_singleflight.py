@@ -0,0 +1,223 @@
+import unittest
+from unittest.mock import patch, Mock
+import asyncio
+import json
+import threading
+import time
+
+from EmotionDetection import http_client
+from EmotionDetection.cache import set_cache
+from EmotionDetection.circuit_breaker import configure_circuit_breaker
+from EmotionDetection.emotion_detection import configure_client, emotion_detector
+from EmotionDetection.singleflight import AsyncSingleFlight, SingleFlight, coalescing_stats
+
+
+SAMPLE_BODY = json.dumps({'emotionPredictions': [{'emotion': {
+    'anger': 0.01, 'disgust': 0.01, 'fear': 0.01, 'joy': 0.9, 'sadness': 0.07}}]})
+
+
+class TestSingleFlight(unittest.TestCase):
+
+    def run_concurrently(self, group, key_for, count=5):
+        """Start ``count`` threads calling group.do while the leader is held up"""
+        release = threading.Event()
+        started = threading.Barrier(count + 1)
+        results = [None] * count
+        errors = [None] * count
+        calls = []
+
+        def slow(value):
+            calls.append(value)
+            release.wait(5)
+            if value == "boom":
+                raise RuntimeError("boom")
+            return value.upper()
+
+        def worker(i):
+            started.wait()
+            try:
+                results[i] = group.do(key_for(i), slow, key_for(i))
+            except RuntimeError as e:
+                errors[i] = e
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+        for thread in threads:
+            thread.start()
+        started.wait()
+        # Give every worker time to reach do() before the leader returns
+        while group.stats()["executed"] + group.stats()["coalesced"] < count:
+            time.sleep(0.001)
+        release.set()
+        for thread in threads:
+            thread.join()
+        return results, errors, calls
+
+    def test_identical_keys_share_one_call(self):
+        group = SingleFlight()
+        results, _, calls = self.run_concurrently(group, lambda i: "text")
+
+        self.assertEqual(calls, ["text"])
+        self.assertEqual(results, ["TEXT"] * 5)
+        self.assertEqual(group.stats(), {"executed": 1, "coalesced": 4, "in_flight": 0})
+
+    def test_child_group_counts_in_parent(self):
+        parent = SingleFlight()
+        child = SingleFlight(parent=parent)
+        self.run_concurrently(child, lambda i: "text")
+
+        self.assertEqual(parent.stats(), {"executed": 1, "coalesced": 4, "in_flight": 0})
+        self.assertEqual(child.stats(), parent.stats())
+
+    def test_different_keys_are_not_coalesced(self):
+        group = SingleFlight()
+        results, _, calls = self.run_concurrently(group, lambda i: f"text {i}")
+
+        self.assertEqual(len(calls), 5)
+        self.assertEqual(group.stats()["coalesced"], 0)
+
+    def test_errors_are_shared(self):
+        group = SingleFlight()
+        _, errors, calls = self.run_concurrently(group, lambda i: "boom")
+
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(isinstance(e, RuntimeError) for e in errors))
+
+    def test_sequential_calls_run_again(self):
+        group = SingleFlight()
+        group.do("k", lambda: 1)
+        group.do("k", lambda: 2)
+
+        self.assertEqual(group.stats()["executed"], 2)
+
+
+class TestAsyncSingleFlight(unittest.IsolatedAsyncioTestCase):
+
+    async def test_identical_keys_share_one_call(self):
+        group = AsyncSingleFlight()
+        calls = []
+
+        async def slow(value):
+            calls.append(value)
+            await asyncio.sleep(0.01)
+            return value.upper()
+
+        results = await asyncio.gather(*(group.do("k", slow, "text") for _ in range(5)))
+
+        self.assertEqual(results, ["TEXT"] * 5)
+        self.assertEqual(calls, ["text"])
+        self.assertEqual(group.stats(), {"executed": 1, "coalesced": 4, "in_flight": 0})
+
+    async def test_cancelled_waiter_does_not_cancel_leader(self):
+        group = AsyncSingleFlight()
+
+        async def slow():
+            await asyncio.sleep(0.01)
+            return "done"
+
+        leader = asyncio.ensure_future(group.do("k", slow))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(group.do("k", slow))
+        await asyncio.sleep(0)
+        waiter.cancel()
+
+        self.assertEqual(await leader, "done")
+
+    async def test_cancelled_leader_does_not_cancel_waiter(self):
+        group = AsyncSingleFlight()
+        calls = []
+
+        async def slow():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "done"
+
+        leader = asyncio.ensure_future(group.do("k", slow))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(group.do("k", slow))
+        await asyncio.sleep(0)
+        leader.cancel()
+
+        self.assertEqual(await waiter, "done")
+        self.assertEqual(len(calls), 2)
+
+
+class TestEmotionDetectorCoalescing(unittest.TestCase):
+
+    def setUp(self):
+        set_cache(None)
+
+    def tearDown(self):
+        set_cache(None)
+
+    def test_concurrent_identical_texts_hit_upstream_once(self):
+        release = threading.Event()
+        entered = threading.Event()
+
+        def slow_post(url, **kwargs):
+            entered.set()
+            release.wait(5)
+            mock_response = Mock()
+            mock_response.status_code = 200
+            mock_response.text = SAMPLE_BODY
+            return mock_response
+
+        results = []
+        with patch.object(http_client.HTTPClient, "post", side_effect=slow_post) as mock_post, \
+                patch("EmotionDetection.emotion_detection.upstream_calls", SingleFlight()) as group:
+            threads = [threading.Thread(target=lambda: results.append(emotion_detector("viral post")))
+                       for _ in range(4)]
+            threads[0].start()
+            entered.wait(5)
+            for thread in threads[1:]:
+                thread.start()
+            while group.stats()["coalesced"] < 3:
+                time.sleep(0.001)
+            release.set()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(mock_post.call_count, 1)
+        self.assertEqual(len(results), 4)
+        self.assertTrue(all(r['dominant_emotion'] == 'joy' for r in results))
+        # Every caller gets its own copy of the shared result
+        self.assertEqual(len(set(map(id, results))), 4)
+
+    def test_configured_default_client_is_counted(self):
+        # A configured client coalesces in its own group, which must still
+        # show up in coalescing_stats (and so in /metrics)
+        configure_client(read_timeout=5)
+        self.addCleanup(configure_client)
+        configure_circuit_breaker()
+        release = threading.Event()
+        entered = threading.Event()
+
+        def slow_post(url, **kwargs):
+            entered.set()
+            release.wait(5)
+            return Mock(status_code=200, text=SAMPLE_BODY)
+
+        before = coalescing_stats()
+        with patch.object(http_client.HTTPClient, "post", side_effect=slow_post) as mock_post:
+            threads = [threading.Thread(target=emotion_detector, args=("configured viral post",))
+                       for _ in range(5)]
+            threads[0].start()
+            entered.wait(5)
+            for thread in threads[1:]:
+                thread.start()
+            deadline = time.monotonic() + 2
+            while (coalescing_stats()["coalesced"] - before["coalesced"] < 4
+                   and time.monotonic() < deadline):
+                time.sleep(0.001)
+            release.set()
+            for thread in threads:
+                thread.join()
+
+        after = coalescing_stats()
+        self.assertEqual(mock_post.call_count, 1)
+        self.assertEqual(after["executed"] - before["executed"], 1)
+        self.assertEqual(after["coalesced"] - before["coalesced"], 4)
+        self.assertEqual(after["in_flight"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
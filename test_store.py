@@ -0,0 +1,181 @@
+import unittest
+from unittest.mock import patch, Mock
+import io
+import json
+import multiprocessing
+import os
+import tempfile
+import threading
+
+from EmotionDetection import http_client, store
+from EmotionDetection.backends import set_backend
+from EmotionDetection.batch import emotion_detector_batch
+from EmotionDetection.cache import _cache_from_env, set_cache
+from EmotionDetection.circuit_breaker import configure_circuit_breaker
+from EmotionDetection.cli import main
+from EmotionDetection.emotion_detection import emotion_detector
+from EmotionDetection.store import ResultStore
+
+
+JOY = {'anger': 0.01, 'disgust': 0.01, 'fear': 0.01, 'joy': 0.9, 'sadness': 0.07,
+       'dominant_emotion': 'joy'}
+JOY_BODY = json.dumps({'emotionPredictions': [{'emotion': {
+    name: JOY[name] for name in ('anger', 'disgust', 'fear', 'joy', 'sadness')}}]})
+
+
+def write_keys(path, prefix, count):
+    # Runs in a separate process
+    result_store = ResultStore(path)
+    for start in range(0, count, 10):
+        result_store.put_many({f"{prefix}{i}": JOY for i in range(start, start + 10)})
+        result_store.get_many([f"{prefix}{i}" for i in range(start)])
+
+
+class TestResultStore(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "results.sqlite3")
+        self.store = ResultStore(self.path)
+        self.addCleanup(self.store.close)
+
+    def test_get_and_set(self):
+        self.assertIsNone(self.store.get("a"))
+        self.store.set("a", JOY)
+
+        self.assertEqual(self.store.get("a"), JOY)
+
+    def test_bulk_operations(self):
+        self.store.put_many({f"key{i}": {**JOY, "joy": i} for i in range(1200)})
+
+        found = self.store.get_many(["key5", "missing", "key1199"])
+
+        self.assertEqual(found, {"key5": {**JOY, "joy": 5}, "key1199": {**JOY, "joy": 1199}})
+        self.assertEqual(len(self.store.get_many(f"key{i}" for i in range(1200))), 1200)
+
+    def test_persists_across_instances(self):
+        self.store.set("a", JOY)
+
+        reopened = ResultStore(self.path)
+        self.addCleanup(reopened.close)
+        self.assertEqual(reopened.get("a"), JOY)
+
+    def test_ttl(self):
+        expiring = ResultStore(self.path, ttl=60)
+        self.addCleanup(expiring.close)
+        with patch.object(store.time, "time", return_value=1000.0):
+            expiring.set("a", JOY)
+        with patch.object(store.time, "time", return_value=1100.0):
+            self.assertIsNone(expiring.get("a"))
+            expiring.prune()
+
+        self.assertEqual(expiring.stats()["size"], 0)
+
+    def test_stats_and_clear(self):
+        self.store.set("a", JOY)
+        self.store.get_many(["a", "b"])
+
+        stats = self.store.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["size"]), (1, 1, 1))
+        self.store.clear()
+        self.assertEqual(self.store.stats()["size"], 0)
+
+    def test_threads_share_the_store(self):
+        def worker(n):
+            for i in range(50):
+                self.store.set(f"{n}-{i}", JOY)
+                self.store.get(f"{n}-{i}")
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.store.stats()["size"], 200)
+
+    def test_concurrent_processes(self):
+        context = multiprocessing.get_context("spawn")
+        processes = [context.Process(target=write_keys, args=(self.path, f"p{n}-", 100))
+                     for n in range(3)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(60)
+
+        self.assertEqual([process.exitcode for process in processes], [0, 0, 0])
+        self.assertEqual(self.store.stats()["size"], 300)
+
+    def test_selected_from_environment(self):
+        env = {"EMOTION_DETECTOR_CACHE": "sqlite", "EMOTION_DETECTOR_CACHE_PATH": self.path}
+        with patch.dict(os.environ, env):
+            configured = _cache_from_env()
+
+        self.assertIsInstance(configured, ResultStore)
+        self.assertIsNone(configured.ttl)
+
+
+class TestStoreIntegration(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "results.sqlite3")
+        self.store = ResultStore(self.path)
+        set_cache(self.store)
+        self.addCleanup(set_cache, None)
+        set_backend("watson")
+        configure_circuit_breaker()
+
+    def post(self):
+        return patch.object(http_client.HTTPClient, "post",
+                            return_value=Mock(status_code=200, text=JOY_BODY))
+
+    def test_emotion_detector_reuses_stored_results(self):
+        with self.post() as mock_post:
+            emotion_detector("I love my life")
+            result = emotion_detector("I love my life")
+
+        self.assertEqual(mock_post.call_count, 1)
+        self.assertEqual(result, JOY)
+
+    def test_rerun_only_scores_new_texts(self):
+        texts = [f"message {i}" for i in range(20)]
+        with self.post() as mock_post:
+            first = emotion_detector_batch(texts, max_concurrency=4)
+        self.assertEqual(mock_post.call_count, 20)
+
+        with self.post() as mock_post, \
+                patch.object(self.store, "get_many", wraps=self.store.get_many) as get_many:
+            second = emotion_detector_batch(texts + ["", "brand new"], max_concurrency=4)
+
+        self.assertEqual(mock_post.call_count, 1)
+        self.assertEqual(get_many.call_count, 1)
+        self.assertEqual(second[:20], first)
+        self.assertIsNone(second[20]['dominant_emotion'])
+        self.assertEqual(self.store.stats()["size"], 21)
+
+    def test_failed_results_are_not_stored(self):
+        with patch.object(http_client.HTTPClient, "post",
+                          return_value=Mock(status_code=500, text="")):
+            emotion_detector_batch(["a", "b"])
+
+        self.assertEqual(self.store.stats()["size"], 0)
+
+    def test_cli_store_option(self):
+        tmp = os.path.dirname(self.path)
+        source = os.path.join(tmp, "in.txt")
+        with open(source, "w", encoding="utf-8") as f:
+            f.write("one\ntwo\none\n")
+        store_path = os.path.join(tmp, "cli.sqlite3")
+
+        for expected_calls in (2, 0):
+            with self.post() as mock_post, patch("sys.stderr", io.StringIO()):
+                main([source, "-o", os.path.join(tmp, "out.jsonl"), "--store", store_path,
+                      "--concurrency", "1"])
+            self.assertEqual(mock_post.call_count, expected_calls)
+
+
+if __name__ == '__main__':
+    unittest.main()
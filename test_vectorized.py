@@ -0,0 +1,112 @@
+import unittest
+from unittest.mock import patch
+import math
+
+import numpy as np
+
+from EmotionDetection.backends import set_backend
+from EmotionDetection.batch import emotion_detector_columns
+from EmotionDetection.lexicon import LexiconBackend
+from EmotionDetection.vectorized import EMOTIONS, EmotionColumns, featurize, normalized_scores
+
+
+VOCABULARY = {"love": 0, "sad": 1, "mad": 2}
+
+
+def to_dense(features):
+    dense = np.zeros(features.shape)
+    for row in range(features.shape[0]):
+        start, end = features.indptr[row], features.indptr[row + 1]
+        dense[row, features.indices[start:end]] = features.data[start:end]
+    return dense
+
+
+class TestFeaturize(unittest.TestCase):
+
+    def test_counts_per_text(self):
+        features = featurize(["I love love it", "so SAD", "", "mad, sad and love"], VOCABULARY)
+
+        self.assertEqual(features.shape, (4, 3))
+        np.testing.assert_array_equal(to_dense(features), [
+            [2, 0, 0],
+            [0, 1, 0],
+            [0, 0, 0],
+            [1, 1, 1],
+        ])
+
+    def test_separator_inside_text(self):
+        features = featurize(["love\x00sad", "mad"], VOCABULARY)
+
+        np.testing.assert_array_equal(to_dense(features), [[1, 1, 0], [0, 0, 1]])
+
+    def test_no_texts(self):
+        features = featurize([], VOCABULARY)
+        self.assertEqual(features.shape, (0, 3))
+
+    def test_dot_matches_dense_product(self):
+        features = featurize(["love sad sad", "mad love", "nothing"], VOCABULARY)
+        weights = np.arange(15, dtype=float).reshape(3, 5)
+
+        np.testing.assert_allclose(features.dot(weights), to_dense(features) @ weights)
+
+    def test_normalized_scores_sum_to_one(self):
+        features = featurize(["love sad", "nothing"], VOCABULARY)
+        scores = normalized_scores(features, np.eye(3, 5), 0.05)
+
+        np.testing.assert_allclose(scores.sum(axis=1), [1, 1])
+        np.testing.assert_allclose(scores[1], [0.2] * 5)
+
+
+class TestEmotionColumns(unittest.TestCase):
+
+    def test_from_scores_with_invalid_rows(self):
+        scores = np.array([[0.1, 0.1, 0.1, 0.6, 0.1], [0.2] * 5])
+        columns = EmotionColumns.from_scores(scores, valid=np.array([True, False]))
+
+        self.assertEqual(columns.size, 2)
+        self.assertEqual(columns.dominant_emotion, ['joy', None])
+        self.assertTrue(math.isnan(columns.joy[1]))
+
+    def test_results_round_trip(self):
+        results = [
+            {'anger': 0.1, 'disgust': 0.1, 'fear': 0.1, 'joy': 0.6, 'sadness': 0.1, 'dominant_emotion': 'joy'},
+            dict.fromkeys(EMOTIONS + ('dominant_emotion',)),
+            {**dict.fromkeys(EMOTIONS, 0.2), 'dominant_emotion': None},
+        ]
+
+        columns = EmotionColumns.from_results(results)
+
+        self.assertEqual(columns.to_results(), results)
+        self.assertEqual(columns.dominant_emotion, ['joy', None, None])
+        self.assertEqual(columns.dominant.dtype, np.int8)
+
+
+class TestEmotionDetectorColumns(unittest.TestCase):
+
+    def tearDown(self):
+        set_backend("watson")
+
+    def test_local_backend_is_vectorized(self):
+        backend = set_backend(LexiconBackend())
+        texts = ["I love my life", "I am so sad about this", "", "I am really afraid"]
+
+        columns = emotion_detector_columns(texts)
+
+        self.assertEqual(columns.dominant_emotion, ['joy', 'sadness', None, 'fear'])
+        expected = [backend.analyze(text)['joy'] for text in texts if text]
+        np.testing.assert_allclose(np.delete(columns.joy, 2), expected)
+
+    def test_remote_backend_results_are_packed(self):
+        set_backend("watson")
+        result = {'anger': 0.6, 'disgust': 0.1, 'fear': 0.1, 'joy': 0.1, 'sadness': 0.1,
+                  'dominant_emotion': 'anger'}
+
+        with patch("EmotionDetection.batch.emotion_detector", return_value=result):
+            columns = emotion_detector_columns(["a", "b"])
+
+        self.assertEqual(columns.dominant_emotion, ['anger', 'anger'])
+        np.testing.assert_allclose(columns.anger, [0.6, 0.6])
+
+
+if __name__ == '__main__':
+    unittest.main()